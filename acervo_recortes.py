@@ -0,0 +1,220 @@
+# Acervo de recortes de placa: shards NumPy mapeados em memória + índice JSONL
+# Recortes normalizados para um tamanho fixo ficam em arquivos .npy pré-alocados; anexar é
+# escrever numa posição livre e ler é uma view do memmap (sem cópia), em qualquer ordem
+
+import json
+import os
+
+import cv2
+import numpy as np
+
+from registros_resultado import LeituraPlaca, RegistroResultado
+
+ARQUIVO_META = 'acervo.json'
+ARQUIVO_INDICE = 'indice.jsonl'
+
+
+def normalizar_recorte(recorte, altura, largura, canais=3):
+    """Redimensionar para (altura, largura) e converter para o número de canais do acervo"""
+    if recorte.ndim == 2 and canais == 3:
+        recorte = cv2.cvtColor(recorte, cv2.COLOR_GRAY2BGR)
+    elif recorte.ndim == 3 and canais == 1:
+        recorte = cv2.cvtColor(recorte, cv2.COLOR_BGR2GRAY)
+    h, w = recorte.shape[:2]
+    interpolacao = cv2.INTER_AREA if h > altura or w > largura else cv2.INTER_LINEAR
+    recorte = cv2.resize(recorte, (largura, altura), interpolation=interpolacao)
+    return recorte.reshape(altura, largura, canais)
+
+
+class AcervoRecortes:
+    """
+    Diretório com acervo.json (formato), shard_NNNNN.npy (capacidade x altura x largura x canais)
+    e indice.jsonl (uma linha por recorte: texto, bbox, origem, scores, shard e posição)
+    Um único escritor por acervo; leitores podem abrir ao mesmo tempo (veem o que o índice já lista)
+    """
+
+    def __init__(self, diretorio, modo='r', altura=104, largura=320, canais=3, capacidade_shard=4096, lote=256):
+        if modo not in ('r', 'a'):
+            raise ValueError("modo deve ser 'r' (leitura) ou 'a' (anexar)")
+
+        self.diretorio = diretorio
+        self.modo = modo
+        self.lote = lote
+        caminho_meta = os.path.join(diretorio, ARQUIVO_META)
+
+        if os.path.exists(caminho_meta):
+            with open(caminho_meta, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+        elif modo == 'a':
+            os.makedirs(diretorio, exist_ok=True)
+            self.meta = {'altura': altura, 'largura': largura, 'canais': canais, 'capacidade_shard': capacidade_shard}
+            with open(caminho_meta, 'w', encoding='utf-8') as f:
+                json.dump(self.meta, f, indent=2)
+        else:
+            raise FileNotFoundError(f"Acervo não encontrado: {diretorio}")
+
+        self.registros = []
+        self.shards = {}
+        self.pendentes = []
+        self._carregar_indice()
+
+        self.arquivo_indice = open(os.path.join(diretorio, ARQUIVO_INDICE), 'a', encoding='utf-8') if modo == 'a' else None
+
+    @property
+    def formato(self):
+        return (self.meta['altura'], self.meta['largura'], self.meta['canais'])
+
+    def _carregar_indice(self):
+        caminho = os.path.join(self.diretorio, ARQUIVO_INDICE)
+        if not os.path.exists(caminho):
+            return
+        fim_valido = 0
+        with open(caminho, 'rb') as f:
+            for linha in f:
+                if not linha.endswith(b'\n'):
+                    break
+                try:
+                    self.registros.append(json.loads(linha.decode('utf-8')))
+                except ValueError:
+                    break
+                fim_valido += len(linha)
+
+        if self.modo == 'a' and fim_valido < os.path.getsize(caminho):
+            # Linha final truncada por uma queda: cortar o arquivo depois da última linha completa
+            # (o recorte correspondente é descartado e a posição dele será reaproveitada)
+            os.truncate(caminho, fim_valido)
+
+    def _caminho_shard(self, numero):
+        return os.path.join(self.diretorio, f'shard_{numero:05d}.npy')
+
+    def _shard(self, numero):
+        """Memmap do shard (criado pré-alocado no modo 'a'; arquivo esparso até ser preenchido)"""
+        if numero not in self.shards:
+            caminho = self._caminho_shard(numero)
+            if self.modo == 'a' and not os.path.exists(caminho):
+                self.shards[numero] = np.lib.format.open_memmap(
+                    caminho, mode='w+', dtype=np.uint8, shape=(self.meta['capacidade_shard'],) + self.formato)
+            else:
+                self.shards[numero] = np.load(caminho, mmap_mode='r+' if self.modo == 'a' else 'r')
+        return self.shards[numero]
+
+    def __len__(self):
+        return len(self.registros)
+
+    def __getitem__(self, indice):
+        """Recorte `indice` como view somente leitura do memmap (copie para alterar)"""
+        registro = self.registros[indice]
+        recorte = self._shard(registro['shard'])[registro['posicao']]
+        if self.modo == 'a':
+            recorte = recorte.view()
+            recorte.flags.writeable = False
+        return recorte if self.meta['canais'] == 3 else recorte[:, :, 0]
+
+    def registro(self, indice):
+        return self.registros[indice]
+
+    def __iter__(self):
+        for indice in range(len(self.registros)):
+            yield self.registros[indice], self[indice]
+
+    def adicionar(self, recorte, texto, bbox=None, origem=None, confianca=0.0, consenso=0.0,
+                  metodo='', placa_valida=False, rotulo=None, **extras):
+        """Anexar um recorte; devolve o índice. O índice vai para o disco a cada `lote` recortes"""
+        if self.modo != 'a':
+            raise IOError("Acervo aberto somente para leitura")
+
+        numero = len(self.registros) // self.meta['capacidade_shard']
+        posicao = len(self.registros) % self.meta['capacidade_shard']
+        h, w = recorte.shape[:2]
+        self._shard(numero)[posicao] = normalizar_recorte(recorte, *self.formato)
+
+        registro = dict(extras, texto=texto, bbox=[int(v) for v in bbox] if bbox is not None else None,
+                        origem=origem, confianca=float(confianca), consenso=float(consenso), metodo=metodo,
+                        placa_valida=bool(placa_valida), rotulo=rotulo, tamanho_original=[int(h), int(w)],
+                        shard=numero, posicao=posicao)
+        self.registros.append(registro)
+        self.pendentes.append(registro)
+        if len(self.pendentes) >= self.lote:
+            self.descarregar()
+        return len(self.registros) - 1
+
+    def adicionar_resultado(self, resultado, somente_validas=False, **extras):
+        """
+        Anexar os recortes de um resultado de processar_imagem (dict com imagem_placa) ou de um
+        RegistroResultado com recortes (config['manter_recortes']); devolve os índices
+        """
+        if isinstance(resultado, dict):
+            origem = resultado.get('caminho')
+            leituras = [LeituraPlaca.de_resultado_ocr(ocr, True) for ocr in resultado.get('resultados_ocr', [])]
+        else:
+            origem, leituras = resultado.caminho, resultado.leituras
+
+        indices = []
+        for leitura in leituras:
+            if leitura.recorte is None or (somente_validas and not leitura.placa_valida):
+                continue
+            indices.append(self.adicionar(leitura.recorte, leitura.texto, leitura.bbox, origem, leitura.confianca,
+                                          leitura.consenso, leitura.metodo, leitura.placa_valida, **extras))
+        return indices
+
+    def descarregar(self):
+        """Gravar no disco (com fsync) os recortes e depois as linhas do índice que apontam para eles"""
+        if not self.pendentes:
+            return
+        for numero in {r['shard'] for r in self.pendentes}:
+            self.shards[numero].flush()
+        self.arquivo_indice.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in self.pendentes))
+        self.arquivo_indice.flush()
+        os.fsync(self.arquivo_indice.fileno())
+        self.pendentes = []
+
+    def buscar(self, texto=None, placa_valida=None, origem=None):
+        """Índices dos recortes que atendem aos filtros (texto sem hífen, ignorando maiúsculas)"""
+        alvo = texto.replace('-', '').upper() if texto else None
+        indices = []
+        for indice, registro in enumerate(self.registros):
+            if alvo is not None and (registro['texto'] or '').replace('-', '').upper() != alvo:
+                continue
+            if placa_valida is not None and registro['placa_valida'] != placa_valida:
+                continue
+            if origem is not None and registro['origem'] != origem:
+                continue
+            indices.append(indice)
+        return indices
+
+    def amostras(self, somente_rotuladas=False, somente_validas=False):
+        """Pares (recorte, placa) para avaliação offline: o rótulo quando existe, senão o texto lido"""
+        pares = []
+        for indice, registro in enumerate(self.registros):
+            if somente_rotuladas and not registro.get('rotulo'):
+                continue
+            if somente_validas and not registro['placa_valida']:
+                continue
+            pares.append((self[indice], registro.get('rotulo') or registro['texto']))
+        return pares
+
+    def registros_resultado(self):
+        """Um RegistroResultado por origem, com as leituras apontando para os recortes do acervo"""
+        por_origem = {}
+        for indice, registro in enumerate(self.registros):
+            origem = registro['origem']
+            if origem not in por_origem:
+                por_origem[origem] = RegistroResultado(caminho=origem,
+                                                       nome_arquivo=os.path.basename(origem) if origem else f'recorte-{indice}')
+            leitura = LeituraPlaca(registro['texto'], registro['bbox'], registro['confianca'], registro['consenso'],
+                                   registro['metodo'], placa_valida=registro['placa_valida'], recorte=self[indice])
+            por_origem[origem].leituras.append(leitura)
+            por_origem[origem].candidatos += 1
+        return list(por_origem.values())
+
+    def fechar(self):
+        if self.modo == 'a':
+            self.descarregar()
+            self.arquivo_indice.close()
+        self.shards = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
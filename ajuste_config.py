@@ -0,0 +1,215 @@
+# Ajuste automático de self.config sobre um conjunto rotulado
+# Mede latência e acerto exato de cada configuração e reporta a frente de Pareto
+
+import argparse
+import itertools
+import json
+import os
+import random
+import re
+import time
+
+# Valores testados por parâmetro (o primeiro de cada lista não é necessariamente o padrão)
+ESPACO_BUSCA = {
+    'bilateral_d': [5, 7, 9, 11],
+    'clahe_clip': [2.0, 3.0, 4.0],
+    'adaptativa_bloco': [11, 15, 21],
+    'adaptativa_c': [2, 3, 5],
+    'canny_low': [10, 20, 40],
+    'canny_high': [80, 120, 160],
+    'morph_close_iteracoes': [1, 2, 3],
+    'dilatacao_bordas_iteracoes': [1, 2, 3],
+    'placa_area_min': [400, 800, 1500],
+    'placa_aspect_ratio_min': [1.5, 1.8, 2.2],
+    'placa_aspect_ratio_max': [5.0, 7.0],
+    'candidatos_preliminar_max': [3, 5, 10],
+    'placas_max': [1, 3, 5],
+    'detector_caracteres_exclusivo': [False, True],
+    'retificacao_ativa': [False, True],
+    'decodificacao_restrita': [False, True],
+}
+
+
+def _texto_placa(texto):
+    return re.sub(r'[^A-Z0-9]', '', str(texto or '').upper())
+
+
+def carregar_rotulos(caminho):
+    """
+    Ler amostras 'caminho;placa' (ou 'caminho,placa'), uma por linha; caminhos relativos ao arquivo
+    Linhas sem separador, caminho ou placa são ignoradas com aviso
+    """
+    base = os.path.dirname(os.path.abspath(caminho))
+    amostras = []
+    with open(caminho, 'r', encoding='utf-8') as f:
+        for numero, linha in enumerate(f, 1):
+            linha = linha.strip()
+            if not linha or linha.startswith('#'):
+                continue
+            partes = [parte.strip() for parte in re.split(r'[;,]', linha, maxsplit=1)]
+            if len(partes) != 2 or not all(partes):
+                print(f"⚠️ {caminho}:{numero}: linha ignorada (esperado 'caminho;placa'): {linha}")
+                continue
+            imagem, placa = partes
+            amostras.append((os.path.join(base, imagem), placa))
+    return amostras
+
+
+def avaliar_config(sistema, amostras, ajustes=None, log_callback=None):
+    """Rodar o conjunto com os ajustes aplicados; devolve latência média/p95 e taxa de acerto exato"""
+    anteriores = sistema.aplicar_config(ajustes or {})
+    tempos = []
+    acertos = 0
+
+    try:
+        for caminho, esperado in amostras:
+            inicio = time.perf_counter()
+            resultado = sistema.processar_imagem(caminho, compacto=True)
+            tempos.append(time.perf_counter() - inicio)
+
+            if _texto_placa(resultado.placa) == _texto_placa(esperado):
+                acertos += 1
+    finally:
+        sistema.aplicar_config(anteriores)
+
+    tempos.sort()
+    ponto = {
+        'config': dict(ajustes or {}),
+        'latencia_media': sum(tempos) / len(tempos) if tempos else 0.0,
+        'latencia_p95': tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))] if tempos else 0.0,
+        'acerto_exato': acertos / float(len(amostras)) if amostras else 0.0,
+        'amostras': len(amostras),
+    }
+
+    if log_callback:
+        log_callback(f"⏱️ {ponto['latencia_media']*1000:.0f}ms | 🎯 {ponto['acerto_exato']:.1%} | {ponto['config']}")
+
+    return ponto
+
+
+def frente_pareto(pontos):
+    """Pontos não dominados (menor latência média, maior acerto exato), ordenados por latência"""
+    frente = []
+    for ponto in sorted(pontos, key=lambda p: (p['latencia_media'], -p['acerto_exato'])):
+        if not frente or ponto['acerto_exato'] > frente[-1]['acerto_exato']:
+            frente.append(ponto)
+    return frente
+
+
+def _configuracoes(espaco, modo, tentativas, semente):
+    chaves = sorted(espaco)
+
+    if modo == 'grade':
+        for valores in itertools.product(*(espaco[chave] for chave in chaves)):
+            yield dict(zip(chaves, valores))
+        return
+
+    if modo == 'coordenadas':
+        # Um parâmetro por vez, os demais no padrão
+        for chave in chaves:
+            for valor in espaco[chave]:
+                yield {chave: valor}
+        return
+
+    sorteio = random.Random(semente)
+    vistas = set()
+    for _ in range(tentativas * 20):
+        if len(vistas) >= tentativas:
+            break
+        ajustes = {chave: sorteio.choice(espaco[chave]) for chave in chaves}
+        assinatura = json.dumps(ajustes, sort_keys=True)
+        if assinatura not in vistas:
+            vistas.add(assinatura)
+            yield ajustes
+
+
+def varrer(sistema, amostras, espaco=None, modo='aleatorio', tentativas=30, semente=0, log_callback=None):
+    """
+    Avaliar a configuração atual e as do espaço de busca (modo 'aleatorio', 'coordenadas' ou 'grade')
+    O agendador de variantes fica desligado para que a ordem do OCR não mude entre as rodadas
+    """
+    espaco = espaco or ESPACO_BUSCA
+    agendador, sistema.agendador = sistema.agendador, None
+
+    try:
+        # Aquecimento: a primeira imagem paga inicializações preguiçosas
+        if amostras:
+            sistema.processar_imagem(amostras[0][0], compacto=True)
+
+        pontos = [avaliar_config(sistema, amostras, {}, log_callback)]
+        for ajustes in _configuracoes(espaco, modo, tentativas, semente):
+            pontos.append(avaliar_config(sistema, amostras, ajustes, log_callback))
+
+        # Perfil completo: todos os parâmetros do espaço, não só os alterados
+        for ponto in pontos:
+            ponto['config'] = dict({chave: sistema.config[chave] for chave in espaco}, **ponto['config'])
+    finally:
+        sistema.agendador = agendador
+
+    return pontos
+
+
+def escolher_perfil(frente, latencia_max=None, acerto_min=None):
+    """
+    Com latencia_max: o de maior acerto dentro do orçamento
+    Com acerto_min: o mais rápido que atinge o acerto; sem restrição: o de maior acerto
+    """
+    if latencia_max is not None:
+        dentro = [p for p in frente if p['latencia_media'] <= latencia_max]
+        return max(dentro, key=lambda p: p['acerto_exato']) if dentro else None
+
+    if acerto_min is not None:
+        dentro = [p for p in frente if p['acerto_exato'] >= acerto_min]
+        return min(dentro, key=lambda p: p['latencia_media']) if dentro else None
+
+    return max(frente, key=lambda p: (p['acerto_exato'], -p['latencia_media'])) if frente else None
+
+
+def exportar_perfil(ponto, caminho):
+    """Gravar o perfil escolhido (lido por SistemaReconhecimentoPlacasMelhorado.carregar_config)"""
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(ponto, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ajuste de configuração: frente de Pareto latência x acerto')
+    parser.add_argument('rotulos', help="Arquivo com 'caminho;placa' por linha")
+    parser.add_argument('--modo', choices=['aleatorio', 'coordenadas', 'grade'], default='aleatorio')
+    parser.add_argument('--tentativas', type=int, default=30)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--latencia-max', type=float, help='Orçamento de latência média (segundos)')
+    parser.add_argument('--acerto-min', type=float, help='Taxa mínima de acerto exato (0-1)')
+    parser.add_argument('--relatorio', help='Gravar todos os pontos e a frente em JSON')
+    parser.add_argument('--exportar', help='Gravar o perfil escolhido em JSON')
+    args = parser.parse_args()
+
+    from sistema_placas_final import SistemaReconhecimentoPlacasMelhorado
+
+    amostras = carregar_rotulos(args.rotulos)
+    sistema = SistemaReconhecimentoPlacasMelhorado()
+
+    pontos = varrer(sistema, amostras, modo=args.modo, tentativas=args.tentativas,
+                    semente=args.semente, log_callback=print)
+    frente = frente_pareto(pontos)
+
+    print("\n📈 FRENTE DE PARETO (latência média x acerto exato):")
+    for ponto in frente:
+        print(f"   {ponto['latencia_media']*1000:8.0f}ms  {ponto['acerto_exato']:6.1%}  {ponto['config']}")
+
+    if args.relatorio:
+        with open(args.relatorio, 'w', encoding='utf-8') as f:
+            json.dump({'pontos': pontos, 'frente': frente}, f, ensure_ascii=False, indent=2)
+
+    escolhido = escolher_perfil(frente, args.latencia_max, args.acerto_min)
+    if escolhido is None:
+        print("\n⚠️ Nenhuma configuração atende às restrições")
+        return
+
+    print(f"\n✅ Escolhido: {escolhido['latencia_media']*1000:.0f}ms, {escolhido['acerto_exato']:.1%} -> {escolhido['config']}")
+    if args.exportar:
+        exportar_perfil(escolhido, args.exportar)
+        print(f"💾 Perfil exportado: {args.exportar}")
+
+
+if __name__ == '__main__':
+    main()
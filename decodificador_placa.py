@@ -0,0 +1,233 @@
+# Decodificação restrita à gramática das placas (Mercosul LLLNLNN e antiga LLLNNNN)
+# Recebe probabilidades por posição (Tesseract) ou por quadro CTC (EasyOCR) e devolve a melhor placa válida
+
+import math
+import re
+
+import numpy as np
+
+from indice_placas import CLASSES_CONFUSAO
+
+LETRAS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+DIGITOS = '0123456789'
+
+# L = letra, N = dígito
+MODELOS_PLACA = {
+    'mercosul': 'LLLNLNN',
+    'antiga': 'LLLNNNN',
+}
+
+_CLASSE = {'L': LETRAS, 'N': DIGITOS}
+
+_PARCEIROS = {}
+for _classe in CLASSES_CONFUSAO:
+    for _c in _classe:
+        _PARCEIROS.setdefault(_c, set()).update(x for x in _classe if x != _c)
+
+
+def suavizar_confusoes(distribuicao, massa=0.5, piso=1e-4):
+    """
+    Completar uma distribuição {caractere: prob} com os parceiros de confusão do OCR (O/0, I/1, ...)
+    e um piso para os demais caracteres, para que a gramática sempre tenha uma saída
+    """
+    suavizada = {c: piso for c in LETRAS + DIGITOS}
+    for c, p in distribuicao.items():
+        c = c.upper()
+        if c in suavizada:
+            suavizada[c] = max(suavizada[c], p)
+    for c, p in distribuicao.items():
+        for parceiro in _PARCEIROS.get(c.upper(), ()):
+            suavizada[parceiro] = max(suavizada[parceiro], p * massa)
+    total = sum(suavizada.values())
+    return {c: p / total for c, p in suavizada.items()}
+
+
+def pontuacao(media_log, calibracao=None):
+    """Score em [0, 1]: média geométrica das probabilidades ou Platt (a, b) ajustado por calibrar_platt"""
+    if calibracao is None:
+        return math.exp(media_log)
+    a, b = calibracao
+    return 1.0 / (1.0 + math.exp(-(a * media_log + b)))
+
+
+def calibrar_platt(amostras, iteracoes=2000, passo=0.1):
+    """Ajustar (a, b) de pontuacao() a partir de pares (media_log, acertou) por regressão logística"""
+    x = np.array([m for m, _ in amostras], dtype=np.float64)
+    y = np.array([1.0 if acerto else 0.0 for _, acerto in amostras])
+    a, b = 1.0, 0.0
+    for _ in range(iteracoes):
+        p = 1.0 / (1.0 + np.exp(-(a * x + b)))
+        a -= passo * np.mean((p - y) * x)
+        b -= passo * np.mean(p - y)
+    return float(a), float(b)
+
+
+def decodificar_posicoes(distribuicoes, modelos=None, custo_salto=math.log(0.1), calibracao=None):
+    """
+    Melhor placa para uma sequência de distribuições por posição (uma por símbolo lido)
+    Posições a mais (bordas, "BR", ruído) podem ser puladas: de graça antes/depois da placa,
+    com custo_salto entre dois caracteres dela
+    Retorna {'texto', 'formato', 'log_prob', 'media_log', 'score'} ou None
+    """
+    distribuicoes = [suavizar_confusoes(d) for d in distribuicoes]
+    modelos = modelos or MODELOS_PLACA
+    melhor = None
+
+    for formato, modelo in modelos.items():
+        n, k = len(distribuicoes), len(modelo)
+        if n < k:
+            continue
+
+        # dp[i][j]: melhor log-prob usando i posições lidas para emitir j caracteres do modelo
+        dp = [[-math.inf] * (k + 1) for _ in range(n + 1)]
+        origem = [[None] * (k + 1) for _ in range(n + 1)]
+        dp[0][0] = 0.0
+        for i in range(1, n + 1):
+            dist = distribuicoes[i - 1]
+            for j in range(0, min(i, k) + 1):
+                salto = 0.0 if j in (0, k) else custo_salto
+                if dp[i - 1][j] + salto > dp[i][j]:
+                    dp[i][j] = dp[i - 1][j] + salto
+                    origem[i][j] = (j, None)
+                if j > 0 and dp[i - 1][j - 1] > -math.inf:
+                    caractere = max(_CLASSE[modelo[j - 1]], key=dist.get)
+                    valor = dp[i - 1][j - 1] + math.log(dist[caractere])
+                    if valor > dp[i][j]:
+                        dp[i][j] = valor
+                        origem[i][j] = (j - 1, caractere)
+
+        if dp[n][k] == -math.inf:
+            continue
+
+        caracteres = []
+        i, j = n, k
+        while i > 0:
+            j_anterior, caractere = origem[i][j]
+            if caractere is not None:
+                caracteres.append(caractere)
+            i, j = i - 1, j_anterior
+
+        log_prob = dp[n][k]
+        if melhor is None or log_prob > melhor['log_prob']:
+            media_log = log_prob / k
+            melhor = {
+                'texto': ''.join(reversed(caracteres)),
+                'formato': formato,
+                'log_prob': float(log_prob),
+                'media_log': float(media_log),
+                'score': pontuacao(media_log, calibracao),
+            }
+
+    return melhor
+
+
+def decodificar_ctc(log_probs, caracteres, modelos=None, calibracao=None):
+    """
+    Viterbi sobre a saída CTC (quadros x classes, log-softmax, classe 0 = branco)
+    restrito a emitir exatamente uma placa de cada modelo; devolve a de maior probabilidade de caminho
+    caracteres: rótulo de cada classe (índice 0 ignorado)
+    """
+    log_probs = np.asarray(log_probs, dtype=np.float64)
+    modelos = modelos or MODELOS_PLACA
+    indices = {c.upper(): i for i, c in enumerate(caracteres) if i > 0 and c}
+    total_quadros = log_probs.shape[0]
+    melhor = None
+
+    for formato, modelo in modelos.items():
+        k = len(modelo)
+        permitidos = [[indices[c] for c in _CLASSE[classe] if c in indices] for classe in modelo]
+        if any(not p for p in permitidos):
+            continue
+
+        # branco[j]: j caracteres emitidos e último quadro branco (ou início)
+        # letra[j][c]: j caracteres emitidos, último quadro = classe c (o j-ésimo caractere)
+        # Estados: (log-prob do caminho, texto, soma dos log-probs nos quadros de caractere, quadros de caractere)
+        branco = [None] * (k + 1)
+        branco[0] = (0.0, '', 0.0, 0)
+        letra = [dict() for _ in range(k + 1)]
+
+        for t in range(total_quadros):
+            lp = log_probs[t]
+            novo_branco = [None] * (k + 1)
+            nova_letra = [dict() for _ in range(k + 1)]
+
+            for j in range(k + 1):
+                # Branco: a partir de branco ou do caractere corrente
+                anterior = branco[j]
+                for estado in letra[j].values():
+                    if anterior is None or estado[0] > anterior[0]:
+                        anterior = estado
+                if anterior is not None:
+                    v, texto, soma, n = anterior
+                    novo_branco[j] = (v + lp[0], texto, soma, n)
+
+                # Repetir o caractere corrente (mesmo símbolo em quadros seguidos)
+                for c, (v, texto, soma, n) in letra[j].items():
+                    nova_letra[j][c] = (v + lp[c], texto, soma + lp[c], n + 1)
+
+            for j in range(k):
+                for c in permitidos[j]:
+                    # Emitir o caractere j+1: de branco ou de outro caractere
+                    anterior = branco[j]
+                    for c_anterior, estado in letra[j].items():
+                        if c_anterior != c and (anterior is None or estado[0] > anterior[0]):
+                            anterior = estado
+                    if anterior is None:
+                        continue
+                    v, texto, soma, n = anterior
+                    atual = nova_letra[j + 1].get(c)
+                    if atual is None or v + lp[c] > atual[0]:
+                        nova_letra[j + 1][c] = (v + lp[c], texto + caracteres[c].upper(), soma + lp[c], n + 1)
+
+            branco, letra = novo_branco, nova_letra
+
+        final = branco[k]
+        for estado in letra[k].values():
+            if final is None or estado[0] > final[0]:
+                final = estado
+
+        if final is None:
+            continue
+
+        log_prob, texto, soma, n = final
+        if melhor is None or log_prob > melhor['log_prob']:
+            # Média só nos quadros que emitem caractere: brancos são quase certos e inflariam o score
+            media_log = soma / max(n, 1)
+            melhor = {
+                'texto': texto,
+                'formato': formato,
+                'log_prob': float(log_prob),
+                'media_log': float(media_log),
+                'score': pontuacao(media_log, calibracao),
+            }
+
+    return melhor
+
+
+def distribuicoes_hocr(hocr):
+    """
+    Distribuições por símbolo do hOCR do Tesseract com lstm_choice_mode=2 (alternativas e x_confs)
+    Sem alternativas no hOCR, usa o caractere reconhecido com a confiança da palavra
+    """
+    if isinstance(hocr, bytes):
+        hocr = hocr.decode('utf-8', errors='ignore')
+
+    distribuicoes = []
+    grupos = re.findall(r"<span class='(?:ocr_symbol|ocrx_cinfo)'[^>]*>((?:\s*<span class='ocr_glyph'[^>]*>[^<]*</span>)+)", hocr)
+    for grupo in grupos:
+        dist = {}
+        for conf, caractere in re.findall(r"<span class='ocr_glyph'[^>]*x_confs ([\d.]+)[^>]*>([^<]*)</span>", grupo):
+            caractere = caractere.strip().upper()
+            if len(caractere) == 1:
+                dist[caractere] = max(dist.get(caractere, 0.0), float(conf) / 100.0)
+        if dist:
+            distribuicoes.append(dist)
+
+    if distribuicoes:
+        return distribuicoes
+
+    for conf, texto in re.findall(r"<span class='ocrx_word'[^>]*x_wconf (\d+)[^>]*>([^<]*)</span>", hocr):
+        for caractere in re.sub(r'[^A-Z0-9]', '', texto.upper()):
+            distribuicoes.append({caractere: max(float(conf) / 100.0, 0.01)})
+
+    return distribuicoes
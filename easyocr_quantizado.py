@@ -0,0 +1,176 @@
+# Reconhecedor do EasyOCR quantizado (int8 dinâmico) e comparação com o FP32
+# Mede latência e acerto dos dois caminhos em placas sintéticas e/ou num conjunto rotulado
+
+import argparse
+import json
+import random
+import re
+import time
+
+import cv2
+import numpy as np
+
+from decodificador_placa import LETRAS, DIGITOS, MODELOS_PLACA, decodificar_ctc
+
+
+def quantizar_reconhecedor(modelo):
+    """Cópia do reconhecedor com LSTM e Linear em int8 (quantização dinâmica; convoluções ficam em FP32)"""
+    import torch
+
+    if isinstance(modelo, torch.nn.DataParallel):
+        modelo = modelo.module
+    modelo.eval()
+    return torch.quantization.quantize_dynamic(modelo, {torch.nn.LSTM, torch.nn.Linear}, dtype=torch.qint8)
+
+
+def placas_sinteticas(quantidade=200, semente=0):
+    """Recortes de placa renderizados (Mercosul e antiga) com ruído e desfoque leves: lista de (imagem, texto)"""
+    sorteio = random.Random(semente)
+    amostras = []
+
+    for _ in range(quantidade):
+        formato = sorteio.choice(list(MODELOS_PLACA))
+        texto = ''.join(sorteio.choice(LETRAS if classe == 'L' else DIGITOS) for classe in MODELOS_PLACA[formato])
+
+        imagem = np.full((104, 320, 3), 255, dtype=np.uint8)
+        if formato == 'mercosul':
+            cv2.rectangle(imagem, (0, 0), (319, 22), (160, 60, 0), -1)
+        cv2.rectangle(imagem, (0, 0), (319, 103), (0, 0, 0), 3)
+        cv2.putText(imagem, texto, (18, 88), cv2.FONT_HERSHEY_SIMPLEX, 2.1, (0, 0, 0), 5, cv2.LINE_AA)
+
+        if sorteio.random() < 0.5:
+            imagem = cv2.GaussianBlur(imagem, (3, 3), 0)
+        ruido = np.random.default_rng(sorteio.randrange(1 << 30)).normal(0, 8, imagem.shape)
+        imagem = np.clip(imagem.astype(np.float32) + ruido, 0, 255).astype(np.uint8)
+
+        amostras.append((imagem, texto))
+
+    return amostras
+
+
+def _texto(texto):
+    return re.sub(r'[^A-Z0-9]', '', str(texto or '').upper())
+
+
+def _medir(sistema, amostras):
+    """Acerto e latência de uma precisão: recortes passam pelo reconhecedor, caminhos pelo pipeline inteiro"""
+    medidas = {'recortes': 0, 'acerto_readtext': 0, 'acerto_restrito': 0, 'tempo_readtext': 0.0,
+               'tempo_reconhecedor': 0.0, 'imagens': 0, 'acerto_pipeline': 0, 'tempo_pipeline': 0.0}
+    saidas = []
+
+    for entrada, esperado in amostras:
+        if isinstance(entrada, str):
+            inicio = time.perf_counter()
+            registro = sistema.processar_imagem(entrada, compacto=True)
+            medidas['tempo_pipeline'] += time.perf_counter() - inicio
+            medidas['imagens'] += 1
+            medidas['acerto_pipeline'] += _texto(registro.placa) == _texto(esperado)
+            saidas.append(_texto(registro.placa))
+            continue
+
+        inicio = time.perf_counter()
+        lido = _texto(''.join(sistema._ler_easyocr(entrada, detail=0)))
+        medidas['tempo_readtext'] += time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        log_probs, caracteres = sistema._probabilidades_easyocr(entrada)
+        medidas['tempo_reconhecedor'] += time.perf_counter() - inicio
+        restrito = decodificar_ctc(log_probs, caracteres)
+
+        medidas['recortes'] += 1
+        medidas['acerto_readtext'] += lido == _texto(esperado)
+        medidas['acerto_restrito'] += restrito is not None and restrito['texto'] == _texto(esperado)
+        saidas.append(restrito['texto'] if restrito else lido)
+
+    relatorio = {}
+    if medidas['recortes']:
+        n = float(medidas['recortes'])
+        relatorio.update({
+            'recortes': medidas['recortes'],
+            'acerto_readtext': medidas['acerto_readtext'] / n,
+            'acerto_restrito': medidas['acerto_restrito'] / n,
+            'latencia_readtext_ms': medidas['tempo_readtext'] / n * 1000,
+            'latencia_reconhecedor_ms': medidas['tempo_reconhecedor'] / n * 1000,
+        })
+    if medidas['imagens']:
+        n = float(medidas['imagens'])
+        relatorio.update({
+            'imagens': medidas['imagens'],
+            'acerto_pipeline': medidas['acerto_pipeline'] / n,
+            'latencia_pipeline_ms': medidas['tempo_pipeline'] / n * 1000,
+        })
+    return relatorio, saidas
+
+
+def comparar_precisoes(sistema, amostras):
+    """
+    Rodar as mesmas amostras com o reconhecedor FP32 e o int8
+    amostras: (imagem do recorte, placa) e/ou (caminho da imagem, placa)
+    As duas precisões usam o mesmo allowlist (o explícito ou o de placa que o int8 usaria sozinho),
+    para que a diferença medida seja só a da quantização
+    Retorna {'fp32': {...}, 'int8': {...}, 'concordancia': fração de saídas idênticas}
+    """
+    anterior = 'int8' if sistema.config['easyocr_int8'] else 'fp32'
+    allowlist = sistema.config['easyocr_allowlist'] or (LETRAS + DIGITOS)
+    config_anterior = sistema.aplicar_config({'easyocr_allowlist': allowlist})
+    relatorio = {}
+    saidas = {}
+
+    try:
+        for precisao in ('fp32', 'int8'):
+            sistema.usar_reconhecedor_easyocr(precisao)
+            if amostras:
+                _medir(sistema, amostras[:1])  # aquecimento
+            relatorio[precisao], saidas[precisao] = _medir(sistema, amostras)
+    finally:
+        sistema.usar_reconhecedor_easyocr(anterior)
+        sistema.aplicar_config(config_anterior)
+
+    iguais = sum(1 for a, b in zip(saidas['fp32'], saidas['int8']) if a == b)
+    relatorio['concordancia'] = iguais / float(len(amostras)) if amostras else 0.0
+    return relatorio
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Comparar reconhecedor EasyOCR FP32 x int8')
+    parser.add_argument('--sinteticas', type=int, default=200, help='Quantidade de placas sintéticas (0 = nenhuma)')
+    parser.add_argument('--rotulos', help="Arquivo 'caminho;placa' para medir o pipeline inteiro")
+    parser.add_argument('--acervo', help='Acervo de recortes (rótulo quando houver, senão o texto lido)')
+    parser.add_argument('--idiomas', default='pt,en', help='Idiomas do EasyOCR, separados por vírgula')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--json', help='Gravar o relatório em JSON')
+    args = parser.parse_args()
+
+    from sistema_placas_final import SistemaReconhecimentoPlacasMelhorado
+    from ajuste_config import carregar_rotulos
+    from acervo_recortes import AcervoRecortes
+
+    sistema = SistemaReconhecimentoPlacasMelhorado(config={'easyocr_idiomas': args.idiomas.split(',')})
+    if sistema.easyocr_reader is None:
+        print("❌ EasyOCR não disponível")
+        return
+
+    amostras = placas_sinteticas(args.sinteticas, args.semente) if args.sinteticas else []
+    if args.rotulos:
+        amostras += carregar_rotulos(args.rotulos)
+    if args.acervo:
+        amostras += AcervoRecortes(args.acervo).amostras(somente_validas=True)
+
+    relatorio = comparar_precisoes(sistema, amostras)
+
+    def formatar(valor):
+        return f"{valor:.3f}" if isinstance(valor, float) else str(valor)
+
+    print(f"\n📊 {'':26s} {'FP32':>10} {'INT8':>10}")
+    for chave in sorted(set(relatorio['fp32']) | set(relatorio['int8'])):
+        fp32, int8 = relatorio['fp32'].get(chave), relatorio['int8'].get(chave)
+        print(f"   {chave:26s} {formatar(fp32):>10} {formatar(int8):>10}")
+    print(f"   {'concordancia':26s} {relatorio['concordancia']:.1%}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,407 @@
+# Fila de trabalho distribuída: produtores enfileiram referências de imagem, workers (um sistema
+# aquecido por nó) consomem, processam e devolvem os resultados por outra fila
+# Entrega "pelo menos uma vez": mensagens não confirmadas voltam à fila quando a visibilidade expira
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from trabalho_lote import ArquivosAbertos, listar_trabalho, processar_entrada
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+FILA_TAREFAS = 'placas:tarefas'
+FILA_RESULTADOS = 'placas:resultados'
+
+
+class BrokerSQLite:
+    """
+    Broker em um arquivo SQLite (uma máquina, vários processos; também para testes)
+    Interface dos brokers: publicar, receber, estender, atualizar, confirmar, rejeitar, tamanho
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.lock = threading.Lock()
+        self.conexao = sqlite3.connect(caminho, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conexao.execute('PRAGMA journal_mode=WAL')
+        self.conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS mensagens (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fila TEXT NOT NULL,
+                corpo TEXT NOT NULL,
+                visivel_em REAL NOT NULL,
+                entregas INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_mensagens_fila ON mensagens(fila, visivel_em, id);
+        """)
+
+    def publicar(self, fila, mensagens):
+        """Enfileirar uma lista de mensagens (dicts serializáveis em JSON)"""
+        agora = time.time()
+        with self.lock:
+            self.conexao.execute('BEGIN IMMEDIATE')
+            try:
+                self.conexao.executemany(
+                    'INSERT INTO mensagens (fila, corpo, visivel_em) VALUES (?, ?, ?)',
+                    [(fila, json.dumps(m, ensure_ascii=False), agora) for m in mensagens])
+                self.conexao.execute('COMMIT')
+            except Exception:
+                self.conexao.execute('ROLLBACK')
+                raise
+
+    def receber(self, fila, quantidade=1, visibilidade=60.0):
+        """
+        Reservar até `quantidade` mensagens visíveis por `visibilidade` segundos
+        Retorna [(id, mensagem, entregas)]; sem confirmação, voltam à fila ao expirar
+        """
+        agora = time.time()
+        with self.lock:
+            self.conexao.execute('BEGIN IMMEDIATE')
+            try:
+                linhas = self.conexao.execute(
+                    'SELECT id, corpo, entregas FROM mensagens WHERE fila = ? AND visivel_em <= ? ORDER BY id LIMIT ?',
+                    (fila, agora, quantidade)).fetchall()
+                self.conexao.executemany(
+                    'UPDATE mensagens SET visivel_em = ?, entregas = entregas + 1 WHERE id = ?',
+                    [(agora + visibilidade, id_) for id_, _, _ in linhas])
+                self.conexao.execute('COMMIT')
+            except Exception:
+                self.conexao.execute('ROLLBACK')
+                raise
+        return [(id_, json.loads(corpo), entregas + 1) for id_, corpo, entregas in linhas]
+
+    def estender(self, fila, ids, visibilidade):
+        """Renovar a reserva de mensagens ainda em processamento"""
+        with self.lock:
+            self.conexao.executemany('UPDATE mensagens SET visivel_em = ? WHERE fila = ? AND id = ?',
+                                     [(time.time() + visibilidade, fila, id_) for id_ in ids])
+
+    def atualizar(self, fila, id_, mensagem):
+        """Substituir o corpo de uma mensagem que ainda está na fila (ex.: anotar o último erro)"""
+        with self.lock:
+            self.conexao.execute('UPDATE mensagens SET corpo = ? WHERE fila = ? AND id = ?',
+                                 (json.dumps(mensagem, ensure_ascii=False), fila, id_))
+
+    def confirmar(self, fila, ids):
+        """Remover mensagens processadas"""
+        with self.lock:
+            self.conexao.executemany('DELETE FROM mensagens WHERE fila = ? AND id = ?', [(fila, id_) for id_ in ids])
+
+    def rejeitar(self, fila, ids):
+        """Devolver mensagens à fila imediatamente (ex.: worker encerrando)"""
+        self.estender(fila, ids, 0.0)
+
+    def tamanho(self, fila):
+        with self.lock:
+            return self.conexao.execute('SELECT COUNT(*) FROM mensagens WHERE fila = ?', (fila,)).fetchone()[0]
+
+    def fechar(self):
+        self.conexao.close()
+
+
+# Reserva atômica: devolve as mensagens expiradas à fila e move até N ids para "em processamento"
+_LUA_RECEBER = """
+local expiradas = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, id in ipairs(expiradas) do
+    redis.call('ZREM', KEYS[2], id)
+    if redis.call('HEXISTS', KEYS[3], id) == 1 then
+        redis.call('RPUSH', KEYS[1], id)
+    else
+        redis.call('HDEL', KEYS[4], id)
+    end
+end
+local saida = {}
+local recebidas = 0
+while recebidas < tonumber(ARGV[3]) do
+    local id = redis.call('LPOP', KEYS[1])
+    if not id then break end
+    local corpo = redis.call('HGET', KEYS[3], id)
+    if corpo then
+        redis.call('ZADD', KEYS[2], tonumber(ARGV[1]) + tonumber(ARGV[2]), id)
+        saida[#saida + 1] = id
+        saida[#saida + 1] = corpo
+        saida[#saida + 1] = redis.call('HINCRBY', KEYS[4], id, 1)
+        recebidas = recebidas + 1
+    else
+        -- Confirmada depois que a reserva expirou e voltou à fila: descartar o id órfão
+        redis.call('ZREM', KEYS[2], id)
+        redis.call('HDEL', KEYS[4], id)
+    end
+end
+return saida
+"""
+
+# Só reescreve o corpo se a mensagem ainda existe (não ressuscita uma já confirmada)
+_LUA_ATUALIZAR = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 1 then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+end
+"""
+
+
+class BrokerRedis:
+    """
+    Broker sobre Redis (ou servidor compatível com Lua: KeyDB, Valkey, Dragonfly) para vários nós
+    Chaves por fila: <fila>:pendentes (lista de ids), <fila>:reservadas (zset id -> prazo),
+    <fila>:corpos e <fila>:entregas (hashes) e <fila>:seq (contador de ids)
+    """
+
+    def __init__(self, url):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("Pacote redis não instalado (pip install redis)")
+        self.cliente = redis.Redis.from_url(url)
+        self._receber = self.cliente.register_script(_LUA_RECEBER)
+        self._atualizar = self.cliente.register_script(_LUA_ATUALIZAR)
+
+    @staticmethod
+    def _chaves(fila):
+        return [f'{fila}:pendentes', f'{fila}:reservadas', f'{fila}:corpos', f'{fila}:entregas']
+
+    def publicar(self, fila, mensagens):
+        if not mensagens:
+            return
+        pendentes, _, corpos, _ = self._chaves(fila)
+        ultimo = self.cliente.incrby(f'{fila}:seq', len(mensagens))
+        ids = range(ultimo - len(mensagens) + 1, ultimo + 1)
+        with self.cliente.pipeline() as pipe:
+            pipe.hset(corpos, mapping={str(id_): json.dumps(m, ensure_ascii=False) for id_, m in zip(ids, mensagens)})
+            pipe.rpush(pendentes, *[str(id_) for id_ in ids])
+            pipe.execute()
+
+    def receber(self, fila, quantidade=1, visibilidade=60.0):
+        saida = self._receber(keys=self._chaves(fila), args=[time.time(), visibilidade, quantidade])
+        return [(int(saida[i]), json.loads(saida[i + 1]), int(saida[i + 2])) for i in range(0, len(saida), 3)]
+
+    def estender(self, fila, ids, visibilidade):
+        if ids:
+            prazo = time.time() + visibilidade
+            # XX: só renova o que ainda está reservado (não ressuscita mensagem já confirmada)
+            self.cliente.zadd(self._chaves(fila)[1], {str(id_): prazo for id_ in ids}, xx=True)
+
+    def atualizar(self, fila, id_, mensagem):
+        self._atualizar(keys=[self._chaves(fila)[2]], args=[str(id_), json.dumps(mensagem, ensure_ascii=False)])
+
+    def confirmar(self, fila, ids):
+        if not ids:
+            return
+        _, reservadas, corpos, entregas = self._chaves(fila)
+        chaves = [str(id_) for id_ in ids]
+        with self.cliente.pipeline() as pipe:
+            pipe.zrem(reservadas, *chaves)
+            pipe.hdel(corpos, *chaves)
+            pipe.hdel(entregas, *chaves)
+            pipe.execute()
+
+    def rejeitar(self, fila, ids):
+        self.estender(fila, ids, 0.0)
+
+    def tamanho(self, fila):
+        pendentes, reservadas, _, _ = self._chaves(fila)
+        return self.cliente.llen(pendentes) + self.cliente.zcard(reservadas)
+
+    def fechar(self):
+        self.cliente.close()
+
+
+def abrir_broker(url):
+    """'sqlite:///caminho.db' (ou um caminho .db) ou 'redis://host:porta/db'"""
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return BrokerRedis(url)
+    if url.startswith('sqlite:///'):
+        url = url[len('sqlite:///'):]
+    return BrokerSQLite(url)
+
+
+def produzir(broker, fontes, fila=FILA_TAREFAS, camera=None, perfil=None, lote=500):
+    """Enfileirar uma tarefa por imagem das fontes (caminhos precisam ser visíveis aos workers)"""
+    entradas = listar_trabalho(fontes)
+    for inicio in range(0, len(entradas), lote):
+        broker.publicar(fila, [{'entrada': entrada, 'camera': camera, 'perfil': perfil}
+                               for entrada in entradas[inicio:inicio + lote]])
+    return len(entradas)
+
+
+class WorkerFila:
+    """
+    Consumidor de um nó: um SistemaReconhecimentoPlacasMelhorado aquecido e um laço de
+    receber (até `prefetch` tarefas) -> processar -> publicar resultado -> confirmar
+    As tarefas reservadas têm a visibilidade renovada antes de cada uma ser processada; após
+    `entregas_max` entregas a tarefa é encerrada com um resultado de erro
+    """
+
+    def __init__(self, sistema, broker, fila=FILA_TAREFAS, fila_resultados=FILA_RESULTADOS, prefetch=4,
+                 visibilidade=120.0, entregas_max=3, espera_vazia=1.0, nome=None, log_callback=None):
+        self.sistema = sistema
+        self.broker = broker
+        self.fila = fila
+        self.fila_resultados = fila_resultados
+        self.prefetch = max(1, prefetch)
+        self.visibilidade = visibilidade
+        self.entregas_max = entregas_max
+        self.espera_vazia = espera_vazia
+        self.nome = nome or f'{socket.gethostname()}:{os.getpid()}'
+        self.log = log_callback or (lambda msg: None)
+        self.parar = threading.Event()
+        self.arquivos = ArquivosAbertos()
+        self.estatisticas = {'processadas': 0, 'erros': 0, 'descartadas': 0}
+
+    def aquecer(self):
+        """Pagar as inicializações preguiçosas (modelos, buffers) antes da primeira tarefa real"""
+        quadro = np.full((480, 640, 3), 128, dtype=np.uint8)
+        self.sistema.processar_quadro(quadro, compacto=True)
+
+    def _resultado(self, id_, tarefa, registro, entregas, inicio):
+        dados = registro.para_dict()
+        dados.update(tarefa=id_, entrada=tarefa['entrada'], worker=self.nome, entregas=entregas,
+                     latencia=time.perf_counter() - inicio)
+        return dados
+
+    def processar_reservadas(self, reservadas):
+        """Processar um lote recebido; devolve quantas foram confirmadas"""
+        pendentes = [id_ for id_, _, _ in reservadas]
+        confirmadas = 0
+
+        try:
+            for id_, tarefa, entregas in reservadas:
+                if self.parar.is_set():
+                    break
+                self.broker.estender(self.fila, pendentes, self.visibilidade)
+                inicio = time.perf_counter()
+
+                if entregas > self.entregas_max:
+                    erro = f'Descartada após {entregas - 1} entrega(s)'
+                    if tarefa.get('erro'):
+                        erro += f": {tarefa['erro']}"
+                    registro = self.sistema._finalizar_resultado({'caminho': tarefa['entrada'], 'erro': erro}, True)
+                    self.estatisticas['descartadas'] += 1
+                else:
+                    try:
+                        registro = processar_entrada(self.sistema, tarefa['entrada'], tarefa.get('camera'),
+                                                     tarefa.get('perfil'), self.arquivos)
+                    except Exception as e:
+                        # Sem confirmar: a tarefa volta à fila quando a visibilidade expirar
+                        self.log(f"❌ [{id_}] {tarefa['entrada']}: {e}")
+                        # O último erro viaja com a mensagem até o resultado de descarte
+                        self.broker.atualizar(self.fila, id_, dict(tarefa, erro=f'{type(e).__name__}: {e}'))
+                        self.estatisticas['erros'] += 1
+                        pendentes.remove(id_)
+                        continue
+
+                # Resultado publicado antes da confirmação: uma queda aqui gera duplicata, nunca perda
+                self.broker.publicar(self.fila_resultados, [self._resultado(id_, tarefa, registro, entregas, inicio)])
+                self.broker.confirmar(self.fila, [id_])
+                pendentes.remove(id_)
+                confirmadas += 1
+                self.estatisticas['processadas'] += 1
+        finally:
+            # Interrompido no meio do lote: devolver o que não foi tocado
+            if pendentes:
+                self.broker.rejeitar(self.fila, pendentes)
+
+        return confirmadas
+
+    def executar(self, max_tarefas=None, parar_quando_vazia=False):
+        """Laço principal (até parar.set(), max_tarefas ou fila vazia com parar_quando_vazia)"""
+        self.log(f"👷 Worker {self.nome}: fila '{self.fila}', prefetch {self.prefetch}, visibilidade {self.visibilidade:.0f}s")
+        while not self.parar.is_set():
+            quantidade = self.prefetch
+            if max_tarefas is not None:
+                quantidade = min(quantidade, max_tarefas - self.estatisticas['processadas'] - self.estatisticas['erros'])
+                if quantidade <= 0:
+                    break
+
+            reservadas = self.broker.receber(self.fila, quantidade, self.visibilidade)
+            if not reservadas:
+                if parar_quando_vazia:
+                    break
+                self.parar.wait(self.espera_vazia)
+                continue
+
+            self.processar_reservadas(reservadas)
+
+        self.log(f"✅ Worker {self.nome}: {self.estatisticas}")
+        return self.estatisticas
+
+
+def coletar_resultados(broker, saida, fila=FILA_RESULTADOS, lote=100, parar_quando_vazia=True, espera_vazia=1.0):
+    """Drenar a fila de resultados para um arquivo JSONL (confirma depois de gravar)"""
+    total = 0
+    with open(saida, 'a', encoding='utf-8') as f:
+        while True:
+            recebidas = broker.receber(fila, lote, visibilidade=60.0)
+            if not recebidas:
+                if parar_quando_vazia:
+                    return total
+                time.sleep(espera_vazia)
+                continue
+            f.write(''.join(json.dumps(m, ensure_ascii=False) + '\n' for _, m, _ in recebidas))
+            f.flush()
+            os.fsync(f.fileno())
+            broker.confirmar(fila, [id_ for id_, _, _ in recebidas])
+            total += len(recebidas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fila de trabalho distribuída para reconhecimento de placas')
+    parser.add_argument('--broker', required=True, help="'sqlite:///fila.db' ou 'redis://host:6379/0'")
+    parser.add_argument('--fila', default=FILA_TAREFAS)
+    parser.add_argument('--fila-resultados', default=FILA_RESULTADOS)
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    produtor = comandos.add_parser('produzir', help='Enfileirar imagens')
+    produtor.add_argument('fontes', nargs='+', help='Diretórios, .zip, .tar ou imagens')
+    produtor.add_argument('--camera')
+    produtor.add_argument('--perfil')
+
+    worker = comandos.add_parser('trabalhar', help='Consumir tarefas neste nó')
+    worker.add_argument('--prefetch', type=int, default=4)
+    worker.add_argument('--visibilidade', type=float, default=120.0, help='Segundos até uma tarefa não confirmada voltar')
+    worker.add_argument('--entregas-max', type=int, default=3)
+    worker.add_argument('--parar-quando-vazia', action='store_true')
+
+    coletor = comandos.add_parser('coletar', help='Gravar os resultados em JSONL')
+    coletor.add_argument('saida')
+    coletor.add_argument('--continuo', action='store_true', help='Continuar esperando novos resultados')
+
+    args = parser.parse_args()
+    broker = abrir_broker(args.broker)
+
+    try:
+        if args.comando == 'produzir':
+            total = produzir(broker, args.fontes, args.fila, args.camera, args.perfil)
+            print(f"📤 {total} tarefa(s) enfileirada(s) em '{args.fila}'")
+
+        elif args.comando == 'trabalhar':
+            from sistema_placas_final import SistemaReconhecimentoPlacasMelhorado
+
+            sistema = SistemaReconhecimentoPlacasMelhorado()
+            worker = WorkerFila(sistema, broker, args.fila, args.fila_resultados, prefetch=args.prefetch,
+                                visibilidade=args.visibilidade, entregas_max=args.entregas_max, log_callback=print)
+            worker.aquecer()
+            try:
+                worker.executar(parar_quando_vazia=args.parar_quando_vazia)
+            except KeyboardInterrupt:
+                worker.parar.set()
+            finally:
+                sistema.fechar()
+
+        else:
+            total = coletar_resultados(broker, args.saida, args.fila_resultados, parar_quando_vazia=not args.continuo)
+            print(f"📥 {total} resultado(s) gravado(s) em {args.saida}")
+    finally:
+        broker.fechar()
+
+
+if __name__ == '__main__':
+    main()
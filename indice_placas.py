@@ -0,0 +1,172 @@
+# Índice de placas monitoradas (listas de alerta) tolerante a erros de OCR
+# Distância de edição ponderada pelas confusões do OCR e equivalência placa antiga ↔ Mercosul
+
+import re
+import threading
+
+# Classes de caracteres que o OCR confunde (mesmas correções de _pos_processar_texto)
+CLASSES_CONFUSAO = [('O', '0'), ('I', '1'), ('S', '5'), ('G', '6'), ('B', '8'), ('Z', '2')]
+
+# Conversão oficial placa antiga -> Mercosul (5º caractere: dígito -> letra)
+DIGITO_PARA_LETRA_MERCOSUL = {str(d): chr(ord('A') + d) for d in range(10)}
+
+_REPRESENTANTE = {}
+for _classe in CLASSES_CONFUSAO:
+    for _c in _classe:
+        _REPRESENTANTE[_c] = _classe[-1]
+
+
+_NUMERO_PARA_LETRA = {'0': 'O', '6': 'G', '1': 'I', '5': 'S', '8': 'B', '2': 'Z'}
+_LETRA_PARA_NUMERO = {'O': '0', 'I': '1', 'S': '5', 'G': '6', 'B': '8', 'Z': '2'}
+
+
+def normalizar_placa(placa):
+    """Forma canônica: só A-Z/0-9, maiúsculas, correção posicional e placa antiga convertida para Mercosul"""
+    texto = re.sub(r'[^A-Z0-9]', '', str(placa).upper())
+    if len(texto) == 7:
+        caracteres = list(texto)
+        for i in range(3):
+            caracteres[i] = _NUMERO_PARA_LETRA.get(caracteres[i], caracteres[i])
+        for i in (3, 5, 6):
+            caracteres[i] = _LETRA_PARA_NUMERO.get(caracteres[i], caracteres[i])
+        texto = ''.join(caracteres)
+    if re.match(r'^[A-Z]{3}[0-9]{4}$', texto):
+        texto = texto[:4] + DIGITO_PARA_LETRA_MERCOSUL[texto[4]] + texto[5:]
+    return texto
+
+
+def _dobrar_confusoes(texto):
+    return ''.join(_REPRESENTANTE.get(c, c) for c in texto)
+
+
+def distancia_confusao(a, b, custo_confusao=0.25):
+    """Levenshtein em que trocas entre caracteres confundíveis custam custo_confusao"""
+    if a == b:
+        return 0.0
+
+    anterior = [float(j) for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        atual = [float(i)]
+        for j, cb in enumerate(b, 1):
+            if ca == cb:
+                custo = 0.0
+            elif _REPRESENTANTE.get(ca, ca) == _REPRESENTANTE.get(cb, cb):
+                custo = custo_confusao
+            else:
+                custo = 1.0
+            atual.append(min(anterior[j] + 1.0, atual[j-1] + 1.0, anterior[j-1] + custo))
+        anterior = atual
+
+    return anterior[-1]
+
+
+def _delecoes(texto, maximo):
+    """Todas as variantes do texto com até `maximo` caracteres removidos"""
+    variantes = {texto}
+    fronteira = {texto}
+    for _ in range(maximo):
+        proxima = set()
+        for palavra in fronteira:
+            for i in range(len(palavra)):
+                proxima.add(palavra[:i] + palavra[i+1:])
+        variantes |= proxima
+        fronteira = proxima
+    return variantes
+
+
+class IndicePlacas:
+    """
+    Índice de vizinhança por deleções (estilo SymSpell) sobre placas com confusões dobradas
+    Responde "quais placas monitoradas estão a distância <= k" sem varrer a lista
+    """
+
+    def __init__(self, max_distancia=1, custo_confusao=0.25):
+        self.max_distancia = max_distancia
+        self.custo_confusao = custo_confusao
+        self.placas = {}
+        self.delecoes = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.placas)
+
+    def __contains__(self, placa):
+        return normalizar_placa(placa) in self.placas
+
+    def _chaves(self, canonica):
+        return _delecoes(_dobrar_confusoes(canonica), self.max_distancia)
+
+    def adicionar(self, placa, dados=None):
+        """Adicionar (ou atualizar) uma placa monitorada"""
+        canonica = normalizar_placa(placa)
+        if not canonica:
+            return
+
+        with self.lock:
+            nova = canonica not in self.placas
+            self.placas[canonica] = (placa, dados)
+            if nova:
+                for chave in self._chaves(canonica):
+                    self.delecoes.setdefault(chave, set()).add(canonica)
+
+    def adicionar_lote(self, placas):
+        """Carga em massa: iterável de placas ou de tuplas (placa, dados)"""
+        total = 0
+        for item in placas:
+            if isinstance(item, (tuple, list)):
+                self.adicionar(item[0], item[1] if len(item) > 1 else None)
+            else:
+                self.adicionar(item)
+            total += 1
+        return total
+
+    def carregar_arquivo(self, caminho):
+        """Carregar lista com uma placa por linha (colunas extras após ';' ou ',' viram dados)"""
+        def linhas():
+            with open(caminho, 'r', encoding='utf-8') as f:
+                for linha in f:
+                    partes = re.split(r'[;,]', linha.strip(), maxsplit=1)
+                    if partes[0]:
+                        yield (partes[0], partes[1] if len(partes) > 1 else None)
+
+        return self.adicionar_lote(linhas())
+
+    def remover(self, placa):
+        canonica = normalizar_placa(placa)
+        with self.lock:
+            if self.placas.pop(canonica, None) is None:
+                return False
+            for chave in self._chaves(canonica):
+                grupo = self.delecoes.get(chave)
+                if grupo is not None:
+                    grupo.discard(canonica)
+                    if not grupo:
+                        del self.delecoes[chave]
+        return True
+
+    def buscar(self, placa, k=1.0):
+        """Placas monitoradas a distância <= k, como (placa, distância, dados) em ordem crescente"""
+        if int(k) > self.max_distancia:
+            raise ValueError(f"k={k} excede max_distancia={self.max_distancia} do índice")
+
+        canonica = normalizar_placa(placa)
+        if not canonica:
+            return []
+
+        # Copia das candidatas sob o lock; as distâncias são calculadas fora dele
+        with self.lock:
+            candidatas = set()
+            for chave in self._chaves(canonica):
+                grupo = self.delecoes.get(chave)
+                if grupo:
+                    candidatas |= grupo
+            candidatas = {candidata: self.placas[candidata] for candidata in candidatas}
+
+        encontradas = []
+        for candidata, (original, dados) in candidatas.items():
+            distancia = distancia_confusao(canonica, candidata, self.custo_confusao)
+            if distancia <= k:
+                encontradas.append((original, distancia, dados))
+
+        encontradas.sort(key=lambda item: item[1])
+        return encontradas
@@ -0,0 +1,207 @@
+# Leitura de imagens em lote com pré-carregamento em segundo plano
+# Lê diretórios, arquivos .zip e .tar com threads de decodificação e fila limitada
+
+import os
+import queue
+import tarfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+EXTENSOES_IMAGEM = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# Fator de redução -> flag do cv2.imdecode (decodificação reduzida direto do JPEG)
+FLAGS_REDUCAO = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+_FIM = object()
+
+
+def _eh_imagem(nome):
+    return nome.lower().endswith(EXTENSOES_IMAGEM)
+
+
+def listar_entradas(fontes):
+    """
+    Gerar (tipo, origem, nome) para cada imagem de diretórios, .zip, .tar ou arquivos soltos
+    Uma fonte inexistente ou ilegível gera ('erro', fonte, mensagem) e a listagem continua
+    """
+    if isinstance(fontes, str):
+        fontes = [fontes]
+
+    for fonte in fontes:
+        if not os.path.exists(fonte):
+            yield ('erro', fonte, f'Fonte não encontrada: {fonte}')
+            continue
+
+        try:
+            yield from _listar_fonte(fonte)
+        except Exception as e:
+            yield ('erro', fonte, f'Erro ao listar {fonte}: {e}')
+
+
+def _listar_fonte(fonte):
+    if os.path.isdir(fonte):
+        for raiz, diretorios, arquivos in os.walk(fonte):
+            diretorios.sort()
+            for nome in sorted(arquivos):
+                if _eh_imagem(nome):
+                    yield ('arquivo', os.path.join(raiz, nome), None)
+
+    elif zipfile.is_zipfile(fonte):
+        with zipfile.ZipFile(fonte) as arquivo_zip:
+            nomes = arquivo_zip.namelist()
+        for nome in nomes:
+            if _eh_imagem(nome):
+                yield ('zip', fonte, nome)
+
+    elif tarfile.is_tarfile(fonte):
+        yield ('tar', fonte, None)
+
+    elif _eh_imagem(fonte):
+        yield ('arquivo', fonte, None)
+
+
+def decodificar(dados, reducao=1):
+    """Decodificar bytes de imagem, opcionalmente em resolução reduzida (1, 2, 4 ou 8)"""
+    buffer = np.frombuffer(dados, dtype=np.uint8)
+    return cv2.imdecode(buffer, FLAGS_REDUCAO[reducao])
+
+
+class LeitorImagensLote:
+    """
+    Itera imagens de várias fontes com leitura e decodificação em threads
+    Cada item é um dict: caminho, imagem (possivelmente reduzida), reducao, dados e erro
+    """
+
+    def __init__(self, fontes, threads=4, tamanho_fila=16, reducao=1):
+        if reducao not in FLAGS_REDUCAO:
+            raise ValueError(f"Redução deve ser uma de {sorted(FLAGS_REDUCAO)}")
+
+        self.fontes = fontes
+        self.threads = threads
+        self.tamanho_fila = tamanho_fila
+        self.reducao = reducao
+        self.local = threading.local()
+
+    def _zip(self, caminho):
+        """ZipFile por thread (leitura concorrente no mesmo objeto não é segura)"""
+        abertos = getattr(self.local, 'zips', None)
+        if abertos is None:
+            abertos = self.local.zips = {}
+        if caminho not in abertos:
+            abertos[caminho] = zipfile.ZipFile(caminho)
+        return abertos[caminho]
+
+    def _erro(self, caminho, erro):
+        return {'caminho': caminho, 'imagem': None, 'reducao': self.reducao, 'dados': None, 'erro': erro}
+
+    def _ler(self, tipo, origem, nome, dados=None):
+        caminho = origem if nome is None else f"{origem}::{nome}"
+        item = self._erro(caminho, None)
+
+        try:
+            if dados is None:
+                if tipo == 'zip':
+                    dados = self._zip(origem).read(nome)
+                else:
+                    with open(origem, 'rb') as f:
+                        dados = f.read()
+
+            item['imagem'] = decodificar(dados, self.reducao)
+            if item['imagem'] is None:
+                item['erro'] = f'Não foi possível decodificar: {caminho}'
+            elif self.reducao > 1:
+                item['dados'] = dados
+        except Exception as e:
+            item['erro'] = f'Erro ao ler {caminho}: {e}'
+
+        return item
+
+    def _produzir(self, executor, pendentes, parar):
+        """Enumerar as fontes e agendar as leituras (bloqueia quando a fila enche)"""
+        try:
+            for tipo, origem, nome in listar_entradas(self.fontes):
+                if tipo == 'erro':
+                    # Fonte ruim vira um item com erro; as demais fontes seguem normalmente
+                    pendentes.put(executor.submit(self._erro, origem, nome))
+                    continue
+
+                if tipo == 'tar':
+                    # tar é sequencial: os bytes são lidos aqui e só a decodificação vai para as threads
+                    try:
+                        with tarfile.open(origem) as arquivo_tar:
+                            for membro in arquivo_tar:
+                                if parar.is_set():
+                                    return
+                                if not membro.isfile() or not _eh_imagem(membro.name):
+                                    continue
+                                dados = arquivo_tar.extractfile(membro).read()
+                                pendentes.put(executor.submit(self._ler, tipo, origem, membro.name, dados))
+                    except (tarfile.TarError, OSError) as e:
+                        pendentes.put(executor.submit(self._erro, origem, f'Erro ao ler {origem}: {e}'))
+                    continue
+
+                if parar.is_set():
+                    return
+                pendentes.put(executor.submit(self._ler, tipo, origem, nome))
+        finally:
+            pendentes.put(_FIM)
+
+    def __iter__(self):
+        pendentes = queue.Queue(maxsize=self.tamanho_fila)
+        parar = threading.Event()
+
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            produtor = threading.Thread(target=self._produzir, args=(executor, pendentes, parar))
+            produtor.daemon = True
+            produtor.start()
+
+            try:
+                while True:
+                    futuro = pendentes.get()
+                    if futuro is _FIM:
+                        break
+                    yield futuro.result()
+            finally:
+                parar.set()
+                while produtor.is_alive():
+                    try:
+                        pendentes.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+
+    def imagem_completa(self, item):
+        """Decodificar a imagem em resolução original (somente quando o OCR precisa)"""
+        if item['dados'] is None:
+            return item['imagem']
+        return decodificar(item['dados'], 1)
+
+
+def processar_em_lote(sistema, fontes, camera=None, reducao=1, threads=4, tamanho_fila=16,
+                      log_callback=None, compacto=False, perfil=None):
+    """Processar todas as imagens das fontes, gerando um resultado por imagem"""
+    leitor = LeitorImagensLote(fontes, threads=threads, tamanho_fila=tamanho_fila, reducao=reducao)
+
+    for item in leitor:
+        if item['erro']:
+            if log_callback:
+                log_callback(f"❌ {item['erro']}")
+            yield sistema._finalizar_resultado({'caminho': item['caminho'], 'erro': item['erro']}, compacto)
+            continue
+
+        imagem_completa = escala_completa = None
+        if item['dados'] is not None:
+            imagem_completa = lambda item=item: leitor.imagem_completa(item)
+            escala_completa = item['reducao']
+
+        yield sistema.processar_quadro(item['imagem'], log_callback, camera,
+                                       caminho_imagem=item['caminho'], imagem_completa=imagem_completa,
+                                       compacto=compacto, perfil=perfil, escala_completa=escala_completa)
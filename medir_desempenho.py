@@ -0,0 +1,299 @@
+# Microbenchmarks das funções quentes do motor, com OCR simulado
+# Entradas sintéticas determinísticas em vários tamanhos de imagem e quantidades de candidatos;
+# gera relatório JSON e compara com uma base gravada (regressões fazem o comando sair com erro)
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from decodificador_placa import LETRAS, DIGITOS
+
+TAMANHOS_IMAGEM = [(640, 480), (1280, 720), (1920, 1080)]
+QUANTIDADES_PLACAS = [1, 5, 20]
+QUANTIDADES_CANDIDATOS = [10, 100, 1000]
+TAMANHOS_RECORTE = [(160, 52), (320, 104), (640, 208)]
+TOLERANCIA_PADRAO = 0.15
+
+
+class _SaidaTesseract:
+    DICT = 'dict'
+
+
+class TesseractSimulado:
+    """Substitui o pytesseract: resposta fixa e instantânea, para medir só o código do motor"""
+
+    Output = _SaidaTesseract
+
+    def __init__(self, texto='ABC1D23'):
+        self.texto = texto
+
+    def image_to_string(self, imagem, config=''):
+        return self.texto + '\n'
+
+    def image_to_data(self, imagem, config='', output_type=None):
+        return {'text': ['', self.texto], 'conf': ['-1', '90'], 'level': [1, 5]}
+
+    def image_to_pdf_or_hocr(self, imagem, extension='hocr', config=''):
+        return (f"<span class='ocrx_word' id='word_1_1' title='bbox 0 0 10 10; x_wconf 90'>"
+                f"{self.texto}</span>").encode('utf-8')
+
+
+def criar_sistema():
+    """Sistema com Tesseract simulado, sem EasyOCR e sem agendador (ordem de variantes fixa)"""
+    import sistema_placas_final as motor
+
+    motor.pytesseract = TesseractSimulado()
+    motor.TESSERACT_AVAILABLE = True
+    motor.EASYOCR_AVAILABLE = False
+
+    sistema = motor.SistemaReconhecimentoPlacasMelhorado()
+    sistema.agendador = None
+    return sistema
+
+
+def _texto_placa(sorteio):
+    modelo = sorteio.choice(['LLLNLNN', 'LLLNNNN'])
+    return ''.join(sorteio.choice(LETRAS if c == 'L' else DIGITOS) for c in modelo)
+
+
+def cena_sintetica(largura, altura, placas, semente=0):
+    """Quadro com ruído de fundo, 'carros' e `placas` placas renderizadas em posições sorteadas"""
+    sorteio = random.Random(semente)
+    gerador = np.random.default_rng(semente)
+    imagem = gerador.integers(60, 120, (altura, largura, 3), dtype=np.uint8)
+    imagem = cv2.GaussianBlur(imagem, (5, 5), 0)
+
+    escala = largura / 1280.0
+    pw, ph = max(40, int(200 * escala)), max(14, int(62 * escala))
+    for _ in range(placas):
+        x = sorteio.randrange(0, max(1, largura - pw))
+        y = sorteio.randrange(0, max(1, altura - ph))
+        cor = tuple(sorteio.randrange(30, 200) for _ in range(3))
+        cv2.rectangle(imagem, (max(0, x - pw // 2), max(0, y - ph)), (min(largura - 1, x + pw + pw // 2), min(altura - 1, y + ph * 2)), cor, -1)
+        cv2.rectangle(imagem, (x, y), (x + pw, y + ph), (255, 255, 255), -1)
+        cv2.rectangle(imagem, (x, y), (x + pw, y + ph), (0, 0, 0), 2)
+        cv2.putText(imagem, _texto_placa(sorteio), (x + pw // 16, y + int(ph * 0.78)), cv2.FONT_HERSHEY_SIMPLEX,
+                    ph / 40.0, (0, 0, 0), max(1, ph // 20), cv2.LINE_AA)
+    return imagem
+
+
+def recorte_sintetico(largura, altura, semente=0):
+    """Recorte de placa Mercosul com faixa azul, borda e texto"""
+    sorteio = random.Random(semente)
+    imagem = np.full((altura, largura, 3), 235, dtype=np.uint8)
+    cv2.rectangle(imagem, (0, 0), (largura - 1, altura // 5), (160, 60, 0), -1)
+    cv2.rectangle(imagem, (0, 0), (largura - 1, altura - 1), (0, 0, 0), max(1, altura // 35))
+    cv2.putText(imagem, _texto_placa(sorteio), (largura // 18, int(altura * 0.85)), cv2.FONT_HERSHEY_SIMPLEX,
+                altura / 50.0, (0, 0, 0), max(1, altura // 20), cv2.LINE_AA)
+    ruido = np.random.default_rng(semente).normal(0, 6, imagem.shape)
+    return np.clip(imagem + ruido, 0, 255).astype(np.uint8)
+
+
+def candidatos_sinteticos(quantidade, largura=1920, altura=1080, semente=0):
+    """Candidatos sobrepostos em grupos, como os detectores produzem para a mesma placa"""
+    sorteio = random.Random(semente)
+    candidatos = []
+    while len(candidatos) < quantidade:
+        cx, cy = sorteio.randrange(100, largura - 100), sorteio.randrange(40, altura - 40)
+        for _ in range(min(sorteio.randint(1, 6), quantidade - len(candidatos))):
+            w, h = sorteio.randint(80, 220), sorteio.randint(25, 70)
+            x1, y1 = cx - w // 2 + sorteio.randint(-8, 8), cy - h // 2 + sorteio.randint(-8, 8)
+            candidatos.append({'bbox': (x1, y1, x1 + w, y1 + h), 'area': w * h, 'aspect_ratio': w / float(h),
+                               'score': sorteio.random(), 'metodo': 'Sintetico'})
+    return candidatos
+
+
+def textos_ocr(quantidade=200, semente=0):
+    """Saídas típicas de OCR: placa com lixo (BRASIL, BR), pontuação, confusões e textos curtos"""
+    sorteio = random.Random(semente)
+    ruidos = ['BRASIL ', 'BR ', 'MERCOSUL ', '', '', ' |', '.', '-']
+    textos = []
+    for _ in range(quantidade):
+        placa = _texto_placa(sorteio)
+        if sorteio.random() < 0.3:
+            placa = placa.replace('0', 'O').replace('1', 'I')
+        texto = sorteio.choice(ruidos) + placa[:3] + sorteio.choice(['-', ' ', '']) + placa[3:] + sorteio.choice(ruidos)
+        textos.append(texto if sorteio.random() > 0.1 else texto[:sorteio.randint(0, 5)])
+    return textos
+
+
+def medir(funcao, repeticoes=7, tempo_min=0.05):
+    """
+    Tempo por chamada: calibra o número de chamadas por rodada para durar >= tempo_min
+    e reporta mediana, mínimo e desvio entre `repeticoes` rodadas (µs)
+    """
+    funcao()
+    vezes = 1
+    while True:
+        inicio = time.perf_counter()
+        for _ in range(vezes):
+            funcao()
+        decorrido = time.perf_counter() - inicio
+        if decorrido >= tempo_min or vezes >= 1 << 20:
+            break
+        vezes = min(1 << 20, max(vezes * 2, int(vezes * tempo_min * 1.1 / max(decorrido, 1e-9))))
+
+    rodadas = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for _ in range(vezes):
+            funcao()
+        rodadas.append((time.perf_counter() - inicio) / vezes * 1e6)
+
+    return {
+        'mediana_us': round(statistics.median(rodadas), 3),
+        'min_us': round(min(rodadas), 3),
+        'desvio_us': round(statistics.pstdev(rodadas), 3),
+        'chamadas_por_rodada': vezes,
+        'rodadas': repeticoes,
+    }
+
+
+def casos(sistema):
+    """Gerar (nome, função sem argumentos) para cada função e tamanho de entrada"""
+    contexto = sistema.contexto_quadro()
+
+    for largura, altura in TAMANHOS_IMAGEM:
+        for placas in QUANTIDADES_PLACAS:
+            rotulo = f"{largura}x{altura}/{placas}p"
+            imagem = cena_sintetica(largura, altura, placas, semente=largura + placas)
+            yield f"preprocessar_para_placas[{rotulo}]", lambda imagem=imagem: sistema.preprocessar_para_placas(imagem, contexto)
+
+            mapas = sistema.preprocessar_para_placas(imagem)
+            yield (f"_detectar_por_contornos[{rotulo}]",
+                   lambda m=mapas, imagem=imagem: sistema._detectar_por_contornos(m['morph_opening'], imagem, contexto))
+            yield (f"_detectar_por_componentes[{rotulo}]",
+                   lambda m=mapas, imagem=imagem: sistema._detectar_por_componentes(m['bin_adaptiva'], imagem, contexto))
+            yield (f"_detectar_por_bordas[{rotulo}]",
+                   lambda m=mapas, imagem=imagem: sistema._detectar_por_bordas(m['bordas_canny'], imagem, contexto))
+
+    for quantidade in QUANTIDADES_CANDIDATOS:
+        candidatos = candidatos_sinteticos(quantidade, semente=quantidade)
+        # Cópias rasas: a função reordena a lista e remove itens
+        yield (f"_filtrar_placas_candidatas[{quantidade}c]",
+               lambda c=candidatos: sistema._filtrar_placas_candidatas([dict(x) for x in c]))
+
+    for largura, altura in TAMANHOS_RECORTE:
+        recorte = recorte_sintetico(largura, altura, semente=largura)
+        # Sem cache: cada chamada refaz ampliação, CLAHE e binarizações
+        yield f"_isolar_letras_placa[{largura}x{altura}]", lambda r=recorte: sistema._isolar_letras_placa(r)
+
+    textos = textos_ocr()
+    yield "_extrair_placa_do_texto[200 textos]", lambda: [sistema._extrair_placa_do_texto(t) for t in textos]
+    extraidos = [sistema._extrair_placa_do_texto(t) for t in textos]
+    yield "_validar_placa_final[200 textos]", lambda: [sistema._validar_placa_final(t, 0.5) for t in extraidos]
+
+    for largura, altura in TAMANHOS_IMAGEM[:2]:
+        imagem = cena_sintetica(largura, altura, 1, semente=largura)
+        yield (f"processar_quadro[{largura}x{altura}/1p, OCR simulado]",
+               lambda imagem=imagem: sistema.processar_quadro(imagem, compacto=True))
+
+
+def ambiente():
+    return {
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'opencv_threads': cv2.getNumThreads(),
+    }
+
+
+def executar(sistema=None, filtro=None, repeticoes=7, tempo_min=0.05, log_callback=None):
+    """Rodar os casos (opcionalmente só os que contêm `filtro`) e devolver o relatório"""
+    sistema = sistema or criar_sistema()
+    resultados = {}
+    for nome, funcao in casos(sistema):
+        if filtro and filtro not in nome:
+            continue
+        resultados[nome] = medir(funcao, repeticoes, tempo_min)
+        if log_callback:
+            log_callback(f"   {nome:60s} {resultados[nome]['mediana_us']:12.1f} µs")
+    return {'ambiente': ambiente(), 'data': time.strftime('%Y-%m-%d %H:%M:%S'), 'casos': resultados}
+
+
+def comparar(relatorio, base, tolerancia=TOLERANCIA_PADRAO):
+    """
+    Razão mediana atual / base por caso; acima de 1 + tolerancia é regressão
+    (a diferença também precisa superar 3 desvios da base, para não acusar ruído)
+    """
+    comparacao = {}
+    for nome, atual in relatorio['casos'].items():
+        anterior = base['casos'].get(nome)
+        if anterior is None:
+            comparacao[nome] = {'status': 'novo'}
+            continue
+        razao = atual['mediana_us'] / max(anterior['mediana_us'], 1e-9)
+        diferenca = atual['mediana_us'] - anterior['mediana_us']
+        if razao > 1 + tolerancia and diferenca > 3 * anterior['desvio_us']:
+            status = 'regressao'
+        elif razao < 1 - tolerancia and -diferenca > 3 * anterior['desvio_us']:
+            status = 'melhora'
+        else:
+            status = 'igual'
+        comparacao[nome] = {'status': status, 'razao': round(razao, 3),
+                            'base_us': anterior['mediana_us'], 'atual_us': atual['mediana_us']}
+    return comparacao
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmarks das funções quentes (OCR simulado)')
+    parser.add_argument('--saida', default='desempenho.json', help='Relatório JSON desta execução')
+    parser.add_argument('--base', default='base_desempenho.json', help='Base para comparação')
+    parser.add_argument('--salvar-base', action='store_true', help='Gravar esta execução como a nova base')
+    parser.add_argument('--filtro', help='Só casos cujo nome contém este texto')
+    parser.add_argument('--repeticoes', type=int, default=7)
+    parser.add_argument('--tempo-min', type=float, default=0.05, help='Duração mínima de cada rodada (s)')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO)
+    parser.add_argument('--threads', type=int, default=1, help='Threads do OpenCV (1 = mais reprodutível)')
+    args = parser.parse_args()
+
+    cv2.setNumThreads(args.threads)
+
+    print("⏱️ Microbenchmarks (mediana por chamada):")
+    relatorio = executar(filtro=args.filtro, repeticoes=args.repeticoes, tempo_min=args.tempo_min, log_callback=print)
+
+    try:
+        with open(args.base, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+    except FileNotFoundError:
+        base = None
+
+    regressoes = []
+    if base is not None and not args.salvar_base:
+        relatorio['comparacao'] = comparar(relatorio, base, args.tolerancia)
+        if base.get('ambiente') != relatorio['ambiente']:
+            print("\n⚠️ Ambiente diferente do da base: comparação apenas indicativa")
+        print(f"\n📊 Comparação com {args.base} (tolerância {args.tolerancia:.0%}):")
+        for nome, item in relatorio['comparacao'].items():
+            if item['status'] == 'novo':
+                print(f"   🆕 {nome}")
+                continue
+            icone = {'regressao': '🔴', 'melhora': '🟢', 'igual': '⚪'}[item['status']]
+            print(f"   {icone} {nome:60s} {item['razao']:6.2f}x")
+            if item['status'] == 'regressao':
+                regressoes.append(nome)
+
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+
+    if args.salvar_base or base is None:
+        with open(args.base, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Base gravada: {args.base}")
+
+    if regressoes:
+        print(f"\n❌ {len(regressoes)} regressão(ões)")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
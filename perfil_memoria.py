@@ -0,0 +1,216 @@
+# Instrumentação opcional de memória por etapa do pipeline (config['memoria_perfil'])
+# Pico de alocações rastreadas (tracemalloc: numpy e Python) e variação do RSS (inclui buffers
+# internos de OpenCV/Torch) por etapa e por variante de OCR, com resumo de um lote inteiro
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+KB = 1024.0
+
+# Medidores abertos e se foi este módulo que ligou o tracemalloc (só então ele é desligado)
+_rastreio = {'usuarios': 0, 'iniciado_aqui': False}
+_rastreio_lock = threading.Lock()
+
+
+def _iniciar_rastreio():
+    with _rastreio_lock:
+        if _rastreio['usuarios'] == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _rastreio['iniciado_aqui'] = True
+        _rastreio['usuarios'] += 1
+
+
+def _parar_rastreio():
+    with _rastreio_lock:
+        _rastreio['usuarios'] -= 1
+        if _rastreio['usuarios'] == 0 and _rastreio['iniciado_aqui']:
+            tracemalloc.stop()
+            _rastreio['iniciado_aqui'] = False
+
+
+def rss_kb():
+    """RSS atual do processo em KB (Linux: /proc; nos demais, o pico informado pelo SO)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / KB
+    except (OSError, ValueError, IndexError, AttributeError):
+        return pico_rss_kb()
+
+
+def pico_rss_kb():
+    """Maior RSS do processo desde o início (ru_maxrss: KB no Linux, bytes no macOS)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / KB if sys.platform == 'darwin' else float(pico)
+
+
+class MedidorMemoria:
+    """
+    Medições de um quadro; etapas podem ser aninhadas (o pico de uma etapa inclui o das internas)
+    Etapas repetidas (uma variante em vários candidatos) acumulam: pico máximo, somas do resto
+    Cada thread tem sua pilha de etapas (o mesmo medidor serve às threads de um quadro); o
+    tracemalloc é global, então etapas abertas ao mesmo tempo em threads diferentes se misturam
+    fechar() desliga o tracemalloc quando o último medidor aberto foi quem o ligou
+    """
+
+    def __init__(self):
+        _iniciar_rastreio()
+        self.fechado = False
+        self.etapas = {}
+        self.pilhas = {}
+        self.lock = threading.Lock()
+        self.rss_inicio = rss_kb()
+        self.atual_inicio = tracemalloc.get_traced_memory()[0]
+        self.pico_quadro = 0
+        self.inicio = time.perf_counter()
+
+    def _atualizar_picos(self):
+        atual, pico = tracemalloc.get_traced_memory()
+        for pilha in self.pilhas.values():
+            for aberta in pilha:
+                aberta['pico'] = max(aberta['pico'], pico)
+        self.pico_quadro = max(self.pico_quadro, pico)
+        return atual
+
+    def etapa(self, nome):
+        return _EtapaMemoria(self, nome)
+
+    def _abrir(self, nome):
+        with self.lock:
+            atual = self._atualizar_picos()
+            tracemalloc.reset_peak()
+            pilha = self.pilhas.setdefault(threading.get_ident(), [])
+            pilha.append({'nome': nome, 'atual': atual, 'pico': atual, 'rss': rss_kb()})
+
+    def _fechar(self):
+        with self.lock:
+            self._fechar_etapa()
+
+    def _fechar_etapa(self):
+        atual = self._atualizar_picos()
+        pilha = self.pilhas[threading.get_ident()]
+        aberta = pilha.pop()
+        if not pilha:
+            del self.pilhas[threading.get_ident()]
+        medida = self.etapas.setdefault(aberta['nome'], {'chamadas': 0, 'pico_kb': 0.0, 'liquido_kb': 0.0, 'rss_delta_kb': 0.0})
+        medida['chamadas'] += 1
+        medida['pico_kb'] = max(medida['pico_kb'], (aberta['pico'] - aberta['atual']) / KB)
+        medida['liquido_kb'] += (atual - aberta['atual']) / KB
+        medida['rss_delta_kb'] += rss_kb() - aberta['rss']
+
+    def fechar(self):
+        with self.lock:
+            if self.fechado:
+                return
+            self.fechado = True
+        _parar_rastreio()
+
+    def relatorio(self):
+        """Dict serializável anexado ao resultado (resultado['memoria'])"""
+        with self.lock:
+            self._atualizar_picos()
+        rss_fim = rss_kb()
+        return {
+            'pico_rastreado_kb': round((self.pico_quadro - self.atual_inicio) / KB, 1),
+            'rss_inicio_kb': round(self.rss_inicio, 1),
+            'rss_fim_kb': round(rss_fim, 1),
+            'rss_pico_processo_kb': pico_rss_kb(),
+            'etapas': {nome: {chave: round(valor, 1) if isinstance(valor, float) else valor
+                              for chave, valor in medida.items()}
+                       for nome, medida in self.etapas.items()},
+        }
+
+
+class _EtapaMemoria:
+    def __init__(self, medidor, nome):
+        self.medidor = medidor
+        self.nome = nome
+
+    def __enter__(self):
+        self.medidor._abrir(self.nome)
+        return self
+
+    def __exit__(self, *args):
+        self.medidor._fechar()
+        return False
+
+
+def _percentil(valores, fracao):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * fracao))] if valores else 0.0
+
+
+class ResumoMemoria:
+    """Agregar resultado['memoria'] (ou RegistroResultado.memoria) de um lote"""
+
+    def __init__(self):
+        self.quadros = 0
+        self.picos_quadro = []
+        self.etapas = {}
+        self.maior = None
+        self.rss_pico_processo_kb = None
+
+    def adicionar(self, resultado):
+        memoria = resultado.get('memoria') if isinstance(resultado, dict) else getattr(resultado, 'memoria', None)
+        if not memoria:
+            return
+
+        self.quadros += 1
+        self.picos_quadro.append(memoria['pico_rastreado_kb'])
+        if self.maior is None or memoria['pico_rastreado_kb'] > self.maior[0]:
+            caminho = resultado.get('caminho') if isinstance(resultado, dict) else getattr(resultado, 'caminho', None)
+            self.maior = (memoria['pico_rastreado_kb'], caminho)
+        if memoria.get('rss_pico_processo_kb') is not None:
+            self.rss_pico_processo_kb = max(self.rss_pico_processo_kb or 0.0, memoria['rss_pico_processo_kb'])
+
+        for nome, medida in memoria['etapas'].items():
+            etapa = self.etapas.setdefault(nome, {'quadros': 0, 'chamadas': 0, 'picos': [], 'rss_delta_max_kb': 0.0})
+            etapa['quadros'] += 1
+            etapa['chamadas'] += medida['chamadas']
+            etapa['picos'].append(medida['pico_kb'])
+            etapa['rss_delta_max_kb'] = max(etapa['rss_delta_max_kb'], medida['rss_delta_kb'])
+
+    def relatorio(self):
+        etapas = {}
+        for nome, etapa in self.etapas.items():
+            etapas[nome] = {
+                'quadros': etapa['quadros'],
+                'chamadas': etapa['chamadas'],
+                'pico_medio_kb': round(sum(etapa['picos']) / len(etapa['picos']), 1),
+                'pico_p95_kb': round(_percentil(etapa['picos'], 0.95), 1),
+                'pico_max_kb': round(max(etapa['picos']), 1),
+                'rss_delta_max_kb': round(etapa['rss_delta_max_kb'], 1),
+            }
+        return {
+            'quadros': self.quadros,
+            'pico_quadro_p95_kb': round(_percentil(self.picos_quadro, 0.95), 1),
+            'pico_quadro_max_kb': round(max(self.picos_quadro), 1) if self.picos_quadro else 0.0,
+            'quadro_mais_pesado': self.maior[1] if self.maior else None,
+            'rss_pico_processo_kb': self.rss_pico_processo_kb,
+            'etapas': etapas,
+        }
+
+    def linhas(self):
+        """Relatório em texto, etapas da mais pesada para a mais leve"""
+        relatorio = self.relatorio()
+        if not relatorio['quadros']:
+            return []
+
+        linhas = [f"💾 Memória em {relatorio['quadros']} quadro(s): pico rastreado p95 "
+                  f"{relatorio['pico_quadro_p95_kb'] / KB:.1f}MB, máx {relatorio['pico_quadro_max_kb'] / KB:.1f}MB "
+                  f"({relatorio['quadro_mais_pesado']})"]
+        if relatorio['rss_pico_processo_kb'] is not None:
+            linhas.append(f"   RSS máximo do processo: {relatorio['rss_pico_processo_kb'] / KB:.0f}MB")
+        for nome, etapa in sorted(relatorio['etapas'].items(), key=lambda item: -item[1]['pico_max_kb']):
+            linhas.append(f"   {nome:32s} pico p95 {etapa['pico_p95_kb'] / KB:7.1f}MB  máx {etapa['pico_max_kb'] / KB:7.1f}MB"
+                          f"  RSS +{etapa['rss_delta_max_kb'] / KB:6.1f}MB  ({etapa['chamadas']} chamada(s))")
+        return linhas
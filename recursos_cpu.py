@@ -0,0 +1,144 @@
+# Orçamento de núcleos para OpenCV, Torch (EasyOCR) e workers
+# Divide os núcleos físicos entre os workers, evitando que cada pool de threads use a máquina inteira
+
+import os
+import sys
+
+import cv2
+
+_CPU_SYSFS = '/sys/devices/system/cpu/cpu{}/topology/{}'
+
+
+def nucleos_disponiveis():
+    """CPUs lógicas que este processo pode usar (respeita taskset/cgroups quando o SO informa)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _ler_topologia(cpu, campo):
+    try:
+        with open(_CPU_SYSFS.format(cpu, campo)) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def topologia(cpus=None):
+    """
+    Agrupar CPUs lógicas por núcleo físico: lista de (soquete, núcleo, [cpus irmãs SMT])
+    Sem /sys (não-Linux) cada CPU lógica vira um núcleo
+    """
+    cpus = nucleos_disponiveis() if cpus is None else sorted(cpus)
+    nucleos = {}
+    for cpu in cpus:
+        soquete = _ler_topologia(cpu, 'physical_package_id')
+        nucleo = _ler_topologia(cpu, 'core_id')
+        chave = (soquete if soquete is not None else 0, nucleo if nucleo is not None else cpu)
+        nucleos.setdefault(chave, []).append(cpu)
+    return [(soquete, nucleo, irmas) for (soquete, nucleo), irmas in sorted(nucleos.items())]
+
+
+def dividir_nucleos(workers, cpus=None):
+    """
+    Fatiar os núcleos físicos em `workers` blocos contíguos (mesmo soquete sempre que possível)
+    Cada bloco traz as CPUs lógicas dos núcleos; com mais workers que núcleos, os blocos se repetem
+    """
+    fisicos = topologia(cpus)
+    workers = max(1, int(workers))
+
+    if workers > len(fisicos):
+        return [{'cpus': list(fisicos[i % len(fisicos)][2]), 'fisicos': 1} for i in range(workers)]
+
+    base, resto = divmod(len(fisicos), workers)
+    blocos = []
+    inicio = 0
+    for i in range(workers):
+        tamanho = base + (1 if i < resto else 0)
+        fatia = fisicos[inicio:inicio + tamanho]
+        blocos.append({'cpus': [cpu for _, _, irmas in fatia for cpu in irmas], 'fisicos': len(fatia)})
+        inicio += tamanho
+    return blocos
+
+
+def plano_threads(workers=1, indice=0, cpus=None, em_processo=False):
+    """
+    Threads de cada biblioteca para o worker `indice` de `workers`
+    em_processo: workers são threads do mesmo processo (os pools são globais, então o plano vale
+    para todas elas e a afinidade não se aplica)
+    """
+    if em_processo:
+        todos = dividir_nucleos(1, cpus)[0]
+        por_worker_logicas = max(1, len(todos['cpus']) // max(1, workers))
+        por_worker_fisicos = max(1, todos['fisicos'] // max(1, workers))
+        return {
+            'workers': workers,
+            'indice': None,
+            'cpus': todos['cpus'],
+            'opencv': por_worker_logicas,
+            'torch': por_worker_fisicos,
+            'em_processo': True,
+        }
+
+    bloco = dividir_nucleos(workers, cpus)[indice % max(1, workers)]
+    return {
+        'workers': workers,
+        'indice': indice,
+        'cpus': bloco['cpus'],
+        'opencv': max(1, len(bloco['cpus'])),
+        # GEMM do Torch não ganha com SMT: uma thread por núcleo físico
+        'torch': max(1, bloco['fisicos']),
+        'em_processo': False,
+    }
+
+
+def ambiente_worker(plano):
+    """Variáveis de ambiente para subprocessos (valem antes de importar numpy/torch no filho)"""
+    threads = str(plano['torch'])
+    return {
+        'OMP_NUM_THREADS': threads,
+        'MKL_NUM_THREADS': threads,
+        'OPENBLAS_NUM_THREADS': threads,
+        'OPENCV_FOR_THREADS_NUM': str(plano['opencv']),
+    }
+
+
+def aplicar_plano(plano, afinidade=False):
+    """Aplicar o plano neste processo: cv2.setNumThreads, threads do Torch e afinidade opcional"""
+    cv2.setNumThreads(plano['opencv'])
+
+    torch = sys.modules.get('torch')
+    if torch is not None:
+        torch.set_num_threads(plano['torch'])
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Só pode ser definido antes do primeiro trabalho paralelo do Torch
+            pass
+
+    if afinidade and not plano['em_processo'] and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, plano['cpus'])
+
+    return relatorio_threads(plano)
+
+
+def relatorio_threads(plano=None):
+    """Configuração efetiva (o que as bibliotecas reportam agora, não o que foi pedido)"""
+    relatorio = {
+        'cpus_logicas': os.cpu_count(),
+        'cpus_permitidas': nucleos_disponiveis(),
+        'nucleos_fisicos': len(topologia()),
+        'opencv_threads': cv2.getNumThreads(),
+        'torch_threads': None,
+        'torch_interop': None,
+    }
+
+    torch = sys.modules.get('torch')
+    if torch is not None:
+        relatorio['torch_threads'] = torch.get_num_threads()
+        relatorio['torch_interop'] = torch.get_num_interop_threads()
+
+    if plano is not None:
+        relatorio['plano'] = dict(plano)
+
+    return relatorio
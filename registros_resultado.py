@@ -0,0 +1,242 @@
+# Registros compactos de resultado e saídas em lote (JSONL / SQLite)
+# Guardam apenas texto, bbox, scores e tempos: nenhuma imagem fica presa ao resultado
+
+import json
+import sqlite3
+
+
+def _bbox_int(bbox):
+    return tuple(int(v) for v in bbox) if bbox is not None else None
+
+
+class LeituraPlaca:
+    """Uma placa lida em um quadro"""
+
+    __slots__ = ('texto', 'bbox', 'confianca', 'consenso', 'metodo',
+                 'tesseract_bruto', 'easyocr_bruto', 'placa_valida', 'alertas', 'recorte')
+
+    def __init__(self, texto, bbox, confianca=0.0, consenso=0.0, metodo='',
+                 tesseract_bruto='', easyocr_bruto='', placa_valida=False, alertas=None, recorte=None):
+        self.texto = texto
+        self.bbox = _bbox_int(bbox)
+        self.confianca = float(confianca)
+        self.consenso = float(consenso)
+        self.metodo = metodo
+        self.tesseract_bruto = tesseract_bruto
+        self.easyocr_bruto = easyocr_bruto
+        self.placa_valida = bool(placa_valida)
+        self.alertas = [(placa, float(distancia), dados) for placa, distancia, dados in (alertas or [])]
+        self.recorte = recorte
+
+    @classmethod
+    def de_resultado_ocr(cls, ocr, manter_recorte=False):
+        return cls(
+            texto=ocr.get('texto_final') or ocr['easyocr']['texto_final'] or ocr['tesseract']['texto_final'],
+            bbox=ocr['bbox'],
+            confianca=ocr.get('confianca_deteccao', 0.0),
+            consenso=ocr.get('consenso', 0.0),
+            metodo=ocr.get('metodo_deteccao', ''),
+            tesseract_bruto=ocr['tesseract']['texto_bruto'],
+            easyocr_bruto=ocr['easyocr']['texto_bruto'],
+            placa_valida=ocr.get('placa_valida', False),
+            alertas=ocr.get('alertas'),
+            recorte=ocr.get('imagem_placa') if manter_recorte else None
+        )
+
+    def para_dict(self):
+        return {
+            'texto': self.texto,
+            'bbox': list(self.bbox) if self.bbox else None,
+            'confianca': self.confianca,
+            'consenso': self.consenso,
+            'metodo': self.metodo,
+            'tesseract_bruto': self.tesseract_bruto,
+            'easyocr_bruto': self.easyocr_bruto,
+            'placa_valida': self.placa_valida,
+            'alertas': [list(alerta) for alerta in self.alertas],
+        }
+
+
+class RegistroResultado:
+    """Resultado compacto de um quadro (substitui o dict com imagem_original e recortes)"""
+
+    __slots__ = ('caminho', 'nome_arquivo', 'largura', 'altura', 'candidatos',
+                 'leituras', 'tempos', 'erro', 'memoria')
+
+    def __init__(self, caminho=None, nome_arquivo=None, largura=0, altura=0, candidatos=0,
+                 leituras=None, tempos=None, erro=None, memoria=None):
+        self.caminho = caminho
+        self.nome_arquivo = nome_arquivo
+        self.largura = largura
+        self.altura = altura
+        self.candidatos = candidatos
+        self.leituras = leituras or []
+        self.tempos = tempos or {}
+        self.erro = erro
+        self.memoria = memoria
+
+    @classmethod
+    def de_resultado(cls, resultado, manter_recortes=False):
+        """Converter o dict de processar_imagem, descartando as imagens"""
+        if 'erro' in resultado:
+            return cls(caminho=resultado.get('caminho'), erro=resultado['erro'],
+                       tempos=resultado.get('tempos'), memoria=resultado.get('memoria'))
+
+        imagem = resultado.get('imagem_original')
+        altura, largura = imagem.shape[:2] if imagem is not None else (0, 0)
+
+        return cls(
+            caminho=resultado.get('caminho'),
+            nome_arquivo=resultado.get('nome_arquivo'),
+            largura=largura,
+            altura=altura,
+            candidatos=len(resultado.get('placas_detectadas', [])),
+            leituras=[LeituraPlaca.de_resultado_ocr(ocr, manter_recortes)
+                      for ocr in resultado.get('resultados_ocr', [])],
+            tempos=dict(resultado.get('tempos', {})),
+            memoria=resultado.get('memoria')
+        )
+
+    @property
+    def placa(self):
+        """Texto da primeira placa válida (ou None)"""
+        for leitura in self.leituras:
+            if leitura.placa_valida:
+                return leitura.texto
+        return None
+
+    def para_dict(self):
+        dados = {
+            'caminho': self.caminho,
+            'nome_arquivo': self.nome_arquivo,
+            'largura': self.largura,
+            'altura': self.altura,
+            'candidatos': self.candidatos,
+            'leituras': [leitura.para_dict() for leitura in self.leituras],
+            'tempos': self.tempos,
+            'erro': self.erro,
+        }
+        if self.memoria is not None:
+            dados['memoria'] = self.memoria
+        return dados
+
+
+def _como_registro(resultado):
+    if isinstance(resultado, RegistroResultado):
+        return resultado
+    return RegistroResultado.de_resultado(resultado)
+
+
+class SaidaJSONL:
+    """Grava um registro por linha, descarregando a cada lote"""
+
+    def __init__(self, caminho, lote=100):
+        self.caminho = caminho
+        self.lote = lote
+        self.pendentes = []
+        self.arquivo = open(caminho, 'a', encoding='utf-8')
+
+    def escrever(self, resultado):
+        registro = _como_registro(resultado)
+        self.pendentes.append(json.dumps(registro.para_dict(), ensure_ascii=False))
+        if len(self.pendentes) >= self.lote:
+            self.descarregar()
+
+    def descarregar(self):
+        if self.pendentes:
+            self.arquivo.write('\n'.join(self.pendentes) + '\n')
+            self.arquivo.flush()
+            self.pendentes = []
+
+    def fechar(self):
+        self.descarregar()
+        self.arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+
+class SaidaSQLite:
+    """Grava resultados e leituras em SQLite, uma transação por lote"""
+
+    def __init__(self, caminho, lote=500):
+        self.caminho = caminho
+        self.lote = lote
+        self.pendentes = []
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute('PRAGMA journal_mode=WAL')
+        self.conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS resultados (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                caminho TEXT,
+                nome_arquivo TEXT,
+                largura INTEGER,
+                altura INTEGER,
+                candidatos INTEGER,
+                placa TEXT,
+                tempo_total REAL,
+                tempos TEXT,
+                erro TEXT
+            );
+            CREATE TABLE IF NOT EXISTS leituras (
+                resultado_id INTEGER REFERENCES resultados(id),
+                texto TEXT,
+                x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER,
+                confianca REAL,
+                consenso REAL,
+                metodo TEXT,
+                tesseract_bruto TEXT,
+                easyocr_bruto TEXT,
+                placa_valida INTEGER,
+                alertas TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_leituras_texto ON leituras(texto);
+        """)
+        # Bancos criados antes da lista monitorada não têm a coluna de alertas
+        colunas = {linha[1] for linha in self.conexao.execute('PRAGMA table_info(leituras)')}
+        if 'alertas' not in colunas:
+            self.conexao.execute('ALTER TABLE leituras ADD COLUMN alertas TEXT')
+            self.conexao.commit()
+
+    def escrever(self, resultado):
+        self.pendentes.append(_como_registro(resultado))
+        if len(self.pendentes) >= self.lote:
+            self.descarregar()
+
+    def descarregar(self):
+        if not self.pendentes:
+            return
+
+        with self.conexao:
+            for registro in self.pendentes:
+                cursor = self.conexao.execute(
+                    'INSERT INTO resultados (caminho, nome_arquivo, largura, altura, candidatos, placa, '
+                    'tempo_total, tempos, erro) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (registro.caminho, registro.nome_arquivo, registro.largura, registro.altura,
+                     registro.candidatos, registro.placa, registro.tempos.get('total'),
+                     json.dumps(registro.tempos), registro.erro))
+                resultado_id = cursor.lastrowid
+
+                self.conexao.executemany(
+                    'INSERT INTO leituras (resultado_id, texto, x1, y1, x2, y2, confianca, consenso, metodo, '
+                    'tesseract_bruto, easyocr_bruto, placa_valida, alertas) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(resultado_id, l.texto, *(l.bbox or (None,) * 4), l.confianca, l.consenso,
+                      l.metodo, l.tesseract_bruto, l.easyocr_bruto, int(l.placa_valida),
+                      json.dumps(l.alertas, ensure_ascii=False) if l.alertas else None)
+                     for l in registro.leituras])
+
+        self.pendentes = []
+
+    def fechar(self):
+        self.descarregar()
+        self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
@@ -7,8 +7,22 @@ import cv2
 import numpy as np
 from PIL import Image, ImageTk
 import threading
+import atexit
+import queue
+import json
+import math
+import contextlib
+from collections import ChainMap, OrderedDict
 import os
+import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from registros_resultado import RegistroResultado
+from indice_placas import IndicePlacas
+from decodificador_placa import decodificar_ctc, decodificar_posicoes, distribuicoes_hocr
+from recursos_cpu import nucleos_disponiveis, plano_threads, aplicar_plano, relatorio_threads
+from perfil_memoria import MedidorMemoria, ResumoMemoria
+from acervo_recortes import AcervoRecortes
 warnings.filterwarnings('ignore')
 
 try:
@@ -23,30 +37,612 @@ try:
 except ImportError:
     EASYOCR_AVAILABLE = False
 
+PADRAO_MERCOSUL = r'^[A-Z]{3}[0-9][A-Z][0-9]{2}$'
+PADRAO_ANTIGA = r'^[A-Z]{3}[0-9]{4}$'
+
+
+def _redimensionar(imagem, escala):
+    h, w = imagem.shape[:2]
+    return cv2.resize(imagem, (w*escala, h*escala), interpolation=cv2.INTER_CUBIC)
+
+
+def _aplicar_clahe(imagem, clip):
+    clahe = cv2.createCLAHE(clipLimit=clip, tileGridSize=(8,8))
+    return clahe.apply(imagem)
+
+
+def _otsu(imagem, tipo=cv2.THRESH_BINARY):
+    _, thresh = cv2.threshold(imagem, 0, 255, tipo + cv2.THRESH_OTSU)
+    return thresh
+
+
+def _para_cinza(imagem):
+    if len(imagem.shape) == 3:
+        return cv2.cvtColor(imagem, cv2.COLOR_BGR2GRAY)
+    return imagem.copy()
+
+
+def _para_bgr(imagem):
+    if len(imagem.shape) == 3:
+        return imagem
+    return cv2.cvtColor(imagem, cv2.COLOR_GRAY2BGR)
+
+
+def _nitidez(imagem):
+    kernel_sharp = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
+    return cv2.filter2D(imagem, -1, kernel_sharp)
+
+
+def _fechamento(imagem, iteracoes=1):
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    return cv2.morphologyEx(imagem, cv2.MORPH_CLOSE, kernel, iterations=iteracoes)
+
+
+def _isolar_componentes_letras(denoised):
+    """Filtrar componentes com formato de letra a partir da placa ampliada e sem ruído"""
+    thresh = _otsu(denoised)
+
+    center_h = thresh.shape[0] // 2
+    center_region = thresh[center_h-20:center_h+20, :]
+    if np.mean(center_region) > 127:
+        thresh = cv2.bitwise_not(thresh)
+
+    thresh = _fechamento(thresh, iteracoes=2)
+
+    num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(thresh, connectivity=8)
+    
+    mask_limpa = np.zeros_like(thresh)
+    
+    altura_min_letra = thresh.shape[0] * 0.35
+    altura_max_letra = thresh.shape[0] * 0.75
+    
+    largura_min_letra = thresh.shape[0] * 0.15
+    largura_max_letra = thresh.shape[0] * 1.2
+    
+    componentes_validos = []
+    
+    for i in range(1, num_labels):
+        x, y, w_comp, h_comp, area = stats[i]
+        
+        margin = int(thresh.shape[0] * 0.05)
+        if x < margin or y < margin:
+            continue
+        if x + w_comp > thresh.shape[1] - margin:
+            continue
+        if y + h_comp > thresh.shape[0] - margin:
+            continue
+        
+        if h_comp < altura_min_letra or h_comp > altura_max_letra:
+            continue
+        
+        if w_comp < largura_min_letra or w_comp > largura_max_letra:
+            continue
+        
+        if area < 50 or area > thresh.shape[0] * thresh.shape[1] * 0.12:
+            continue
+        
+        aspect = w_comp / float(h_comp)
+        if aspect < 0.15 or aspect > 1.5:
+            continue
+        
+        center_y = y + h_comp / 2.0
+        img_center_y = thresh.shape[0] / 2.0
+        distancia_centro = abs(center_y - img_center_y)
+        
+        if distancia_centro > thresh.shape[0] * 0.3:
+            continue
+        
+        componentes_validos.append({
+            'label': i,
+            'x': x,
+            'area': area,
+            'height': h_comp
+        })
+    
+    if componentes_validos:
+        componentes_validos.sort(key=lambda c: c['x'])
+        
+        if len(componentes_validos) > 10:
+            alturas = [c['height'] for c in componentes_validos]
+            altura_mediana = sorted(alturas)[len(alturas)//2]
+            
+            componentes_validos = [
+                c for c in componentes_validos 
+                if abs(c['height'] - altura_mediana) < altura_mediana * 0.3
+            ]
+        
+        for comp in componentes_validos:
+            mask_limpa[labels == comp['label']] = 255
+
+    if np.sum(mask_limpa) < 100:
+        mask_limpa = thresh
+
+    kernel_final = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    mask_limpa = cv2.morphologyEx(mask_limpa, cv2.MORPH_OPEN, kernel_final)
+    mask_limpa = cv2.morphologyEx(mask_limpa, cv2.MORPH_CLOSE, kernel_final)
+
+    pad = 20
+    mask_limpa = cv2.copyMakeBorder(mask_limpa, pad, pad, pad, pad, cv2.BORDER_CONSTANT, value=0)
+
+    return mask_limpa
+
+
+def _ordenar_cantos(pontos):
+    """Ordenar 4 pontos como superior-esquerdo, superior-direito, inferior-direito, inferior-esquerdo"""
+    pontos = np.asarray(pontos, dtype=np.float32).reshape(4, 2)
+    soma = pontos.sum(axis=1)
+    diferenca = np.diff(pontos, axis=1).ravel()
+    return np.array([
+        pontos[np.argmin(soma)],
+        pontos[np.argmin(diferenca)],
+        pontos[np.argmax(soma)],
+        pontos[np.argmax(diferenca)],
+    ], dtype=np.float32)
+
+
+# Grafo de transformações derivadas de um recorte de placa: nome -> (dependências, função)
+TRANSFORMACOES_PLACA = {
+    'cinza': (('original',), _para_cinza),
+    'bgr': (('original',), _para_bgr),
+    'cinza_2x': (('cinza',), lambda img: _redimensionar(img, 2)),
+    'otsu': (('cinza',), _otsu),
+    'otsu_inv': (('cinza',), lambda img: _otsu(img, cv2.THRESH_BINARY_INV)),
+    'otsu_inv_3x': (('otsu_inv',), lambda img: _redimensionar(img, 3)),
+    'cinza_3x': (('cinza',), lambda img: _redimensionar(img, 3)),
+    'clahe2_3x': (('cinza_3x',), lambda img: _aplicar_clahe(img, 2.0)),
+    'otsu_clahe2_3x': (('clahe2_3x',), _otsu),
+    'bgr_3x': (('bgr',), lambda img: _redimensionar(img, 3)),
+    'clahe3': (('cinza',), lambda img: _aplicar_clahe(img, 3.0)),
+    'clahe3_3x': (('clahe3',), lambda img: _redimensionar(img, 3)),
+    'clahe3_3x_bgr': (('clahe3_3x',), _para_bgr),
+    'cinza_5x': (('cinza',), lambda img: _redimensionar(img, 5)),
+    'clahe4_5x': (('cinza_5x',), lambda img: _aplicar_clahe(img, 4.0)),
+    'nitida_5x': (('clahe4_5x',), _nitidez),
+    'sem_ruido_5x': (('nitida_5x',), lambda img: cv2.fastNlMeansDenoising(img, h=10)),
+    'letras_isoladas': (('sem_ruido_5x',), _isolar_componentes_letras),
+    'otsu_clahe4_5x': (('clahe4_5x',), _otsu),
+    'morph_clahe4_5x': (('otsu_clahe4_5x',), _fechamento),
+}
+
+
+class CacheImagensPlaca:
+    """Imagens derivadas de um recorte de placa, calculadas uma única vez e compartilhadas"""
+
+    def __init__(self, imagem, transformacoes=None):
+        self.transformacoes = transformacoes or TRANSFORMACOES_PLACA
+        self.imagens = {'original': imagem}
+        self.lock = threading.RLock()
+
+    def obter(self, nome):
+        """Retornar a imagem derivada, calculando suas dependências se necessário"""
+        with self.lock:
+            if nome not in self.imagens:
+                dependencias, funcao = self.transformacoes[nome]
+                entradas = [self.obter(dep) for dep in dependencias]
+                self.imagens[nome] = funcao(*entradas)
+            return self.imagens[nome]
+
+    def calculadas(self):
+        return list(self.imagens.keys())
+
+
+
+WHITELIST_PLACA = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+
+# Variantes do OCR completo: nome -> motor, imagem derivada (CacheImagensPlaca) e config do Tesseract
+VARIANTES_OCR = {
+    'tesseract_letras_psm8': {'motor': 'tesseract', 'imagem': 'letras_isoladas',
+                              'config': f'--psm 8 --oem 3 -c tessedit_char_whitelist={WHITELIST_PLACA}'},
+    'tesseract_letras_psm7': {'motor': 'tesseract', 'imagem': 'letras_isoladas',
+                              'config': f'--psm 7 --oem 3 -c tessedit_char_whitelist={WHITELIST_PLACA}'},
+    'tesseract_letras_psm13': {'motor': 'tesseract', 'imagem': 'letras_isoladas',
+                               'config': f'--psm 13 --oem 3 -c tessedit_char_whitelist={WHITELIST_PLACA}'},
+    'tesseract_clahe_otsu_3x': {'motor': 'tesseract', 'imagem': 'otsu_clahe2_3x', 'config': '--psm 8 --oem 3'},
+    'tesseract_otsu_inv_3x': {'motor': 'tesseract', 'imagem': 'otsu_inv_3x', 'config': '--psm 8 --oem 3'},
+    'easyocr_letras': {'motor': 'easyocr', 'imagem': 'letras_isoladas'},
+    'easyocr_bgr_3x': {'motor': 'easyocr', 'imagem': 'bgr_3x'},
+    'easyocr_clahe_3x': {'motor': 'easyocr', 'imagem': 'clahe3_3x_bgr'},
+}
+
+# Detectores de candidatos: nome -> (mapas de preprocessar_para_placas usados, função)
+DETECTORES_PLACA = {
+    'caracteres': (('bin_adaptiva_inv',),
+                   lambda s, prep, roi, ctx: s._detectar_por_caracteres(roi, prep.get('bin_adaptiva_inv'))),
+    'contornos_morph': (('morph_opening',),
+                        lambda s, prep, roi, ctx: s._detectar_por_contornos(prep['morph_opening'], roi, ctx)),
+    'contornos_adaptiva': (('bin_adaptiva',),
+                           lambda s, prep, roi, ctx: s._detectar_por_contornos(prep['bin_adaptiva'], roi, ctx)),
+    'contornos_otsu': (('bin_otsu',),
+                       lambda s, prep, roi, ctx: s._detectar_por_contornos(prep['bin_otsu'], roi, ctx)),
+    'componentes_adaptiva': (('bin_adaptiva',),
+                             lambda s, prep, roi, ctx: s._detectar_por_componentes(prep['bin_adaptiva'], roi, ctx)),
+    'componentes_morph': (('morph_opening',),
+                          lambda s, prep, roi, ctx: s._detectar_por_componentes(prep['morph_opening'], roi, ctx)),
+    'bordas_canny': (('bordas_canny',),
+                     lambda s, prep, roi, ctx: s._detectar_por_bordas(prep['bordas_canny'], roi, ctx)),
+}
+
+# Perfis de pipeline: chaves de self.config sobrepostas durante a chamada
+# 'agressivo' é o comportamento padrão (todas as estratégias, todas as variantes)
+PERFIS_PIPELINE = {
+    'rapido': {
+        'detectores': ['contornos_morph', 'componentes_adaptiva', 'bordas_canny'],
+        'bilateral_d': 5,
+        'candidatos_preliminar_max': 3,
+        'placas_max': 1,
+        'ocr_preliminar': ['cinza_2x'],
+        'variantes_ocr': ['tesseract_letras_psm7', 'easyocr_letras'],
+        'consenso_min_votos': 1,
+        'fallback_imagem_inteira': False,
+        'decodificacao_restrita': True,
+    },
+    'balanceado': {
+        'detectores': ['caracteres', 'contornos_morph', 'contornos_adaptiva', 'componentes_adaptiva', 'bordas_canny'],
+        'bilateral_d': 9,
+        'candidatos_preliminar_max': 5,
+        'placas_max': 3,
+        'ocr_preliminar': ['cinza_2x', 'otsu', 'easyocr'],
+        'variantes_ocr': ['tesseract_letras_psm8', 'tesseract_letras_psm7', 'tesseract_clahe_otsu_3x',
+                          'easyocr_letras', 'easyocr_bgr_3x'],
+    },
+    'agressivo': {},
+}
+
+
+class AgendadorVariantesOCR:
+    """
+    Aprende quais variantes de OCR produzem a placa aceita e ordena/descarta as demais
+    A cada explorar_a_cada consultas da condição uma variante descartada (em rodízio) roda primeiro,
+    antes que o consenso interrompa a lista, para que a estatística dela possa se recuperar
+    """
+
+    def __init__(self, caminho=None, min_amostras=30, taxa_minima=0.02, salvar_a_cada=20, explorar_a_cada=20):
+        self.caminho = caminho
+        self.min_amostras = min_amostras
+        self.taxa_minima = taxa_minima
+        self.salvar_a_cada = salvar_a_cada
+        self.explorar_a_cada = explorar_a_cada
+        self.estatisticas = {}
+        self.consultas = {}
+        self.registros_pendentes = 0
+        self.lock = threading.Lock()
+        self.carregar()
+        if self.caminho:
+            # Sessões curtas (GUI, CLIs) não chegam a salvar_a_cada registros: salvar na saída
+            atexit.register(self.fechar)
+
+    def condicao(self, imagem, formato=None):
+        """Chave da condição da placa: tamanho, contraste e formato provável"""
+        gray = _para_cinza(imagem)
+        altura = gray.shape[0]
+        contraste = float(np.std(gray))
+
+        if altura < 25:
+            tamanho = 'pequena'
+        elif altura < 50:
+            tamanho = 'media'
+        else:
+            tamanho = 'grande'
+
+        if contraste < 30:
+            nivel = 'baixo'
+        elif contraste < 60:
+            nivel = 'medio'
+        else:
+            nivel = 'alto'
+
+        return f"{tamanho}|{nivel}|{formato or 'desconhecido'}"
+
+    def taxa_vitoria(self, condicao, variante):
+        """Taxa de vitória suavizada (Laplace) da variante na condição"""
+        stats = self.estatisticas.get(condicao, {}).get(variante, {'execucoes': 0, 'vitorias': 0})
+        return (stats['vitorias'] + 1) / (stats['execucoes'] + 2)
+
+    def ordenar(self, variantes, condicao):
+        """Ordenar variantes pela taxa de vitória esperada, descartando as que quase nunca vencem"""
+        with self.lock:
+            ordenadas = sorted(variantes, key=lambda v: self.taxa_vitoria(condicao, v), reverse=True)
+            self.consultas[condicao] = self.consultas.get(condicao, 0) + 1
+            explorar = bool(self.explorar_a_cada) and self.consultas[condicao] % self.explorar_a_cada == 0
+
+            selecionadas = []
+            descartadas = []
+            for variante in ordenadas:
+                stats = self.estatisticas.get(condicao, {}).get(variante)
+                if stats and stats['execucoes'] >= self.min_amostras:
+                    if stats['vitorias'] / stats['execucoes'] < self.taxa_minima:
+                        descartadas.append(variante)
+                        continue
+                selecionadas.append(variante)
+
+            if explorar and descartadas:
+                rodada = self.consultas[condicao] // self.explorar_a_cada
+                selecionadas.insert(0, descartadas[rodada % len(descartadas)])
+
+        if not selecionadas and ordenadas:
+            selecionadas = ordenadas[:1]
+
+        return selecionadas
+
+    def registrar(self, condicao, executadas, vencedoras):
+        """Registrar o resultado de uma placa aceita"""
+        with self.lock:
+            stats_condicao = self.estatisticas.setdefault(condicao, {})
+            for variante in executadas:
+                stats = stats_condicao.setdefault(variante, {'execucoes': 0, 'vitorias': 0})
+                stats['execucoes'] += 1
+                if variante in vencedoras:
+                    stats['vitorias'] += 1
+
+            self.registros_pendentes += 1
+            salvar = self.registros_pendentes >= self.salvar_a_cada
+
+        if salvar:
+            self.salvar()
+
+    def carregar(self):
+        if not self.caminho or not os.path.exists(self.caminho):
+            return
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                self.estatisticas = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Estatísticas de variantes ignoradas ({self.caminho}): {e}")
+            self.estatisticas = {}
+
+    def fechar(self):
+        """Salvar o que ainda não foi gravado (chamado também na saída do interpretador)"""
+        if self.registros_pendentes:
+            self.salvar()
+
+    def salvar(self):
+        if not self.caminho:
+            return
+        with self.lock:
+            dados = json.dumps(self.estatisticas, indent=2, sort_keys=True)
+            self.registros_pendentes = 0
+        try:
+            temporario = self.caminho + '.tmp'
+            with open(temporario, 'w', encoding='utf-8') as f:
+                f.write(dados)
+            os.replace(temporario, self.caminho)
+        except Exception as e:
+            print(f"⚠️ Não foi possível salvar estatísticas de variantes: {e}")
+
+
+
+class VotacaoCaracteres:
+    """Votação por posição, ponderada pela confiança, entre leituras de 7 caracteres"""
+
+    def __init__(self, tamanho=7):
+        self.tamanho = tamanho
+        self.votos = [{} for _ in range(tamanho)]
+        self.leituras = []
+        self.atingido = False
+
+    def adicionar(self, placa, confiancas, variante=None):
+        if len(placa) != self.tamanho:
+            return
+        for pos, (caractere, confianca) in enumerate(zip(placa, confiancas)):
+            peso = max(float(confianca), 0.01)
+            self.votos[pos][caractere] = self.votos[pos].get(caractere, 0.0) + peso
+        self.leituras.append((variante, placa))
+
+    def consenso(self):
+        """Retornar (placa, score) onde score é a fração média do peso obtida pelo vencedor"""
+        if not self.leituras:
+            return "", 0.0
+
+        caracteres = []
+        fracoes = []
+        for votos_posicao in self.votos:
+            vencedor, peso = max(votos_posicao.items(), key=lambda item: item[1])
+            caracteres.append(vencedor)
+            fracoes.append(peso / sum(votos_posicao.values()))
+
+        return ''.join(caracteres), sum(fracoes) / len(fracoes)
+
+    def concordantes(self, placa):
+        return [variante for variante, leitura in self.leituras if leitura == placa]
+
+
+
+def _unir_retangulos(retangulos):
+    """Unir retângulos que se sobrepõem até não haver mais sobreposição"""
+    retangulos = list(retangulos)
+    unidos = True
+    while unidos:
+        unidos = False
+        resultado = []
+        while retangulos:
+            x1, y1, x2, y2 = retangulos.pop()
+            i = 0
+            while i < len(retangulos):
+                ox1, oy1, ox2, oy2 = retangulos[i]
+                if x1 <= ox2 and ox1 <= x2 and y1 <= oy2 and oy1 <= y2:
+                    x1, y1, x2, y2 = min(x1, ox1), min(y1, oy1), max(x2, ox2), max(y2, oy2)
+                    retangulos.pop(i)
+                    unidos = True
+                else:
+                    i += 1
+            resultado.append((x1, y1, x2, y2))
+        retangulos = resultado
+    return retangulos
+
+
+class FiltroMovimento:
+    """Detector de movimento para câmeras fixas: modelo de fundo em imagem reduzida"""
+
+    def __init__(self, escala=0.25, limiar=25, area_min=0.002, aprendizado=0.05, margem=0.15):
+        self.escala = escala
+        self.limiar = limiar
+        self.area_min = area_min
+        self.aprendizado = aprendizado
+        self.margem = margem
+        self.fundo = None
+        self.lock = threading.Lock()
+        self.stats = {
+            'quadros': 0,
+            'ignorados': 0,
+            'pixels_total': 0,
+            'pixels_analisados': 0
+        }
+
+    def avaliar(self, imagem):
+        """Retornar as regiões com movimento em coordenadas do quadro ([] = nada mudou)"""
+        h, w = imagem.shape[:2]
+        pequena = cv2.resize(_para_cinza(imagem), None, fx=self.escala, fy=self.escala,
+                             interpolation=cv2.INTER_AREA)
+        pequena = cv2.GaussianBlur(pequena, (5, 5), 0)
+
+        # Quadros da mesma câmera podem chegar de várias threads (fila da GUI, lote, workers)
+        with self.lock:
+            return self._avaliar(pequena, h, w)
+
+    def _avaliar(self, pequena, h, w):
+        self.stats['quadros'] += 1
+        self.stats['pixels_total'] += h * w
+
+        if self.fundo is None or self.fundo.shape != pequena.shape:
+            self.fundo = pequena.astype(np.float32)
+            self.stats['pixels_analisados'] += h * w
+            return [(0, 0, w, h)]
+
+        diferenca = cv2.absdiff(pequena, cv2.convertScaleAbs(self.fundo))
+        cv2.accumulateWeighted(pequena, self.fundo, self.aprendizado)
+
+        _, movimento = cv2.threshold(diferenca, self.limiar, 255, cv2.THRESH_BINARY)
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+        movimento = cv2.dilate(movimento, kernel, iterations=2)
+
+        contornos, _ = cv2.findContours(movimento, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        area_min = self.area_min * movimento.size
+
+        regioes = []
+        for contorno in contornos:
+            if cv2.contourArea(contorno) < area_min:
+                continue
+            x, y, cw, ch = cv2.boundingRect(contorno)
+            mx, my = int(cw * self.margem), int(ch * self.margem)
+            regioes.append((
+                max(0, int((x - mx) / self.escala)),
+                max(0, int((y - my) / self.escala)),
+                min(w, int((x + cw + mx) / self.escala)),
+                min(h, int((y + ch + my) / self.escala))
+            ))
+
+        regioes = _unir_retangulos(regioes)
+
+        if not regioes:
+            self.stats['ignorados'] += 1
+        self.stats['pixels_analisados'] += sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regioes)
+
+        return regioes
+
+    def estatisticas(self):
+        with self.lock:
+            stats = dict(self.stats)
+        quadros = max(stats['quadros'], 1)
+        pixels_total = max(stats['pixels_total'], 1)
+        return dict(stats,
+                    taxa_ignorados=stats['ignorados'] / quadros,
+                    fracao_pixels_analisados=stats['pixels_analisados'] / pixels_total)
+
+
+
+class ContextoQuadro:
+    """Buffers de trabalho reutilizados entre quadros do mesmo tamanho, com teto de memória"""
+
+    def __init__(self, limite_mb=None, max_buffers=64):
+        self.limite_bytes = int(limite_mb * 1024 * 1024) if limite_mb else None
+        self.max_buffers = max_buffers
+        self.buffers = {}
+        self.stats = {'alocacoes': 0, 'reutilizacoes': 0, 'temporarios': 0}
+
+    def bytes_em_uso(self):
+        return sum(buffer.nbytes for buffer in self.buffers.values())
+
+    def buffer(self, nome, shape, dtype=np.uint8):
+        """Buffer nomeado para o formato pedido (reutilizado se já existir)"""
+        chave = (nome, tuple(shape), np.dtype(dtype).str)
+        buffer = self.buffers.pop(chave, None)
+        if buffer is not None:
+            self.buffers[chave] = buffer
+            self.stats['reutilizacoes'] += 1
+            return buffer
+
+        buffer = np.empty(shape, dtype=dtype)
+
+        while len(self.buffers) >= self.max_buffers:
+            self.buffers.pop(next(iter(self.buffers)))
+
+        if self.limite_bytes is not None:
+            # Descartar os buffers usados há mais tempo até caber no teto
+            while self.buffers and self.bytes_em_uso() + buffer.nbytes > self.limite_bytes:
+                self.buffers.pop(next(iter(self.buffers)))
+            if buffer.nbytes > self.limite_bytes:
+                self.stats['temporarios'] += 1
+                return buffer
+
+        self.buffers[chave] = buffer
+        self.stats['alocacoes'] += 1
+        return buffer
+
+    def estatisticas(self):
+        return dict(self.stats, buffers=len(self.buffers), bytes_em_uso=self.bytes_em_uso())
+
+
+# Etapas exibidas no painel: título -> imagem derivada do CacheImagensPlaca
+ETAPAS_VISUAIS = [
+    ("1. Placa Recortada", 'original'),
+    ("2. Escala Cinza", 'cinza'),
+    ("3. Ampliada 5x", 'cinza_5x'),
+    ("4. CLAHE (Contraste)", 'clahe4_5x'),
+    ("5. Sharpening", 'nitida_5x'),
+    ("6. Binarizada", 'otsu_clahe4_5x'),
+    ("7. Morfologia Final", 'morph_clahe4_5x'),
+]
+
+
 class SistemaReconhecimentoPlacasMelhorado:
     """Sistema de detecção agressiva de placas veiculares"""
 
-    def __init__(self):
+    def __init__(self, config=None):
+        """config: chaves que sobrescrevem os padrões antes da inicialização (vencem config_arquivo)"""
         print("🚀 Inicializando Sistema AGRESSIVO V2.0...")
 
-        self.easyocr_reader = None
-        if EASYOCR_AVAILABLE:
-            try:
-                self.easyocr_reader = easyocr.Reader(['pt', 'en'], gpu=False, verbose=False)
-                print("✅ EasyOCR configurado")
-            except:
-                self.easyocr_reader = None
+        self._contextos = threading.local()
 
         # Configurações otimizadas para detecção agressiva
         self.config = {
             'gaussian_kernel': (3, 3),
-            'bilateral_d': 9,
+            'bilateral_d': 11,
             'bilateral_sigma_color': 75,
             'bilateral_sigma_space': 75,
+            'clahe_clip': 3.0,
+            'clahe_grade': (8, 8),
+            'adaptativa_bloco': 15,
+            'adaptativa_c': 3,
             'canny_low': 20,
             'canny_high': 120,
             'morph_kernel_size': (3, 3),
             'morph_rect_kernel': (5, 2),
+            'morph_close_iteracoes': 2,
+            'dilatacao_contornos_kernel': (3, 3),
+            'dilatacao_bordas_kernel': (5, 5),
+            'dilatacao_bordas_iteracoes': 3,
+            'score_aspect_min': 2.0,
+            'score_aspect_max': 6.0,
+            'score_area_min': 1000,
+            'score_area_max': 60000,
+            'candidatos_iou_max': 0.3,
+            'candidato_largura_max_pct': 80,
+            'candidato_altura_max_pct': 60,
+            'candidato_area_max_pct': 20,
+            'candidatos_preliminar_max': 10,
+            'candidato_margem': 5,
+            'placas_max': 5,
+            'config_arquivo': None,
             'placa_aspect_ratio_min': 1.8,
             'placa_aspect_ratio_max': 7.0,
             'placa_area_min': 800,
@@ -59,47 +655,428 @@ class SistemaReconhecimentoPlacasMelhorado:
             'densidade_texto_min': 0.1,
             'densidade_texto_max': 0.9,
             'picos_minimos': 2,
+            'retificacao_ativa': True,
+            'retificacao_largura': 320,
+            'retificacao_altura': 104,
+            'retificacao_area_min': 0.3,
+            'agendador_ativo': False,
+            'agendador_arquivo': None,
+            'agendador_min_amostras': 30,
+            'agendador_taxa_minima': 0.02,
+            'agendador_explorar_a_cada': 20,
+            'consenso_limiar': 0.75,
+            'consenso_min_votos': 2,
+            'zonas_arquivo': None,
+            'movimento_ativo': False,
+            'movimento_escala': 0.25,
+            'movimento_limiar': 25,
+            'movimento_area_min': 0.002,
+            'movimento_aprendizado': 0.05,
+            'movimento_margem': 0.15,
+            'manter_recortes': False,
+            'reutilizar_buffers': True,
+            'memoria_limite_mb': None,
+            'memoria_bytes_por_pixel': 17,
+            'memoria_perfil': False,
+            'lista_monitorada_arquivo': None,
+            'lista_monitorada_distancia': 1.0,
+            'detector_caracteres_ativo': True,
+            'detector_caracteres_exclusivo': False,
+            'mser_delta': 2,
+            'mser_variacao_max': 0.5,
+            'mser_area_min': 30,
+            'mser_area_max': 8000,
+            'caractere_altura_min': 8,
+            'caracteres_min': 6,
+            'caracteres_max': 8,
+            'perfil_padrao': 'agressivo',
+            'detectores': list(DETECTORES_PLACA),
+            'ocr_preliminar': ['cinza', 'cinza_2x', 'otsu', 'easyocr'],
+            'variantes_ocr': None,
+            'fallback_imagem_inteira': True,
+            'fallback_resolucao_max': 960,
+            'fallback_ladrilho_largura': 0.25,
+            'fallback_ladrilho_aspecto': 3.0,
+            'fallback_sobreposicao': 0.5,
+            'fallback_ladrilhos_max': 3,
+            'fallback_densidade_min': 0.05,
+            'fallback_densidade_max': 0.45,
+            'fallback_recorte_largura_max': 480,
+            'decodificacao_restrita': False,
+            'decodificacao_score_min': 0.6,
+            'decodificacao_calibracao': None,
+            'cpu_workers': None,
+            'cpu_worker_indice': 0,
+            'cpu_workers_em_processo': False,
+            'cpu_nucleos': None,
+            'cpu_afinidade': False,
+            'easyocr_idiomas': ['pt', 'en'],
+            'easyocr_int8': False,
+            'easyocr_allowlist': None,
+            'multiplas_placas': False,
+            'multiplas_placas_max': 20,
+            'multiplas_placas_threads': 4,
+            'multiplas_placas_iou': 0.3,
         }
 
+        if config:
+            self.aplicar_config(config)
+        if self.config['config_arquivo']:
+            self.carregar_config(self.config['config_arquivo'])
+            if config:
+                self.aplicar_config(config)
+
+        self.easyocr_reader = None
+        self.reconhecedores_easyocr = {}
+        if EASYOCR_AVAILABLE:
+            try:
+                self.easyocr_reader = easyocr.Reader(self.config['easyocr_idiomas'], gpu=False, verbose=False)
+                self.reconhecedores_easyocr['fp32'] = self.easyocr_reader.recognizer
+                print("✅ EasyOCR configurado")
+            except:
+                self.easyocr_reader = None
+
+        if self.easyocr_reader is not None and self.config['easyocr_int8']:
+            self.usar_reconhecedor_easyocr('int8')
+
+        self.threads = relatorio_threads()
+        if self.config['cpu_workers']:
+            self.configurar_threads()
+
+        self.agendador = None
+        if self.config['agendador_ativo']:
+            self.agendador = AgendadorVariantesOCR(
+                self.config['agendador_arquivo'],
+                min_amostras=self.config['agendador_min_amostras'],
+                taxa_minima=self.config['agendador_taxa_minima'],
+                explorar_a_cada=self.config['agendador_explorar_a_cada'])
+
+        # Zonas estáticas por câmera: {camera: {'retangulo': [x1, y1, x2, y2]} ou {'poligono': [[x, y], ...]}}
+        self.zonas_camera = {}
+        if self.config['zonas_arquivo']:
+            self.carregar_zonas(self.config['zonas_arquivo'])
+
+        self.filtros_movimento = {}
+        self.lock_movimento = threading.Lock()
+
+        # Perfil de pipeline por câmera (as demais usam config['perfil_padrao'])
+        self.perfis_camera = {}
+
+        self.lista_monitorada = None
+        if self.config['lista_monitorada_arquivo']:
+            # O índice precisa cobrir a distância inteira pedida, senão buscar recusa k
+            self.lista_monitorada = IndicePlacas(
+                max_distancia=int(math.ceil(self.config['lista_monitorada_distancia'])))
+            total = self.lista_monitorada.carregar_arquivo(self.config['lista_monitorada_arquivo'])
+            print(f"✅ Lista monitorada: {total} placa(s)")
+
         print("✅ Sistema AGRESSIVO pronto!")
 
-    def filtrar_regiao_interesse(self, imagem):
-        """Utiliza imagem completa sem filtro de região"""
+    def fechar(self):
+        """Liberar o motor: grava as estatísticas pendentes do agendador de variantes"""
+        if self.agendador is not None:
+            self.agendador.fechar()
+
+    @property
+    def config(self):
+        """Configuração efetiva: a base sob o perfil ativo na thread atual (ver usar_perfil)"""
+        ativa = getattr(self._contextos, 'config', None)
+        return ativa if ativa is not None else self._config
+
+    @config.setter
+    def config(self, valor):
+        self._config = valor
+
+    @contextlib.contextmanager
+    def usar_perfil(self, perfil):
+        """
+        Sobrepor um perfil (nome em PERFIS_PIPELINE ou dict de chaves) à configuração, só nesta thread
+        Alterações em self.config dentro do bloco ficam no perfil e são descartadas na saída
+        """
+        ajustes = PERFIS_PIPELINE[perfil] if isinstance(perfil, str) else perfil
+        desconhecidas = set(ajustes) - set(self._config)
+        if desconhecidas:
+            raise KeyError(f"Chaves de configuração desconhecidas no perfil: {sorted(desconhecidas)}")
+
+        anterior = getattr(self._contextos, 'config', None)
+        self._contextos.config = ChainMap({}, dict(ajustes), anterior if anterior is not None else self._config)
+        try:
+            yield self.config
+        finally:
+            self._contextos.config = anterior
+
+    def definir_perfil_camera(self, camera, perfil):
+        """Associar um perfil a uma câmera (None volta ao perfil padrão)"""
+        if perfil is None:
+            self.perfis_camera.pop(camera, None)
+        elif isinstance(perfil, str) and perfil not in PERFIS_PIPELINE:
+            raise KeyError(f"Perfil desconhecido: {perfil}")
+        else:
+            self.perfis_camera[camera] = perfil
+
+    def _perfil_da_chamada(self, perfil, camera):
+        if perfil is not None:
+            return perfil
+        return self.perfis_camera.get(camera, self.config['perfil_padrao'])
+
+    def configurar_threads(self, workers=None, indice=None, em_processo=None, afinidade=None):
+        """
+        Dividir o orçamento de núcleos (config cpu_*) entre os workers e aplicar a OpenCV e Torch
+        Roda no __init__ quando cpu_workers vem em config=...; depois da criação, chame diretamente
+        cpu_nucleos: lista de CPUs ou quantidade (as primeiras permitidas); None = todas
+        Retorna (e guarda em self.threads) a configuração efetiva
+        """
+        workers = workers or self.config['cpu_workers'] or 1
+        indice = self.config['cpu_worker_indice'] if indice is None else indice
+        em_processo = self.config['cpu_workers_em_processo'] if em_processo is None else em_processo
+        afinidade = self.config['cpu_afinidade'] if afinidade is None else afinidade
+
+        cpus = self.config['cpu_nucleos']
+        if isinstance(cpus, int):
+            cpus = nucleos_disponiveis()[:cpus]
+
+        plano = plano_threads(workers, indice, cpus, em_processo)
+        self.threads = aplicar_plano(plano, afinidade)
+
+        print(f"🧵 Threads: OpenCV {self.threads['opencv_threads']} | Torch {self.threads['torch_threads'] or '-'} | "
+              f"worker {plano['indice'] if plano['indice'] is not None else 'todos'}/{workers} | "
+              f"CPUs {plano['cpus']}{' (afinidade)' if afinidade and not em_processo else ''}")
+        return self.threads
+
+    def usar_reconhecedor_easyocr(self, precisao):
+        """
+        Trocar o reconhecedor do EasyOCR entre 'fp32' e 'int8' (quantização dinâmica, criada uma vez)
+        Em int8 o allowlist passa a ser só os caracteres de placa, salvo easyocr_allowlist explícito
+        """
+        if self.easyocr_reader is None:
+            raise RuntimeError("EasyOCR não disponível")
+
+        if precisao not in self.reconhecedores_easyocr:
+            from easyocr_quantizado import quantizar_reconhecedor
+            inicio = time.perf_counter()
+            self.reconhecedores_easyocr[precisao] = quantizar_reconhecedor(self.reconhecedores_easyocr['fp32'])
+            print(f"✅ Reconhecedor EasyOCR quantizado (int8) em {time.perf_counter() - inicio:.1f}s")
+
+        self.easyocr_reader.recognizer = self.reconhecedores_easyocr[precisao]
+        self.config['easyocr_int8'] = precisao == 'int8'
+
+    def _ler_easyocr(self, imagem, **kwargs):
+        """readtext do EasyOCR com o allowlist configurado (placa em int8)"""
+        allowlist = self.config['easyocr_allowlist']
+        if allowlist is None and self.config['easyocr_int8']:
+            allowlist = WHITELIST_PLACA
+        if allowlist is not None:
+            kwargs['allowlist'] = allowlist
+        return self.easyocr_reader.readtext(imagem, **kwargs)
+
+    def contexto_quadro(self):
+        """Contexto de buffers da thread atual (None se a reutilização estiver desligada)"""
+        if not self.config['reutilizar_buffers']:
+            return None
+        contexto = getattr(self._contextos, 'contexto', None)
+        if contexto is None:
+            contexto = self._contextos.contexto = ContextoQuadro(self.config['memoria_limite_mb'])
+        return contexto
+
+    @contextlib.contextmanager
+    def _medir_memoria(self):
+        """Com config['memoria_perfil'], medir as etapas deste quadro (ver _etapa_memoria)"""
+        if not self.config['memoria_perfil']:
+            yield None
+            return
+        anterior = getattr(self._contextos, 'medidor', None)
+        medidor = self._contextos.medidor = MedidorMemoria()
+        try:
+            yield medidor
+        finally:
+            self._contextos.medidor = anterior
+            medidor.fechar()
+
+    def _etapa_memoria(self, etapa):
+        """Bloco medido como uma etapa (sem custo quando o perfil de memória está desligado)"""
+        medidor = getattr(self._contextos, 'medidor', None)
+        return medidor.etapa(etapa) if medidor is not None else contextlib.nullcontext()
+
+    def _reducao_por_memoria(self, imagem):
+        """Fator de redução para que o pré-processamento do quadro caiba no teto de memória"""
+        limite_mb = self.config['memoria_limite_mb']
+        if not limite_mb:
+            return 1
+
         h, w = imagem.shape[:2]
-        mask = np.ones((h, w), dtype=np.uint8) * 255
-        return imagem.copy(), mask
+        estimativa = h * w * self.config['memoria_bytes_por_pixel']
+        limite = limite_mb * 1024 * 1024
+        if estimativa <= limite:
+            return 1
+        return int(np.ceil(np.sqrt(estimativa / float(limite))))
+
+    def _filtro_movimento(self, camera):
+        """Filtro de movimento da câmera (criado sob demanda)"""
+        with self.lock_movimento:
+            if camera not in self.filtros_movimento:
+                self.filtros_movimento[camera] = FiltroMovimento(
+                    escala=self.config['movimento_escala'],
+                    limiar=self.config['movimento_limiar'],
+                    area_min=self.config['movimento_area_min'],
+                    aprendizado=self.config['movimento_aprendizado'],
+                    margem=self.config['movimento_margem'])
+            return self.filtros_movimento[camera]
+
+    def estatisticas_movimento(self):
+        """Quadros ignorados e fração de pixels analisados por câmera"""
+        with self.lock_movimento:
+            filtros = dict(self.filtros_movimento)
+        return {camera: filtro.estatisticas() for camera, filtro in filtros.items()}
+
+    def aplicar_config(self, ajustes):
+        """
+        Sobrescrever chaves de self.config e devolver os valores anteriores
+        Listas vindas de JSON voltam a ser tuplas quando o valor original era tupla (kernels)
+        """
+        anteriores = {}
+        for chave, valor in ajustes.items():
+            if chave not in self.config:
+                raise KeyError(f"Chave de configuração desconhecida: {chave}")
+            anteriores[chave] = self.config[chave]
+            if isinstance(anteriores[chave], tuple) and isinstance(valor, list):
+                valor = tuple(valor)
+            self.config[chave] = valor
+        return anteriores
+
+    def carregar_config(self, caminho):
+        """Aplicar um perfil de configuração exportado (JSON com {'config': {...}} ou o dict direto)"""
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+        ajustes = dados.get('config', dados)
+        self.aplicar_config(ajustes)
+        print(f"✅ Configuração carregada: {len(ajustes)} parâmetro(s) de {caminho}")
+        return ajustes
+
+    def carregar_zonas(self, caminho):
+        """Carregar zonas de interesse por câmera de um arquivo JSON"""
+        with open(caminho, 'r', encoding='utf-8') as f:
+            zonas = json.load(f)
+
+        for camera, zona in zonas.items():
+            if 'retangulo' not in zona and 'poligono' not in zona:
+                raise ValueError(f"Zona da câmera '{camera}' precisa de 'retangulo' ou 'poligono'")
+
+        self.zonas_camera.update(zonas)
+        print(f"✅ {len(zonas)} zona(s) de câmera carregada(s)")
+
+    def _zona_em_pixels(self, zona, largura, altura, escala=1.0):
+        """Converter a zona (absoluta ou relativa 0-1) para bbox e polígono em pixels"""
+        if 'poligono' in zona:
+            pontos = np.array(zona['poligono'], dtype=np.float64)
+        else:
+            x1, y1, x2, y2 = zona['retangulo']
+            pontos = np.array([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], dtype=np.float64)
+
+        if pontos.max() <= 1.0:
+            pontos = pontos * [largura, altura]
+        else:
+            pontos = pontos / escala
+
+        pontos = np.round(pontos).astype(np.int32)
+        pontos[:, 0] = np.clip(pontos[:, 0], 0, largura)
+        pontos[:, 1] = np.clip(pontos[:, 1], 0, altura)
+
+        x1, y1 = pontos.min(axis=0)
+        x2, y2 = pontos.max(axis=0)
+        poligono = pontos if 'poligono' in zona else None
 
-    def preprocessar_para_placas(self, imagem):
-        """Aplicar múltiplos filtros de pré-processamento"""
-        resultados = {'original': imagem.copy()}
+        return (int(x1), int(y1), int(x2), int(y2)), poligono
 
-        suavizada = cv2.bilateralFilter(imagem, 11, 75, 75)
+    def filtrar_regiao_interesse(self, imagem, camera=None, escala=1.0):
+        """Recortar a zona configurada da câmera; retorna (roi, máscara do polígono ou None, deslocamento)"""
+        zona = self.zonas_camera.get(camera) if camera is not None else None
+        if zona is None:
+            return imagem, None, (0, 0)
+
+        h, w = imagem.shape[:2]
+        (x1, y1, x2, y2), poligono = self._zona_em_pixels(zona, w, h, escala)
+        if x2 <= x1 or y2 <= y1:
+            return imagem, None, (0, 0)
+
+        roi = imagem[y1:y2, x1:x2]
+
+        mask = None
+        if poligono is not None:
+            mask = np.zeros(roi.shape[:2], dtype=np.uint8)
+            cv2.fillPoly(mask, [poligono - [x1, y1]], 255)
+
+        return roi, mask, (x1, y1)
+
+    def _ajustar_candidatos_zona(self, candidatos, mask, deslocamento):
+        """Descartar candidatos fora do polígono e voltar as bboxes para coordenadas do quadro"""
+        dx, dy = deslocamento
+        ajustados = []
+
+        for candidato in candidatos:
+            x1, y1, x2, y2 = candidato['bbox']
+            if mask is not None and mask[(y1 + y2) // 2, (x1 + x2) // 2] == 0:
+                continue
+            candidato['bbox'] = (x1 + dx, y1 + dy, x2 + dx, y2 + dy)
+            ajustados.append(candidato)
+
+        return ajustados
+
+    def preprocessar_para_placas(self, imagem, contexto=None, mapas=None):
+        """
+        Aplicar múltiplos filtros de pré-processamento
+        Com contexto (ContextoQuadro) os mapas são gravados em buffers reutilizados: só valem até o próximo quadro
+        mapas: nomes dos mapas necessários (None = todos); os demais não são calculados
+        """
+        def precisa(*nomes):
+            return mapas is None or any(nome in mapas for nome in nomes)
+
+        def buf(nome, shape):
+            return contexto.buffer(nome, shape) if contexto is not None else None
+
+        h, w = imagem.shape[:2]
+        resultados = {'original': imagem if contexto is not None else imagem.copy()}
+
+        cfg = self.config
+
+        suavizada = cv2.bilateralFilter(imagem, cfg['bilateral_d'], cfg['bilateral_sigma_color'], cfg['bilateral_sigma_space'],
+                                        dst=buf('suavizada', imagem.shape))
         resultados['suavizada'] = suavizada
 
-        gray = cv2.cvtColor(suavizada, cv2.COLOR_BGR2GRAY)
+        gray = cv2.cvtColor(suavizada, cv2.COLOR_BGR2GRAY, dst=buf('gray', (h, w)))
 
-        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-        gray_clahe = clahe.apply(gray)
+        clahe = cv2.createCLAHE(clipLimit=cfg['clahe_clip'], tileGridSize=tuple(cfg['clahe_grade']))
+        gray_clahe = clahe.apply(gray, dst=buf('gray_clahe', (h, w)))
 
-        _, bin_otsu = cv2.threshold(gray_clahe, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        resultados['bin_otsu'] = bin_otsu
+        if precisa('bin_otsu'):
+            _, bin_otsu = cv2.threshold(gray_clahe, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=buf('bin_otsu', (h, w)))
+            resultados['bin_otsu'] = bin_otsu
 
-        bin_adaptiva = cv2.adaptiveThreshold(gray_clahe, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 15, 3)
-        resultados['bin_adaptiva'] = bin_adaptiva
+        if precisa('bin_adaptiva', 'morph_close_horizontal', 'morph_opening'):
+            bin_adaptiva = cv2.adaptiveThreshold(gray_clahe, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                                                 cfg['adaptativa_bloco'], cfg['adaptativa_c'],
+                                                 dst=buf('bin_adaptiva', (h, w)))
+            resultados['bin_adaptiva'] = bin_adaptiva
 
-        bin_adaptiva_inv = cv2.adaptiveThreshold(gray_clahe, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 15, 3)
-        resultados['bin_adaptiva_inv'] = bin_adaptiva_inv
+        if precisa('bin_adaptiva_inv'):
+            bin_adaptiva_inv = cv2.adaptiveThreshold(gray_clahe, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV,
+                                                     cfg['adaptativa_bloco'], cfg['adaptativa_c'],
+                                                     dst=buf('bin_adaptiva_inv', (h, w)))
+            resultados['bin_adaptiva_inv'] = bin_adaptiva_inv
 
-        bordas_canny = cv2.Canny(gray_clahe, 20, 120)
-        resultados['bordas_canny'] = bordas_canny
+        if precisa('bordas_canny'):
+            bordas_canny = cv2.Canny(gray_clahe, cfg['canny_low'], cfg['canny_high'], edges=buf('bordas_canny', (h, w)))
+            resultados['bordas_canny'] = bordas_canny
 
-        kernel_horizontal = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 2))
-        morph_close = cv2.morphologyEx(bin_adaptiva, cv2.MORPH_CLOSE, kernel_horizontal, iterations=2)
-        resultados['morph_close_horizontal'] = morph_close
+        if precisa('morph_close_horizontal', 'morph_opening'):
+            kernel_horizontal = cv2.getStructuringElement(cv2.MORPH_RECT, tuple(cfg['morph_rect_kernel']))
+            morph_close = cv2.morphologyEx(bin_adaptiva, cv2.MORPH_CLOSE, kernel_horizontal, iterations=cfg['morph_close_iteracoes'],
+                                           dst=buf('morph_close_horizontal', (h, w)))
+            resultados['morph_close_horizontal'] = morph_close
 
-        kernel_small = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-        morph_opening = cv2.morphologyEx(morph_close, cv2.MORPH_OPEN, kernel_small)
-        resultados['morph_opening'] = morph_opening
+        if precisa('morph_opening'):
+            kernel_small = cv2.getStructuringElement(cv2.MORPH_RECT, tuple(cfg['morph_kernel_size']))
+            morph_opening = cv2.morphologyEx(morph_close, cv2.MORPH_OPEN, kernel_small, dst=buf('morph_opening', (h, w)))
+            resultados['morph_opening'] = morph_opening
 
         return resultados
 
@@ -114,23 +1091,96 @@ class SistemaReconhecimentoPlacasMelhorado:
 
         return True
 
+    # Menor ladrilho (largura, altura) na cópia reduzida; imagens menores não têm onde procurar
+    LADRILHO_MINIMO = (8, 4)
+
+    def _candidatos_ladrilhos(self, imagem, deslocamento=(0, 0)):
+        """
+        Fallback quando nenhum detector encontrou candidato: janelas sobrepostas no formato de placa,
+        varridas numa cópia reduzida (fallback_resolucao_max) e ordenadas por densidade de bordas
+        verticais (traços de caracteres) menos a de horizontais; só as melhores vão para o OCR
+        """
+        cfg = self.config
+        h, w = imagem.shape[:2]
+        escala = min(1.0, cfg['fallback_resolucao_max'] / float(max(h, w)))
+        reduzida = cv2.resize(imagem, (max(1, int(w * escala)), max(1, int(h * escala))),
+                              interpolation=cv2.INTER_AREA) if escala < 1.0 else imagem
+        cinza = _para_cinza(reduzida)
+        rh, rw = cinza.shape[:2]
+        if rw < self.LADRILHO_MINIMO[0] or rh < self.LADRILHO_MINIMO[1]:
+            return []
+
+        gx = cv2.convertScaleAbs(cv2.Sobel(cinza, cv2.CV_16S, 1, 0, ksize=3))
+        gy = cv2.convertScaleAbs(cv2.Sobel(cinza, cv2.CV_16S, 0, 1, ksize=3))
+        limiar, bordas_v = cv2.threshold(gx, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        _, bordas_h = cv2.threshold(gy, limiar, 1, cv2.THRESH_BINARY)
+        integral_v = cv2.integral(bordas_v)
+        integral_h = cv2.integral(bordas_h)
+
+        lw = min(rw, max(self.LADRILHO_MINIMO[0], int(rw * cfg['fallback_ladrilho_largura'])))
+        lh = min(rh, max(self.LADRILHO_MINIMO[1], int(lw / cfg['fallback_ladrilho_aspecto'])))
+        passo_x = max(1, int(lw * (1 - cfg['fallback_sobreposicao'])))
+        passo_y = max(1, int(lh * (1 - cfg['fallback_sobreposicao'])))
+        xs = list(range(0, max(1, rw - lw + 1), passo_x))
+        ys = list(range(0, max(1, rh - lh + 1), passo_y))
+        if xs[-1] + lw < rw:
+            xs.append(rw - lw)
+        if ys[-1] + lh < rh:
+            ys.append(rh - lh)
+
+        def soma(integral, x, y):
+            return float(integral[y + lh, x + lw] - integral[y, x + lw] - integral[y + lh, x] + integral[y, x])
+
+        area = float(lw * lh)
+        ladrilhos = []
+        for y in ys:
+            for x in xs:
+                densidade_v = soma(integral_v, x, y) / area
+                if not cfg['fallback_densidade_min'] <= densidade_v <= cfg['fallback_densidade_max']:
+                    continue
+                ladrilhos.append((densidade_v - 0.5 * soma(integral_h, x, y) / area, (x, y, x + lw, y + lh)))
+
+        ladrilhos.sort(key=lambda item: -item[0])
+        escolhidos = []
+        for score, bbox in ladrilhos:
+            if len(escolhidos) >= cfg['fallback_ladrilhos_max']:
+                break
+            if score <= 0 or any(self._iou(bbox, outro) > 0.1 for _, outro in escolhidos):
+                continue
+            escolhidos.append((score, bbox))
+
+        dx, dy = deslocamento
+        candidatos = []
+        for score, (x1, y1, x2, y2) in escolhidos:
+            x1, y1 = int(x1 / escala) + dx, int(y1 / escala) + dy
+            x2, y2 = min(w, int(x2 / escala)) + dx, min(h, int(y2 / escala)) + dy
+            candidatos.append({
+                'bbox': (x1, y1, x2, y2),
+                'area': (x2 - x1) * (y2 - y1),
+                'aspect_ratio': (x2 - x1) / float(max(1, y2 - y1)),
+                'score': float(min(0.5, score)),
+                'metodo': 'Fallback-Ladrilho'
+            })
+        return candidatos
+
     def _calcular_score_placa(self, roi, area, aspect_ratio):
         score = 0.5
 
-        if 2.0 <= aspect_ratio <= 6.0:
+        if self.config['score_aspect_min'] <= aspect_ratio <= self.config['score_aspect_max']:
             score += 0.3
 
-        if 1000 <= area <= 60000:
+        if self.config['score_area_min'] <= area <= self.config['score_area_max']:
             score += 0.2
 
         return min(score, 1.0)
 
-    def _detectar_por_contornos(self, imagem_binaria, imagem_original):
+    def _detectar_por_contornos(self, imagem_binaria, imagem_original, contexto=None):
         """Detectar candidatos usando contornos"""
         candidatos = []
         
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-        img_dilatada = cv2.dilate(imagem_binaria, kernel, iterations=1)
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, tuple(self.config['dilatacao_contornos_kernel']))
+        dst = contexto.buffer('dilatada', imagem_binaria.shape) if contexto is not None else None
+        img_dilatada = cv2.dilate(imagem_binaria, kernel, dst=dst, iterations=1)
         
         contornos, _ = cv2.findContours(img_dilatada, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
@@ -163,11 +1213,12 @@ class SistemaReconhecimentoPlacasMelhorado:
 
         return candidatos
 
-    def _detectar_por_componentes(self, imagem_binaria, imagem_original):
+    def _detectar_por_componentes(self, imagem_binaria, imagem_original, contexto=None):
         """Detectar candidatos usando componentes conectados"""
         candidatos = []
 
-        num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(imagem_binaria, connectivity=8)
+        dst = contexto.buffer('labels', imagem_binaria.shape, np.int32) if contexto is not None else None
+        num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(imagem_binaria, labels=dst, connectivity=8)
 
         for i in range(1, num_labels):
             x, y, w, h, area = stats[i]
@@ -184,8 +1235,7 @@ class SistemaReconhecimentoPlacasMelhorado:
             if aspect_ratio < self.config['placa_aspect_ratio_min'] or aspect_ratio > self.config['placa_aspect_ratio_max']:
                 continue
 
-            component_mask = (labels == i).astype(np.uint8) * 255
-            roi = component_mask[y:y+h, x:x+w]
+            roi = (labels[y:y+h, x:x+w] == i).astype(np.uint8) * 255
 
             candidatos.append({
                 'bbox': (x, y, x+w, y+h),
@@ -197,12 +1247,13 @@ class SistemaReconhecimentoPlacasMelhorado:
 
         return candidatos
 
-    def _detectar_por_bordas(self, imagem_bordas, imagem_original):
+    def _detectar_por_bordas(self, imagem_bordas, imagem_original, contexto=None):
         """Detectar candidatos usando bordas Canny"""
         candidatos = []
         
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
-        bordas_dilatadas = cv2.dilate(imagem_bordas, kernel, iterations=3)
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, tuple(self.config['dilatacao_bordas_kernel']))
+        dst = contexto.buffer('dilatada', imagem_bordas.shape) if contexto is not None else None
+        bordas_dilatadas = cv2.dilate(imagem_bordas, kernel, dst=dst, iterations=self.config['dilatacao_bordas_iteracoes'])
         
         contornos, _ = cv2.findContours(bordas_dilatadas, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
@@ -233,6 +1284,137 @@ class SistemaReconhecimentoPlacasMelhorado:
 
         return candidatos
 
+    def _detectar_por_caracteres(self, imagem_roi, imagem_binaria_inv=None):
+        """
+        Detectar placas como linhas horizontais de 6-8 caracteres de altura parecida
+        Regiões MSER (ou componentes conectados, se MSER indisponível) agrupadas em linhas de texto
+        """
+        gray = _para_cinza(imagem_roi)
+        h_img = gray.shape[0]
+
+        altura_min = self.config['caractere_altura_min']
+        altura_max = min(self.config['placa_height_max'], h_img)
+
+        caixas = []
+        if hasattr(cv2, 'MSER_create'):
+            mser = cv2.MSER_create()
+            mser.setDelta(self.config['mser_delta'])
+            mser.setMinArea(self.config['mser_area_min'])
+            mser.setMaxArea(self.config['mser_area_max'])
+            mser.setMaxVariation(self.config['mser_variacao_max'])
+            _, bboxes = mser.detectRegions(gray)
+            caixas = [tuple(int(v) for v in b) for b in bboxes]
+        elif imagem_binaria_inv is not None:
+            num_labels, _, stats, _ = cv2.connectedComponentsWithStats(imagem_binaria_inv, connectivity=8)
+            caixas = [tuple(int(v) for v in stats[i][:4]) for i in range(1, num_labels)]
+
+        # Regiões com formato de caractere
+        glifos = []
+        for x, y, w, h in caixas:
+            if h < altura_min or h > altura_max:
+                continue
+            aspect = w / float(h)
+            if aspect < 0.1 or aspect > 1.2:
+                continue
+            glifos.append((x, y, w, h))
+
+        # MSER devolve regiões aninhadas/repetidas: manter uma por caractere
+        glifos.sort(key=lambda g: g[2] * g[3], reverse=True)
+        unicos = []
+        for g in glifos:
+            gx, gy, gw, gh = g
+            contido = False
+            for ux, uy, uw, uh in unicos:
+                ix = max(0, min(gx + gw, ux + uw) - max(gx, ux))
+                iy = max(0, min(gy + gh, uy + uh) - max(gy, uy))
+                if ix * iy > 0.6 * gw * gh:
+                    contido = True
+                    break
+            if not contido:
+                unicos.append(g)
+
+        unicos.sort(key=lambda g: g[0])
+
+        # Encadear glifos vizinhos com altura e linha de base parecidas
+        linhas = []
+        usados = set()
+        for i, inicial in enumerate(unicos):
+            if i in usados:
+                continue
+            linha = [inicial]
+            ultimo = inicial
+            for j in range(i + 1, len(unicos)):
+                if j in usados:
+                    continue
+                x, y, w, h = unicos[j]
+                lx, ly, lw, lh = ultimo
+                if x - (lx + lw) > 1.5 * lh:
+                    break
+                if max(h, lh) / float(min(h, lh)) > 1.4:
+                    continue
+                if abs((y + h / 2.0) - (ly + lh / 2.0)) > 0.5 * lh:
+                    continue
+                if x < lx + lw * 0.5:
+                    continue
+                linha.append(unicos[j])
+                usados.add(j)
+                ultimo = unicos[j]
+            linhas.append(linha)
+
+        candidatos = []
+        for linha in linhas:
+            if len(linha) < self.config['caracteres_min'] or len(linha) > self.config['caracteres_max']:
+                continue
+
+            alturas = np.array([g[3] for g in linha], dtype=np.float64)
+            altura_media = alturas.mean()
+            x1 = min(g[0] for g in linha)
+            y1 = min(g[1] for g in linha)
+            x2 = max(g[0] + g[2] for g in linha)
+            y2 = max(g[1] + g[3] for g in linha)
+
+            margem_x = int(altura_media * 0.4)
+            margem_y = int(altura_media * 0.3)
+            x1 = max(0, x1 - margem_x)
+            y1 = max(0, y1 - margem_y)
+            x2 = min(gray.shape[1], x2 + margem_x)
+            y2 = min(h_img, y2 + margem_y)
+
+            w, h = x2 - x1, y2 - y1
+            aspect_ratio = w / float(h)
+
+            centros = np.array([g[1] + g[3] / 2.0 for g in linha])
+            uniformidade = max(0.0, 1.0 - alturas.std() / altura_media)
+            alinhamento = max(0.0, 1.0 - centros.std() / altura_media)
+            bonus_sete = 1.0 if len(linha) == 7 else 0.5
+
+            candidatos.append({
+                'bbox': (x1, y1, x2, y2),
+                'area': w * h,
+                'aspect_ratio': aspect_ratio,
+                'score': float(min(0.4 * uniformidade + 0.3 * alinhamento + 0.3 * bonus_sete, 1.0)),
+                'caracteres': len(linha),
+                'metodo': 'Caracteres-MSER'
+            })
+
+        return candidatos
+
+    @staticmethod
+    def _iou(bbox1, bbox2):
+        """Interseção sobre união de duas caixas (x1, y1, x2, y2)"""
+        x1, y1, x2, y2 = bbox1
+        ux1, uy1, ux2, uy2 = bbox2
+
+        inter_x1, inter_y1 = max(x1, ux1), max(y1, uy1)
+        inter_x2, inter_y2 = min(x2, ux2), min(y2, uy2)
+        if inter_x1 >= inter_x2 or inter_y1 >= inter_y2:
+            return 0.0
+
+        inter_area = (inter_x2 - inter_x1) * (inter_y2 - inter_y1)
+        area1 = (x2 - x1) * (y2 - y1)
+        area2 = (ux2 - ux1) * (uy2 - uy1)
+        return inter_area / (area1 + area2 - inter_area + 1e-5)
+
     def _filtrar_placas_candidatas(self, candidatos):
         """Remover duplicatas usando IoU e ordenar por tamanho"""
         if not candidatos:
@@ -241,27 +1423,14 @@ class SistemaReconhecimentoPlacasMelhorado:
         candidatos_unicos = []
 
         for candidato in candidatos:
-            x1, y1, x2, y2 = candidato['bbox']
-
             duplicata = False
             for unico in candidatos_unicos:
-                ux1, uy1, ux2, uy2 = unico['bbox']
-
-                inter_x1, inter_y1 = max(x1, ux1), max(y1, uy1)
-                inter_x2, inter_y2 = min(x2, ux2), min(y2, uy2)
-
-                if inter_x1 < inter_x2 and inter_y1 < inter_y2:
-                    inter_area = (inter_x2 - inter_x1) * (inter_y2 - inter_y1)
-                    area1 = (x2 - x1) * (y2 - y1)
-                    area2 = (ux2 - ux1) * (uy2 - uy1)
-                    iou = inter_area / (area1 + area2 - inter_area + 1e-5)
-
-                    if iou > 0.3:
-                        duplicata = True
-                        if candidato['area'] < unico['area']:
-                            candidatos_unicos.remove(unico)
-                            candidatos_unicos.append(candidato)
-                        break
+                if self._iou(candidato['bbox'], unico['bbox']) > self.config['candidatos_iou_max']:
+                    duplicata = True
+                    if candidato['area'] < unico['area']:
+                        candidatos_unicos.remove(unico)
+                        candidatos_unicos.append(candidato)
+                    break
 
             if not duplicata:
                 candidatos_unicos.append(candidato)
@@ -270,28 +1439,23 @@ class SistemaReconhecimentoPlacasMelhorado:
         
         return candidatos_unicos
 
-    def _ocr_rapido_tesseract(self, imagem):
+    def _ocr_rapido_tesseract(self, imagem, cache=None):
         """OCR rápido para validação preliminar"""
         if not TESSERACT_AVAILABLE:
             return ""
         
+        if cache is None:
+            cache = CacheImagensPlaca(imagem)
+        
         resultados = []
         
         try:
-            if len(imagem.shape) == 3:
-                imagem = cv2.cvtColor(imagem, cv2.COLOR_BGR2GRAY)
-            
-            texto1 = pytesseract.image_to_string(imagem, config='--psm 8 --oem 3')
-            resultados.append(texto1)
-            
-            h, w = imagem.shape
-            img_2x = cv2.resize(imagem, (w*2, h*2), interpolation=cv2.INTER_CUBIC)
-            texto2 = pytesseract.image_to_string(img_2x, config='--psm 8 --oem 3')
-            resultados.append(texto2)
+            for nome in self.config['ocr_preliminar']:
+                if nome in TRANSFORMACOES_PLACA:
+                    resultados.append(pytesseract.image_to_string(cache.obter(nome), config='--psm 8 --oem 3'))
             
-            _, img_thresh = cv2.threshold(imagem, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            texto3 = pytesseract.image_to_string(img_thresh, config='--psm 8 --oem 3')
-            resultados.append(texto3)
+            if not resultados:
+                return ""
             
             texto_final = max(resultados, key=lambda x: len(x.strip()))
             return texto_final.strip().replace(' ', '').replace('\n', '').upper()
@@ -300,10 +1464,10 @@ class SistemaReconhecimentoPlacasMelhorado:
 
     def _ocr_rapido_easyocr(self, imagem):
         """OCR rápido EasyOCR"""
-        if self.easyocr_reader is None:
+        if self.easyocr_reader is None or 'easyocr' not in self.config['ocr_preliminar']:
             return ""
         try:
-            results = self.easyocr_reader.readtext(imagem, detail=0)
+            results = self._ler_easyocr(imagem, detail=0)
             return "".join(results).replace(' ', '').upper()
         except:
             return ""
@@ -350,15 +1514,21 @@ class SistemaReconhecimentoPlacasMelhorado:
             pct_altura = (h_cand / img_h) * 100
             pct_area = (area_cand / img_area) * 100
             
-            if pct_largura > 80 or pct_altura > 60 or pct_area > 20:
+            if (pct_largura > self.config['candidato_largura_max_pct'] or
+                    pct_altura > self.config['candidato_altura_max_pct'] or
+                    pct_area > self.config['candidato_area_max_pct']):
                 continue
             
             candidatos_filtrados.append(candidato)
         
-        for candidato in candidatos_filtrados[:10]:
+        limite = self.config['candidatos_preliminar_max']
+        if self.config['multiplas_placas']:
+            limite = max(limite, self.config['multiplas_placas_max'])
+
+        for candidato in candidatos_filtrados[:limite]:
             x1, y1, x2, y2 = candidato['bbox']
             
-            margin = 5
+            margin = self.config['candidato_margem']
             x1 = max(0, x1 - margin)
             y1 = max(0, y1 - margin)
             x2 = min(imagem_original.shape[1], x2 + margin)
@@ -369,7 +1539,14 @@ class SistemaReconhecimentoPlacasMelhorado:
             if roi.size == 0:
                 continue
 
-            texto_tesseract = self._ocr_rapido_tesseract(roi)
+            # Ladrilhos do fallback podem ser grandes em quadros de vários megapixels: limitar antes do OCR
+            largura_max = self.config['fallback_recorte_largura_max']
+            if candidato['metodo'] == 'Fallback-Ladrilho' and roi.shape[1] > largura_max:
+                escala_roi = largura_max / float(roi.shape[1])
+                roi = cv2.resize(roi, (largura_max, max(1, int(roi.shape[0] * escala_roi))), interpolation=cv2.INTER_AREA)
+
+            cache = CacheImagensPlaca(roi)
+            texto_tesseract = self._ocr_rapido_tesseract(roi, cache)
             texto_easyocr = self._ocr_rapido_easyocr(roi)
 
             score_texto = self._validar_texto_placa(texto_easyocr, texto_tesseract)
@@ -377,255 +1554,260 @@ class SistemaReconhecimentoPlacasMelhorado:
             if score_texto > 0.2 or len(texto_tesseract) >= 5 or len(texto_easyocr) >= 5:
                 candidato['confianca'] = candidato['score'] * 0.5 + score_texto * 0.5
                 candidato['imagem_placa'] = roi
+                candidato['cache_imagens'] = cache
                 candidato['texto_preliminar'] = texto_easyocr or texto_tesseract
                 candidato['bbox'] = (x1, y1, x2, y2)
                 placas_validadas.append(candidato)
 
         return placas_validadas
 
-    def _isolar_letras_placa(self, imagem):
+    def _isolar_letras_placa(self, imagem, cache=None):
         """
         Isolar apenas as letras da placa
         Remove BRASIL, BR, bordas e ruído
         """
-        if len(imagem.shape) == 3:
-            gray = cv2.cvtColor(imagem, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = imagem.copy()
+        if cache is None:
+            cache = CacheImagensPlaca(imagem)
+        return cache.obter('letras_isoladas')
+
+    def _executar_variante_ocr(self, nome, cache):
+        """Executar uma variante de OCR; retorna o texto e a confiança de cada caractere"""
+        with self._etapa_memoria(f'variante:{nome}'):
+            return self._executar_variante(nome, cache)
+
+    def _executar_variante(self, nome, cache):
+        variante = VARIANTES_OCR[nome]
+        imagem = cache.obter(variante['imagem'])
+
+        texto = ""
+        confiancas = []
+
+        if variante['motor'] == 'tesseract':
+            dados = pytesseract.image_to_data(imagem, config=variante['config'],
+                                              output_type=pytesseract.Output.DICT)
+            for palavra, conf in zip(dados['text'], dados['conf']):
+                palavra = str(palavra).strip().replace(' ', '').upper()
+                conf = float(conf)
+                if not palavra or conf < 0:
+                    continue
+                texto += palavra
+                confiancas.extend([conf / 100.0] * len(palavra))
+            return texto, confiancas
+
+        for _, trecho, conf in self._ler_easyocr(imagem, detail=1, paragraph=False):
+            trecho = trecho.replace(' ', '').upper()
+            texto += trecho
+            confiancas.extend([float(conf)] * len(trecho))
+        return texto, confiancas
+
+    def _variantes_disponiveis(self, motor=None):
+        permitidas = self.config['variantes_ocr']
+        variantes = []
+        for nome, variante in VARIANTES_OCR.items():
+            if permitidas is not None and nome not in permitidas:
+                continue
+            if motor is not None and variante['motor'] != motor:
+                continue
+            if variante['motor'] == 'tesseract' and not TESSERACT_AVAILABLE:
+                continue
+            if variante['motor'] == 'easyocr' and self.easyocr_reader is None:
+                continue
+            variantes.append(nome)
+        return variantes
+
+    def _variantes_motor(self, motor=None, condicao=None):
+        """Variantes disponíveis (de um motor ou de todos) na ordem definida pelo agendador"""
+        variantes = self._variantes_disponiveis(motor)
+        if self.agendador is not None and condicao is not None:
+            variantes = self.agendador.ordenar(variantes, condicao)
+        return variantes
+
+    def _ocr_consenso(self, cache, condicao=None, saidas=None, log=None):
+        """Votar caractere a caractere entre as variantes e parar quando houver consenso"""
+        votacao = VotacaoCaracteres()
+        executadas = 0
+
+        for nome in self._variantes_motor(None, condicao):
+            try:
+                texto, confiancas = self._executar_variante_ocr(nome, cache)
+            except:
+                continue
+
+            executadas += 1
+            if saidas is not None:
+                saidas[nome] = texto
+
+            alinhada = self._alinhar_placa(texto, confiancas)
+            if alinhada is None:
+                continue
+            votacao.adicionar(alinhada[0], alinhada[1], nome)
+
+            placa, score = votacao.consenso()
+            if (self._formato_placa(placa)
+                    and len(votacao.concordantes(placa)) >= self.config['consenso_min_votos']
+                    and score >= self.config['consenso_limiar']):
+                votacao.atingido = True
+                if log:
+                    log(f"   ⏹️  Consenso {placa} ({score:.0%}) após {executadas} variante(s)")
+                break
+
+        return votacao
+
+    def _retificar_placa(self, imagem):
+        """Corrigir perspectiva da placa para o tamanho canônico (minAreaRect + homografia)"""
+        if imagem is None or imagem.size == 0:
+            return None
 
+        gray = _para_cinza(imagem)
         h, w = gray.shape
 
-        escala = 5
-        gray_grande = cv2.resize(gray, (w*escala, h*escala), interpolation=cv2.INTER_CUBIC)
+        bordas = cv2.Canny(cv2.GaussianBlur(gray, (3, 3), 0), 50, 150)
+        bordas = cv2.dilate(bordas, cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3)), iterations=1)
+        contornos, _ = cv2.findContours(bordas, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
-        clahe = cv2.createCLAHE(clipLimit=4.0, tileGridSize=(8,8))
-        gray_clahe = clahe.apply(gray_grande)
+        if not contornos:
+            return None
 
-        kernel_sharp = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-        sharpened = cv2.filter2D(gray_clahe, -1, kernel_sharp)
+        contorno = max(contornos, key=cv2.contourArea)
+        if cv2.contourArea(contorno) < h * w * self.config['retificacao_area_min']:
+            return None
 
-        denoised = cv2.fastNlMeansDenoising(sharpened, h=10)
+        perimetro = cv2.arcLength(contorno, True)
+        aproximado = cv2.approxPolyDP(contorno, 0.02 * perimetro, True)
 
-        _, thresh_otsu = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        
-        thresh_adapt = cv2.adaptiveThreshold(denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                            cv2.THRESH_BINARY, 15, 2)
-        
-        thresh = thresh_otsu
+        retangulo = cv2.minAreaRect(contorno)
+        if len(aproximado) == 4 and cv2.isContourConvex(aproximado):
+            quad = _ordenar_cantos(aproximado)
+            metodo = 'Quadrilatero'
+        else:
+            quad = _ordenar_cantos(cv2.boxPoints(retangulo))
+            metodo = 'MinAreaRect'
 
-        center_h = thresh.shape[0] // 2
-        center_region = thresh[center_h-20:center_h+20, :]
-        if np.mean(center_region) > 127:
-            thresh = cv2.bitwise_not(thresh)
+        angulo = ((retangulo[2] + 45) % 90) - 45
 
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-        thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel, iterations=2)
+        largura = self.config['retificacao_largura']
+        altura = self.config['retificacao_altura']
+        destino = np.array([[0, 0], [largura - 1, 0], [largura - 1, altura - 1], [0, altura - 1]], dtype=np.float32)
 
-        num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(thresh, connectivity=8)
-        
-        mask_limpa = np.zeros_like(thresh)
-        
-        altura_min_letra = thresh.shape[0] * 0.35
-        altura_max_letra = thresh.shape[0] * 0.75
-        
-        largura_min_letra = thresh.shape[0] * 0.15
-        largura_max_letra = thresh.shape[0] * 1.2
-        
-        componentes_validos = []
-        
-        for i in range(1, num_labels):
-            x, y, w_comp, h_comp, area = stats[i]
-            
-            margin = int(thresh.shape[0] * 0.05)
-            if x < margin or y < margin:
-                continue
-            if x + w_comp > thresh.shape[1] - margin:
-                continue
-            if y + h_comp > thresh.shape[0] - margin:
-                continue
-            
-            if h_comp < altura_min_letra or h_comp > altura_max_letra:
-                continue
-            
-            if w_comp < largura_min_letra or w_comp > largura_max_letra:
-                continue
-            
-            if area < 50 or area > thresh.shape[0] * thresh.shape[1] * 0.12:
-                continue
-            
-            aspect = w_comp / float(h_comp)
-            if aspect < 0.15 or aspect > 1.5:
-                continue
-            
-            center_y = y + h_comp / 2.0
-            img_center_y = thresh.shape[0] / 2.0
-            distancia_centro = abs(center_y - img_center_y)
-            
-            if distancia_centro > thresh.shape[0] * 0.3:
-                continue
-            
-            componentes_validos.append({
-                'label': i,
-                'x': x,
-                'area': area,
-                'height': h_comp
-            })
-        
-        if componentes_validos:
-            componentes_validos.sort(key=lambda c: c['x'])
-            
-            if len(componentes_validos) > 10:
-                alturas = [c['height'] for c in componentes_validos]
-                altura_mediana = sorted(alturas)[len(alturas)//2]
-                
-                componentes_validos = [
-                    c for c in componentes_validos 
-                    if abs(c['height'] - altura_mediana) < altura_mediana * 0.3
-                ]
-            
-            for comp in componentes_validos:
-                mask_limpa[labels == comp['label']] = 255
+        homografia = cv2.getPerspectiveTransform(quad, destino)
+        retificada = cv2.warpPerspective(imagem, homografia, (largura, altura),
+                                         flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
 
-        if np.sum(mask_limpa) < 100:
-            mask_limpa = thresh
+        return {
+            'imagem': retificada,
+            'quad': quad,
+            'angulo': angulo,
+            'metodo': metodo
+        }
 
-        kernel_final = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-        mask_limpa = cv2.morphologyEx(mask_limpa, cv2.MORPH_OPEN, kernel_final)
-        mask_limpa = cv2.morphologyEx(mask_limpa, cv2.MORPH_CLOSE, kernel_final)
+    def _retificar_candidatos(self, placas):
+        """Etapa de retificação entre a validação preliminar e o OCR completo"""
+        if not self.config['retificacao_ativa']:
+            return placas
 
-        pad = 20
-        mask_limpa = cv2.copyMakeBorder(mask_limpa, pad, pad, pad, pad, cv2.BORDER_CONSTANT, value=0)
+        for placa in placas:
+            imagem_placa = placa.get('imagem_placa')
+            try:
+                retificacao = self._retificar_placa(imagem_placa)
+            except Exception as e:
+                print(f"Erro retificação: {e}")
+                retificacao = None
 
-        return mask_limpa
+            if retificacao is None:
+                continue
 
-    def _ocr_tesseract_completo(self, imagem):
-        """OCR completo com isolamento de letras"""
-        if not TESSERACT_AVAILABLE:
-            return ""
+            placa['retificacao'] = retificacao
+            placa['cache_retificada'] = CacheImagensPlaca(retificacao['imagem'])
 
-        resultados = []
+        return placas
 
-        try:
-            img_letras_isoladas = self._isolar_letras_placa(imagem)
-            
-            configs = [
-                '--psm 8 --oem 3 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',
-                '--psm 7 --oem 3 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',
-                '--psm 13 --oem 3 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',
-            ]
-            
-            for config in configs:
-                try:
-                    texto = pytesseract.image_to_string(img_letras_isoladas, config=config)
-                    texto_limpo = texto.strip().replace(' ', '').replace('\n', '').upper()
-                    if len(texto_limpo) >= 5:
-                        resultados.append(texto_limpo)
-                except:
-                    pass
-        except:
-            pass
+    def _formato_placa(self, texto):
+        """Identificar o formato da placa: 'mercosul', 'antiga' ou None"""
+        import re
 
-        try:
-            if len(imagem.shape) == 3:
-                gray = cv2.cvtColor(imagem, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = imagem.copy()
-            
-            h, w = gray.shape
-            gray_3x = cv2.resize(gray, (w*3, h*3), interpolation=cv2.INTER_CUBIC)
-            
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-            gray_clahe = clahe.apply(gray_3x)
-            
-            _, thresh = cv2.threshold(gray_clahe, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            
-            texto = pytesseract.image_to_string(thresh, config='--psm 8 --oem 3')
-            texto_limpo = texto.strip().replace(' ', '').replace('\n', '').upper()
-            if len(texto_limpo) >= 5:
-                resultados.append(texto_limpo)
-        except:
-            pass
+        texto_limpo = (texto or '').replace('-', '')
+        if re.match(PADRAO_MERCOSUL, texto_limpo):
+            return 'mercosul'
+        if re.match(PADRAO_ANTIGA, texto_limpo):
+            return 'antiga'
+        return None
 
-        try:
-            if len(imagem.shape) == 3:
-                gray = cv2.cvtColor(imagem, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = imagem.copy()
-            
-            _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-            
-            h, w = thresh.shape
-            thresh_grande = cv2.resize(thresh, (w*3, h*3), interpolation=cv2.INTER_CUBIC)
-            
-            texto = pytesseract.image_to_string(thresh_grande, config='--psm 8 --oem 3')
-            texto_limpo = texto.strip().replace(' ', '').replace('\n', '').upper()
-            if len(texto_limpo) >= 5:
-                resultados.append(texto_limpo)
-        except:
-            pass
+    def _ocr_passe_unico(self, cache):
+        """Um único passe de OCR sobre a placa retificada; retorna (bruto, final, motor)"""
+        if self.easyocr_reader is not None:
+            try:
+                results = self._ler_easyocr(cache.obter('bgr'), detail=0, paragraph=False)
+                texto = "".join(results).replace(' ', '').upper()
+                final = self._pos_processar_texto(texto)
+                if self._formato_placa(final):
+                    return texto, final, 'easyocr'
+            except:
+                pass
 
-        if resultados:
-            return max(resultados, key=len)
-        
-        return ""
+        if TESSERACT_AVAILABLE:
+            try:
+                texto = pytesseract.image_to_string(
+                    cache.obter('otsu'),
+                    config='--psm 7 --oem 3 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
+                texto = texto.strip().replace(' ', '').replace('\n', '').upper()
+                final = self._pos_processar_texto(texto)
+                if self._formato_placa(final):
+                    return texto, final, 'tesseract'
+            except:
+                pass
 
-    def _ocr_easyocr_completo(self, imagem):
-        """OCR EasyOCR completo com isolamento"""
-        if self.easyocr_reader is None:
-            return ""
+        return None
 
-        resultados = []
+    def _probabilidades_easyocr(self, imagem):
+        """Log-probabilidades CTC (quadros x classes) do reconhecedor do EasyOCR para o recorte inteiro"""
+        import torch
 
-        try:
-            img_letras_isoladas = self._isolar_letras_placa(imagem)
-            results = self.easyocr_reader.readtext(img_letras_isoladas, detail=0, paragraph=False)
-            texto = "".join(results).replace(' ', '').upper()
-            if len(texto) >= 5:
-                resultados.append(texto)
-        except:
-            pass
+        leitor = self.easyocr_reader
+        altura = getattr(leitor, 'imgH', 64)
+        cinza = _para_cinza(imagem)
+        largura = max(altura, int(round(cinza.shape[1] * altura / float(cinza.shape[0]))))
+        cinza = cv2.resize(cinza, (largura, altura), interpolation=cv2.INTER_CUBIC)
 
-        try:
-            if len(imagem.shape) == 3:
-                img_processada = imagem
-            else:
-                img_processada = cv2.cvtColor(imagem, cv2.COLOR_GRAY2BGR)
-            
-            h, w = img_processada.shape[:2]
-            img_grande = cv2.resize(img_processada, (w*3, h*3), interpolation=cv2.INTER_CUBIC)
-            
-            results = self.easyocr_reader.readtext(img_grande, detail=0, paragraph=False)
-            texto = "".join(results).replace(' ', '').upper()
-            if len(texto) >= 5:
-                resultados.append(texto)
-        except:
-            pass
+        tensor = torch.from_numpy(cinza).float().div(255.0).sub(0.5).div(0.5)
+        tensor = tensor.unsqueeze(0).unsqueeze(0).to(leitor.device)
+        texto = torch.zeros((1, 1), dtype=torch.long, device=leitor.device)
 
-        try:
-            if len(imagem.shape) == 3:
-                gray = cv2.cvtColor(imagem, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = imagem.copy()
-            
-            clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-            enhanced = clahe.apply(gray)
-            
-            h, w = enhanced.shape
-            enhanced_grande = cv2.resize(enhanced, (w*3, h*3), interpolation=cv2.INTER_CUBIC)
-            
-            enhanced_bgr = cv2.cvtColor(enhanced_grande, cv2.COLOR_GRAY2BGR)
-            
-            results = self.easyocr_reader.readtext(enhanced_bgr, detail=0, paragraph=False)
-            texto = "".join(results).replace(' ', '').upper()
-            if len(texto) >= 5:
-                resultados.append(texto)
-        except:
-            pass
+        with torch.no_grad():
+            saida = leitor.recognizer(tensor, texto)
+        log_probs = torch.nn.functional.log_softmax(saida, dim=2)[0].cpu().numpy()
+        return log_probs, leitor.converter.character
 
-        if resultados:
-            return max(resultados, key=len)
-        
-        return ""
+    def _ocr_restrito(self, cache):
+        """
+        Um passe de OCR decodificado pela gramática da placa (LLLNLNN / LLLNNNN)
+        EasyOCR: Viterbi sobre a saída CTC; Tesseract: alternativas por símbolo (lstm_choice_mode=2)
+        Retorna {'texto', 'formato', 'score', 'motor', ...} ou None
+        """
+        calibracao = self.config['decodificacao_calibracao']
+        melhor = None
+
+        if self.easyocr_reader is not None:
+            try:
+                log_probs, caracteres = self._probabilidades_easyocr(cache.obter('cinza'))
+                melhor = decodificar_ctc(log_probs, caracteres, calibracao=calibracao)
+                if melhor is not None:
+                    melhor['motor'] = 'easyocr'
+            except Exception as e:
+                print(f"Erro decodificação restrita EasyOCR: {e}")
+
+        if TESSERACT_AVAILABLE and (melhor is None or melhor['score'] < self.config['decodificacao_score_min']):
+            try:
+                hocr = pytesseract.image_to_pdf_or_hocr(
+                    cache.obter('otsu_clahe2_3x'), extension='hocr',
+                    config=f'--psm 7 --oem 1 -c lstm_choice_mode=2 -c tessedit_char_whitelist={WHITELIST_PLACA}')
+                decodificada = decodificar_posicoes(distribuicoes_hocr(hocr), calibracao=calibracao)
+                if decodificada is not None and (melhor is None or decodificada['score'] > melhor['score']):
+                    decodificada['motor'] = 'tesseract'
+                    melhor = decodificada
+            except Exception as e:
+                print(f"Erro decodificação restrita Tesseract: {e}")
+
+        return melhor
 
     def _extrair_placa_do_texto(self, texto):
         """Extrair apenas os 7 caracteres da placa, removendo palavras extras"""
@@ -663,106 +1845,176 @@ class SistemaReconhecimentoPlacasMelhorado:
         
         return texto_limpo
 
+    def _corrigir_posicoes(self, placa):
+        """Corrigir confusões letra/número conforme a posição na placa de 7 caracteres"""
+        corrigido = list(placa)
+        
+        for i in range(3):
+            if corrigido[i].isdigit():
+                mapa = {'0':'O', '6':'G', '1':'I', '5':'S', '8':'B', '2':'Z'}
+                corrigido[i] = mapa.get(corrigido[i], corrigido[i])
+        
+        if corrigido[3].isalpha():
+            mapa = {'O':'0', 'I':'1', 'S':'5', 'G':'6', 'B':'8', 'Z':'2'}
+            corrigido[3] = mapa.get(corrigido[3], corrigido[3])
+        
+        for i in range(5, 7):
+            if corrigido[i].isalpha():
+                mapa = {'O':'0', 'I':'1', 'S':'5', 'G':'6', 'B':'8', 'Z':'2'}
+                corrigido[i] = mapa.get(corrigido[i], corrigido[i])
+        
+        return ''.join(corrigido)
+
     def _pos_processar_texto(self, texto):
         """Aplicar correções inteligentes e formatação"""
         placa_extraida = self._extrair_placa_do_texto(texto)
         
         if len(placa_extraida) == 7:
-            corrigido = list(placa_extraida)
-            
-            for i in range(3):
-                if corrigido[i].isdigit():
-                    mapa = {'0':'O', '6':'G', '1':'I', '5':'S', '8':'B', '2':'Z'}
-                    corrigido[i] = mapa.get(corrigido[i], corrigido[i])
-            
-            if corrigido[3].isalpha():
-                mapa = {'O':'0', 'I':'1', 'S':'5', 'G':'6', 'B':'8', 'Z':'2'}
-                corrigido[3] = mapa.get(corrigido[3], corrigido[3])
-            
-            for i in range(5, 7):
-                if corrigido[i].isalpha():
-                    mapa = {'O':'0', 'I':'1', 'S':'5', 'G':'6', 'B':'8', 'Z':'2'}
-                    corrigido[i] = mapa.get(corrigido[i], corrigido[i])
-            
-            texto_corrigido = ''.join(corrigido)
+            texto_corrigido = self._corrigir_posicoes(placa_extraida)
             return f"{texto_corrigido[:3]}-{texto_corrigido[3:]}"
 
-        return placa_extraida
+        return placa_extraida
+
+    def _alinhar_placa(self, texto, confiancas):
+        """Alinhar a leitura aos 7 caracteres da placa, mantendo a confiança de cada caractere"""
+        chars_validos = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+        filtrados = [(c, conf) for c, conf in zip(texto.upper(), confiancas) if c in chars_validos]
+        if not filtrados:
+            return None
+
+        texto_filtrado = ''.join(c for c, _ in filtrados)
+        placa_extraida = self._extrair_placa_do_texto(texto_filtrado)
+        if len(placa_extraida) != 7:
+            return None
+
+        inicio = texto_filtrado.find(placa_extraida)
+        if inicio >= 0:
+            confiancas_placa = [conf for _, conf in filtrados[inicio:inicio+7]]
+        else:
+            media = sum(conf for _, conf in filtrados) / len(filtrados)
+            confiancas_placa = [media] * 7
+
+        return self._corrigir_posicoes(placa_extraida), confiancas_placa
+
+    def _recortes_deteccao(self, imagem_roi, mask_zona, deslocamento, regioes=None):
+        """Recortes (imagem, máscara, deslocamento) onde os detectores devem rodar"""
+        if regioes is None:
+            return [(imagem_roi, mask_zona, deslocamento)]
+
+        dx, dy = deslocamento
+        h, w = imagem_roi.shape[:2]
+        recortes = []
+
+        for x1, y1, x2, y2 in regioes:
+            x1, y1 = max(x1 - dx, 0), max(y1 - dy, 0)
+            x2, y2 = min(x2 - dx, w), min(y2 - dy, h)
+            if x2 <= x1 or y2 <= y1:
+                continue
+            mask = mask_zona[y1:y2, x1:x2] if mask_zona is not None else None
+            recortes.append((imagem_roi[y1:y2, x1:x2], mask, (dx + x1, dy + y1)))
+
+        return recortes
+
+    def _detectores_ativos(self):
+        """Detectores do perfil ativo (detector_caracteres_* ainda valem para o detector MSER)"""
+        if self.config['detector_caracteres_exclusivo']:
+            return ['caracteres']
+        detectores = list(self.config['detectores'])
+        if not self.config['detector_caracteres_ativo'] and 'caracteres' in detectores:
+            detectores.remove('caracteres')
+        return detectores
+
+    def _detectar_candidatos(self, imagem_roi, mask_zona, deslocamento):
+        """Rodar as estratégias de detecção do perfil ativo em um recorte"""
+        detectores = self._detectores_ativos()
+
+        mapas = set()
+        for nome in detectores:
+            if nome == 'caracteres' and hasattr(cv2, 'MSER_create'):
+                continue
+            mapas.update(DETECTORES_PLACA[nome][0])
+
+        contexto = self.contexto_quadro()
+        with self._etapa_memoria('preprocessamento'):
+            prep_results = self.preprocessar_para_placas(imagem_roi, contexto, mapas)
+
+        candidatos = []
+        for nome in detectores:
+            try:
+                with self._etapa_memoria(f'detector:{nome}'):
+                    candidatos.extend(DETECTORES_PLACA[nome][1](self, prep_results, imagem_roi, contexto))
+            except Exception as e:
+                print(f"Erro detector {nome}: {e}")
+
+        return self._ajustar_candidatos_zona(candidatos, mask_zona, deslocamento)
 
-    def detectar_placas_melhorado(self, imagem):
-        """Detecção com todas as estratégias disponíveis"""
+    def detectar_placas_melhorado(self, imagem, camera=None, regioes=None, imagem_completa=None, escala_completa=None):
+        """
+        Detecção com todas as estratégias disponíveis
+        Se imagem for uma versão reduzida (IMREAD_REDUCED_*), imagem_completa (array ou função
+        que o carrega) fornece a resolução original usada nos recortes do OCR
+        escala_completa: fator de redução conhecido; com ele a função só é chamada se sobrar candidato
+        """
         try:
-            imagem_roi, _ = self.filtrar_regiao_interesse(imagem)
-            prep_results = self.preprocessar_para_placas(imagem_roi)
+            escala = 1.0
+            if imagem_completa is not None:
+                if escala_completa is None:
+                    # Sem o fator, a única forma de medir é decodificar a resolução original já aqui
+                    if callable(imagem_completa):
+                        imagem_completa = imagem_completa()
+                    escala_completa = imagem_completa.shape[1] / float(imagem.shape[1])
+                escala = escala_completa
+
+            imagem_roi, mask_zona, deslocamento = self.filtrar_regiao_interesse(imagem, camera, escala)
+
+            recortes = self._recortes_deteccao(imagem_roi, mask_zona, deslocamento, regioes)
+            if regioes is not None and not recortes:
+                # Movimento só fora da zona da câmera: nada a procurar (nem no fallback)
+                return []
 
             candidatos = []
-            
-            try:
-                c1 = self._detectar_por_contornos(prep_results['morph_opening'], imagem)
-                candidatos.extend(c1)
-            except Exception as e:
-                print(f"Erro contornos morph_opening: {e}")
-            
-            try:
-                c2 = self._detectar_por_contornos(prep_results['bin_adaptiva'], imagem)
-                candidatos.extend(c2)
-            except Exception as e:
-                print(f"Erro contornos bin_adaptiva: {e}")
-            
-            try:
-                c3 = self._detectar_por_contornos(prep_results['bin_otsu'], imagem)
-                candidatos.extend(c3)
-            except Exception as e:
-                print(f"Erro contornos bin_otsu: {e}")
-            
-            try:
-                c4 = self._detectar_por_componentes(prep_results['bin_adaptiva'], imagem)
-                candidatos.extend(c4)
-            except Exception as e:
-                print(f"Erro componentes bin_adaptiva: {e}")
-            
-            try:
-                c5 = self._detectar_por_componentes(prep_results['morph_opening'], imagem)
-                candidatos.extend(c5)
-            except Exception as e:
-                print(f"Erro componentes morph_opening: {e}")
-            
-            try:
-                c6 = self._detectar_por_bordas(prep_results['bordas_canny'], imagem)
-                candidatos.extend(c6)
-            except Exception as e:
-                print(f"Erro bordas canny: {e}")
+            for recorte, mask, desloc in recortes:
+                candidatos.extend(self._detectar_candidatos(recorte, mask, desloc))
 
             candidatos_filtrados = self._filtrar_placas_candidatas(candidatos)
             
-            if not candidatos_filtrados:
-                print("⚠️ Nenhum candidato detectado! Criando candidato fallback com imagem inteira.")
-                h, w = imagem.shape[:2]
-                candidatos_filtrados = [{
-                    'bbox': (0, 0, w, h),
-                    'area': w * h,
-                    'aspect_ratio': w / h,
-                    'score': 0.1,
-                    'metodo': 'Fallback-ImagemInteira'
-                }]
+            if not candidatos_filtrados and self.config['fallback_imagem_inteira']:
+                print("⚠️ Nenhum candidato detectado! Procurando texto em ladrilhos da imagem.")
+                candidatos_filtrados = self._candidatos_ladrilhos(imagem_roi, deslocamento)
             
-            placas_validadas = self._validar_com_ocr_preliminar(candidatos_filtrados, imagem)
-
-            return placas_validadas[:5]
+            if not candidatos_filtrados:
+                return []
+
+            if imagem_completa is not None:
+                if callable(imagem_completa):
+                    imagem_completa = imagem_completa()
+                # IMREAD_REDUCED_* arredonda para cima: limitar as bboxes escaladas à imagem original
+                altura, largura = imagem_completa.shape[:2]
+                for candidato in candidatos_filtrados:
+                    x1, y1, x2, y2 = (int(round(v * escala)) for v in candidato['bbox'])
+                    candidato['bbox'] = (min(x1, largura), min(y1, altura), min(x2, largura), min(y2, altura))
+                    candidato['area'] = candidato['area'] * escala * escala
+                imagem = imagem_completa
+
+            fallback = bool(candidatos_filtrados) and candidatos_filtrados[0]['metodo'] == 'Fallback-Ladrilho'
+            with self._etapa_memoria('validacao_fallback' if fallback else 'validacao_preliminar'):
+                placas_validadas = self._validar_com_ocr_preliminar(candidatos_filtrados, imagem)
+
+            limite = self.config['multiplas_placas_max'] if self.config['multiplas_placas'] else self.config['placas_max']
+            with self._etapa_memoria('retificacao'):
+                return self._retificar_candidatos(placas_validadas[:limite])
         
         except Exception as e:
             print(f"❌ ERRO CRÍTICO em detectar_placas_melhorado: {e}")
             import traceback
             traceback.print_exc()
-            h, w = imagem.shape[:2]
-            return [{
-                'bbox': (0, 0, w, h),
-                'area': w * h,
-                'aspect_ratio': w / h,
-                'score': 0.1,
-                'metodo': 'Fallback-Erro',
-                'imagem_placa': imagem
-            }]
+            if not self.config['fallback_imagem_inteira']:
+                return []
+            try:
+                return self._validar_com_ocr_preliminar(self._candidatos_ladrilhos(imagem), imagem)
+            except Exception as e:
+                print(f"❌ Fallback por ladrilhos falhou: {e}")
+                return []
 
     def _validar_placa_final(self, texto, score_deteccao):
         """Validar se texto corresponde a uma placa válida"""
@@ -817,19 +2069,312 @@ class SistemaReconhecimentoPlacasMelhorado:
         
         return confianca_final >= 0.5, confianca_final
 
-    def processar_imagem(self, caminho_imagem, log_callback=None):
+    def etapas_visuais(self, resultado, largura_max=None, indice=0):
+        """
+        Imagens RGB das etapas de ETAPAS_VISUAIS para uma placa do resultado (calculadas a partir
+        do recorte); com largura_max já saem reduzidas para exibição
+        """
+        ocrs = resultado.get('resultados_ocr') or []
+        if indice >= len(ocrs) or ocrs[indice].get('imagem_placa') is None:
+            return []
+
+        return self.etapas_visuais_cache(ocrs[indice]['imagem_placa'], largura_max)
+
+    def etapas_visuais_cache(self, cache, largura_max=None):
+        """Etapas visuais a partir de um CacheImagensPlaca (ou de um recorte guardado)"""
+        if not isinstance(cache, CacheImagensPlaca):
+            cache = CacheImagensPlaca(cache)
+
+        etapas = []
+        for titulo, nome in ETAPAS_VISUAIS:
+            img = cache.obter(nome)
+            h, w = img.shape[:2]
+            escala = min(largura_max / float(w), 1.0) if largura_max else 1.0
+            if int(w * escala) <= 0 or int(h * escala) <= 0:
+                continue
+            if escala < 1.0:
+                img = cv2.resize(img, (int(w * escala), int(h * escala)), interpolation=cv2.INTER_AREA)
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB if img.ndim == 2 else cv2.COLOR_BGR2RGB)
+            etapas.append((titulo, img))
+        return etapas
+
+    def _ler_candidato(self, i, placa, total, log):
+        """OCR de um candidato; retorna o resultado_ocr se a placa for válida, senão None"""
+        log(f"\n🎯 Processando candidato {i+1}/{total}...")
+        
+        try:
+            imagem_placa = placa.get('imagem_placa')
+            if imagem_placa is None:
+                log(f"   ⚠️ Imagem da placa não disponível, pulando...")
+                return None
+            
+            log(f"   📐 Dimensões: {imagem_placa.shape[1]}x{imagem_placa.shape[0]}")
+            log(f"   🔧 Método detecção: {placa.get('metodo', 'N/A')}")
+            
+            cache = placa.get('cache_imagens')
+            if cache is None:
+                cache = CacheImagensPlaca(imagem_placa)
+            
+            saidas_variantes = {}
+            condicao = None
+            if self.agendador is not None:
+                formato_preliminar = self._formato_placa(self._pos_processar_texto(placa.get('texto_preliminar', '')))
+                condicao = self.agendador.condicao(imagem_placa, formato_preliminar)
+            
+            texto_consenso, score_consenso = "", 0.0
+            passe_unico = None
+            if self.config['decodificacao_restrita']:
+                alvo = placa['cache_retificada'] if placa.get('cache_retificada') is not None else cache
+                log(f"\n   📖 Executando passe único com decodificação restrita (LLLNLNN / LLLNNNN)...")
+                with self._etapa_memoria('ocr_restrito'):
+                    restrita = self._ocr_restrito(alvo)
+                if restrita is not None and restrita['score'] >= self.config['decodificacao_score_min']:
+                    passe_unico = (restrita['texto'], self._pos_processar_texto(restrita['texto']), restrita['motor'])
+                    score_consenso = restrita['score']
+                elif restrita is not None:
+                    log(f"   ⚠️ Decodificação restrita insegura: '{restrita['texto']}' ({restrita['score']:.0%})")
+            
+            if passe_unico is None and placa.get('cache_retificada') is not None:
+                retificacao = placa['retificacao']
+                log(f"\n   📐 Placa retificada ({retificacao['metodo']}, ângulo {retificacao['angulo']:.1f}°)")
+                log(f"   📖 Executando passe único de OCR na placa retificada...")
+                with self._etapa_memoria('passe_unico'):
+                    passe_unico = self._ocr_passe_unico(placa['cache_retificada'])
+            
+            if passe_unico is not None:
+                texto_bruto, texto_final, motor = passe_unico
+                log(f"   ✅ Passe único ({motor}): '{texto_bruto}' → variantes adicionais dispensadas")
+                texto_tesseract = texto_bruto if motor == 'tesseract' else ""
+                texto_easyocr = texto_bruto if motor == 'easyocr' else ""
+            else:
+                log(f"\n   🔬 Aplicando tratamentos OCR:")
+                log(f"      • Isolamento de letras (removendo BRASIL, BR, bordas)")
+                log(f"      • Ampliação 5x para maior resolução")
+                log(f"      • CLAHE para contraste")
+                log(f"      • Sharpening para nitidez")
+                log(f"      • Múltiplas binarizações")
+                log(f"      • Denoising (remoção de ruído)")
+                log(f"      • Morfologia para conectar letras")
+                
+                log(f"\n   📖 Executando OCR (Tesseract + EasyOCR) com votação por caractere...")
+                votacao = self._ocr_consenso(cache, condicao, saidas_variantes, log)
+                texto_consenso, score_consenso = votacao.consenso()
+                
+                textos_tesseract = [t for n, t in saidas_variantes.items() if VARIANTES_OCR[n]['motor'] == 'tesseract' and len(t) >= 5]
+                textos_easyocr = [t for n, t in saidas_variantes.items() if VARIANTES_OCR[n]['motor'] == 'easyocr' and len(t) >= 5]
+                texto_tesseract = max(textos_tesseract, key=len) if textos_tesseract else ""
+                texto_easyocr = max(textos_easyocr, key=len) if textos_easyocr else ""
+                log(f"   📝 Tesseract bruto: '{texto_tesseract}'")
+                log(f"   📝 EasyOCR bruto: '{texto_easyocr}'")
+                if texto_consenso and votacao.atingido:
+                    log(f"   🗳️  Consenso: '{texto_consenso}' ({score_consenso:.0%}, {len(votacao.leituras)} leitura(s))")
+                elif texto_consenso:
+                    # Variantes esgotadas sem atingir votos/limiar: voto fraco não vence uma leitura completa
+                    log(f"   ⚠️ Sem consenso: '{texto_consenso}' ({score_consenso:.0%}), usando a melhor leitura")
+                    texto_consenso = ""
+
+            log(f"\n   🔧 Aplicando pós-processamento:")
+            log(f"      • Extração de placa (7 caracteres)")
+            log(f"      • Remoção de palavras (BRASIL, BR, MERCOSUL)")
+            log(f"      • Correções inteligentes (G↔6, O↔0, etc)")
+            log(f"      • Formatação final")
+            
+            final_tesseract = self._pos_processar_texto(texto_tesseract)
+            final_easyocr = self._pos_processar_texto(texto_easyocr)
+            
+            log(f"   ✅ Tesseract final: '{final_tesseract}'")
+            log(f"   ✅ EasyOCR final: '{final_easyocr}'")
+            
+            if texto_consenso:
+                melhor_texto = f"{texto_consenso[:3]}-{texto_consenso[3:]}"
+            else:
+                melhor_texto = final_easyocr if final_easyocr else final_tesseract
+            score_deteccao = placa.get('score', 0)
+        
+        except Exception as e:
+            log(f"   ❌ Erro ao processar candidato: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+        
+        valida, confianca_final = self._validar_placa_final(melhor_texto, score_deteccao)
+        
+        if valida:
+            log(f"   ✅ PLACA VÁLIDA! Confiança: {confianca_final:.1%}")
+            
+            if self.agendador is not None and saidas_variantes:
+                vencedoras = [nome for nome, texto in saidas_variantes.items()
+                              if texto and self._pos_processar_texto(texto) == melhor_texto]
+                self.agendador.registrar(condicao, list(saidas_variantes.keys()), vencedoras)
+        else:
+            log(f"   ⚠️  Não parece ser placa válida (confiança: {confianca_final:.1%})")
+            return None
+
+        resultado_ocr = {
+            'placa_id': i,
+            'bbox': placa['bbox'],
+            'confianca_deteccao': confianca_final,
+            'metodo_deteccao': placa.get('metodo', 'N/A'),
+            'score_qualidade': placa.get('score', 0),
+            'dimensoes': f"{placa['bbox'][2] - placa['bbox'][0]}x{placa['bbox'][3] - placa['bbox'][1]}",
+            'aspect_ratio': placa.get('aspect_ratio', 0),
+            'area': placa.get('area', 0),
+            'imagem_placa': imagem_placa,
+            'tesseract': {
+                'texto_bruto': texto_tesseract,
+                'texto_final': final_tesseract
+            },
+            'easyocr': {
+                'texto_bruto': texto_easyocr,
+                'texto_final': final_easyocr
+            },
+            'texto_final': melhor_texto,
+            'consenso': score_consenso,
+            'placa_valida': valida
+        }
+
+        if self.lista_monitorada is not None:
+            # Um perfil pode pedir distância maior que a do índice já construído
+            limite = min(self.config['lista_monitorada_distancia'], self.lista_monitorada.max_distancia)
+            alertas = self.lista_monitorada.buscar(melhor_texto, limite)
+            resultado_ocr['alertas'] = alertas
+            for placa_alerta, distancia, dados in alertas:
+                log(f"   🚨 LISTA MONITORADA: {placa_alerta} (distância {distancia:.2f}) {dados or ''}")
+
+        return resultado_ocr
+
+    # Estado por quadro que acompanha o trabalho levado a outras threads; 'contexto' (buffers de
+    # trabalho) fica de fora: cada thread usa os seus, já que os buffers não podem ser compartilhados
+    CONTEXTO_PROPAGADO = ('config', 'medidor')
+
+    def _propagar_contexto(self, funcao):
+        """Envolver funcao para rodar em outra thread com o perfil e o medidor de memória desta"""
+        ativos = {nome: getattr(self._contextos, nome, None) for nome in self.CONTEXTO_PROPAGADO}
+
+        def executar(*args, **kwargs):
+            anteriores = {nome: getattr(self._contextos, nome, None) for nome in ativos}
+            for nome, valor in ativos.items():
+                setattr(self._contextos, nome, valor)
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                for nome, valor in anteriores.items():
+                    setattr(self._contextos, nome, valor)
+
+        return executar
+
+    def _ler_candidatos_paralelo(self, placas, log):
+        """
+        Modo multiplas_placas: OCR de todos os candidatos em paralelo
+        Leituras sobrepostas (IoU) ou repetidas da mesma placa viram uma só (a de maior confiança);
+        o resultado sai em ordem de leitura (linhas de cima para baixo, esquerda para direita)
+        """
+        if not placas:
+            return []
+
+        workers = max(1, min(self.config['multiplas_placas_threads'], len(placas)))
+        log(f"\n🚗 Modo múltiplas placas: {len(placas)} candidato(s) em {workers} thread(s)")
+
+        def ler(i, placa):
+            linhas = []
+            return self._ler_candidato(i, placa, len(placas), linhas.append), linhas
+
+        ler = self._propagar_contexto(ler)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futuros = [executor.submit(ler, i, placa) for i, placa in enumerate(placas)]
+
+            lidas = []
+            for i, futuro in enumerate(futuros):
+                resultado_ocr, linhas = futuro.result()
+                # Logs de cada candidato saem agrupados, na ordem dos candidatos
+                for linha in linhas:
+                    log(linha)
+                if resultado_ocr is not None:
+                    lidas.append(resultado_ocr)
+
+        unicas = []
+        # Entre leituras repetidas fica a de maior consenso do OCR; a confiança da detecção só desempata
+        melhores_primeiro = sorted(lidas, key=lambda r: (r.get('consenso', 0), r['confianca_deteccao']), reverse=True)
+        for resultado_ocr in melhores_primeiro:
+            repetida = any(
+                resultado_ocr['texto_final'] == outro['texto_final'] or
+                self._iou(resultado_ocr['bbox'], outro['bbox']) > self.config['multiplas_placas_iou']
+                for outro in unicas)
+            if not repetida:
+                unicas.append(resultado_ocr)
+
+        if not unicas:
+            return []
+
+        altura = float(np.median([r['bbox'][3] - r['bbox'][1] for r in unicas])) or 1.0
+
+        def ordem_leitura(resultado_ocr):
+            x1, y1, x2, y2 = resultado_ocr['bbox']
+            return (int(((y1 + y2) / 2.0) // altura), x1)
+
+        unicas.sort(key=ordem_leitura)
+        descartadas = len(lidas) - len(unicas)
+        log(f"\n🎯 {len(unicas)} placa(s) válida(s)" + (f" ({descartadas} leitura(s) duplicada(s) descartada(s))" if descartadas else ""))
+        for resultado_ocr in unicas:
+            log(f"   • {resultado_ocr['texto_final']} em {tuple(int(v) for v in resultado_ocr['bbox'])}")
+
+        return unicas
+
+    def processar_imagem(self, caminho_imagem, log_callback=None, camera=None, compacto=False, perfil=None):
         """Processar imagem completa com log detalhado"""
+        imagem = cv2.imread(caminho_imagem)
+        if imagem is None:
+            if log_callback:
+                log_callback(f"❌ ERRO: Não foi possível carregar: {caminho_imagem}")
+            return self._finalizar_resultado({'caminho': caminho_imagem, 'erro': f'Não foi possível carregar: {caminho_imagem}'}, compacto)
+
+        return self.processar_quadro(imagem, log_callback, camera, caminho_imagem, compacto=compacto, perfil=perfil)
+
+    def _finalizar_resultado(self, resultado, compacto=False, inicio=None):
+        """
+        Registrar o tempo total e, se pedido, converter para RegistroResultado (sem imagens)
+        Os caches de imagens derivadas (ampliações 5x, denoising...) só servem ao OCR do quadro e
+        saem do resultado: o dict guarda o recorte, e as etapas são recalculadas se forem exibidas
+        """
+        for chave in ('placas_detectadas', 'resultados_ocr'):
+            for item in resultado.get(chave) or []:
+                item.pop('cache_imagens', None)
+                item.pop('cache_retificada', None)
+        if inicio is not None:
+            resultado.setdefault('tempos', {})['total'] = time.perf_counter() - inicio
+        medidor = getattr(self._contextos, 'medidor', None)
+        if medidor is not None:
+            resultado['memoria'] = medidor.relatorio()
+        if compacto:
+            return RegistroResultado.de_resultado(resultado, self.config['manter_recortes'])
+        return resultado
+
+    def processar_quadro(self, imagem, log_callback=None, camera=None, caminho_imagem=None,
+                         imagem_completa=None, compacto=False, perfil=None, escala_completa=None):
+        """
+        Processar um quadro já decodificado (arquivo, câmera ou stream)
+        imagem_completa: resolução original (array ou função) quando imagem foi decodificada reduzida
+        escala_completa: fator da redução (ex.: 2, 4, 8); com ele a função só decodifica se houver candidato
+        compacto: retornar RegistroResultado (texto, bbox, scores e tempos) em vez do dict com imagens
+        perfil: nome em PERFIS_PIPELINE ou dict (padrão: perfil da câmera ou config['perfil_padrao'])
+        """
+        perfil = self._perfil_da_chamada(perfil, camera)
+        with self.usar_perfil(perfil), self._medir_memoria():
+            resultado = self._processar_quadro(imagem, log_callback, camera, caminho_imagem, imagem_completa,
+                                               escala_completa, compacto)
+        if isinstance(resultado, dict) and isinstance(perfil, str):
+            resultado['perfil'] = perfil
+        return resultado
+
+    def _processar_quadro(self, imagem, log_callback, camera, caminho_imagem, imagem_completa, escala_completa, compacto):
         def log(msg):
             if log_callback:
                 log_callback(msg)
         
+        inicio = time.perf_counter()
+        
         try:
-            imagem = cv2.imread(caminho_imagem)
-            if imagem is None:
-                log(f"❌ ERRO: Não foi possível carregar: {caminho_imagem}")
-                return {'erro': f'Não foi possível carregar: {caminho_imagem}'}
-
-            nome_arquivo = os.path.basename(caminho_imagem)
+            nome_arquivo = os.path.basename(caminho_imagem) if caminho_imagem else f"quadro-{camera or 'camera'}"
             log(f"📸 Imagem carregada: {nome_arquivo}")
             log(f"📐 Dimensões: {imagem.shape[1]}x{imagem.shape[0]} pixels")
 
@@ -838,9 +2383,26 @@ class SistemaReconhecimentoPlacasMelhorado:
                 'nome_arquivo': nome_arquivo,
                 'imagem_original': imagem,
                 'placas_detectadas': [],
-                'resultados_ocr': []
+                'resultados_ocr': [],
+                'tempos': {}
             }
 
+            reducao = self._reducao_por_memoria(imagem) if imagem_completa is None else 1
+            if reducao > 1:
+                log(f"💾 Teto de memória: detecção em resolução 1/{reducao}")
+                imagem_completa = imagem
+                imagem = cv2.resize(imagem, (imagem.shape[1] // reducao, imagem.shape[0] // reducao),
+                                    interpolation=cv2.INTER_AREA)
+            
+            regioes = None
+            if self.config['movimento_ativo']:
+                regioes = self._filtro_movimento(camera).avaliar(imagem)
+                resultado['regioes_movimento'] = regioes
+                if not regioes:
+                    log("💤 Nenhum movimento relevante: quadro ignorado")
+                    return self._finalizar_resultado(resultado, compacto, inicio)
+                log(f"🏃 Movimento em {len(regioes)} região(ões)")
+
             log("\n🔍 Iniciando detecção de candidatos...")
             log("🔬 Aplicando pré-processamento:")
             log("   1️⃣ Filtro de Região de Interesse")
@@ -851,8 +2413,30 @@ class SistemaReconhecimentoPlacasMelhorado:
             log("   6️⃣ Detecção de Bordas Canny")
             log("   7️⃣ Morfologia (Close + Open)")
             
-            placas = self.detectar_placas_melhorado(imagem)
+            if camera in self.zonas_camera:
+                log(f"📍 Zona da câmera '{camera}' aplicada")
+            
+            if imagem_completa is not None:
+                imagem_reduzida = imagem
+                carregada = []
+                
+                def carregar_completa():
+                    if not carregada:
+                        carregada.append(imagem_completa() if callable(imagem_completa) else imagem_completa)
+                    return carregada[0]
+                
+                with self._etapa_memoria('deteccao'):
+                    placas = self.detectar_placas_melhorado(imagem_reduzida, camera, regioes, carregar_completa,
+                                                            escala_completa)
+                if carregada:
+                    imagem = carregada[0]
+                    resultado['imagem_original'] = imagem
+                    log(f"📐 Resolução original para OCR: {imagem.shape[1]}x{imagem.shape[0]} pixels")
+            else:
+                with self._etapa_memoria('deteccao'):
+                    placas = self.detectar_placas_melhorado(imagem, camera, regioes)
             resultado['placas_detectadas'] = placas
+            resultado['tempos']['deteccao'] = time.perf_counter() - inicio
             
             log(f"\n📦 {len(placas)} candidato(s) encontrado(s) após todos os filtros")
             
@@ -870,110 +2454,51 @@ class SistemaReconhecimentoPlacasMelhorado:
                 log("⚠️ ATENÇÃO: Nenhum candidato passou nos filtros!")
                 log("   Sistema vai tentar OCR em regiões alternativas...")
 
-            placa_valida_encontrada = False
-        
         except Exception as e:
             log(f"❌ ERRO CRÍTICO no carregamento: {e}")
             import traceback
             traceback.print_exc()
-            return {'erro': f'Erro crítico: {e}'}
-
-        for i, placa in enumerate(placas):
-            if placa_valida_encontrada:
-                log(f"\n⏭️  Ignorando candidato {i+1} (placa válida já encontrada)")
-                continue
-            
-            log(f"\n🎯 Processando candidato {i+1}/{len(placas)}...")
-            
-            try:
-                imagem_placa = placa.get('imagem_placa')
-                if imagem_placa is None:
-                    log(f"   ⚠️ Imagem da placa não disponível, pulando...")
-                    continue
-                
-                log(f"   📐 Dimensões: {imagem_placa.shape[1]}x{imagem_placa.shape[0]}")
-                log(f"   🔧 Método detecção: {placa.get('metodo', 'N/A')}")
-                
-                log(f"\n   🔬 Aplicando tratamentos OCR:")
-                log(f"      • Isolamento de letras (removendo BRASIL, BR, bordas)")
-                log(f"      • Ampliação 5x para maior resolução")
-                log(f"      • CLAHE para contraste")
-                log(f"      • Sharpening para nitidez")
-                log(f"      • Múltiplas binarizações")
-                log(f"      • Denoising (remoção de ruído)")
-                log(f"      • Morfologia para conectar letras")
-                
-                log(f"\n   📖 Executando OCR Tesseract...")
-                texto_tesseract = self._ocr_tesseract_completo(imagem_placa)
-                log(f"   📝 Tesseract bruto: '{texto_tesseract}'")
-                
-                log(f"   📖 Executando OCR EasyOCR...")
-                texto_easyocr = self._ocr_easyocr_completo(imagem_placa)
-                log(f"   📝 EasyOCR bruto: '{texto_easyocr}'")
-
-                log(f"\n   🔧 Aplicando pós-processamento:")
-                log(f"      • Extração de placa (7 caracteres)")
-                log(f"      • Remoção de palavras (BRASIL, BR, MERCOSUL)")
-                log(f"      • Correções inteligentes (G↔6, O↔0, etc)")
-                log(f"      • Formatação final")
-                
-                final_tesseract = self._pos_processar_texto(texto_tesseract)
-                final_easyocr = self._pos_processar_texto(texto_easyocr)
-                
-                log(f"   ✅ Tesseract final: '{final_tesseract}'")
-                log(f"   ✅ EasyOCR final: '{final_easyocr}'")
-                
-                melhor_texto = final_easyocr if final_easyocr else final_tesseract
-                score_deteccao = placa.get('score', 0)
-            
-            except Exception as e:
-                log(f"   ❌ Erro ao processar candidato: {e}")
-                import traceback
-                traceback.print_exc()
-                continue
-            
-            valida, confianca_final = self._validar_placa_final(melhor_texto, score_deteccao)
-            
-            if valida:
-                log(f"   ✅ PLACA VÁLIDA! Confiança: {confianca_final:.1%}")
-                placa_valida_encontrada = True
-            else:
-                log(f"   ⚠️  Não parece ser placa válida (confiança: {confianca_final:.1%})")
-                continue
+            return self._finalizar_resultado({'caminho': caminho_imagem, 'erro': f'Erro crítico: {e}'}, compacto, inicio)
 
-            resultado_ocr = {
-                'placa_id': i,
-                'bbox': placa['bbox'],
-                'confianca_deteccao': confianca_final,
-                'metodo_deteccao': placa.get('metodo', 'N/A'),
-                'score_qualidade': placa.get('score', 0),
-                'dimensoes': f"{placa['bbox'][2] - placa['bbox'][0]}x{placa['bbox'][3] - placa['bbox'][1]}",
-                'aspect_ratio': placa.get('aspect_ratio', 0),
-                'area': placa.get('area', 0),
-                'imagem_placa': imagem_placa,
-                'tesseract': {
-                    'texto_bruto': texto_tesseract,
-                    'texto_final': final_tesseract
-                },
-                'easyocr': {
-                    'texto_bruto': texto_easyocr,
-                    'texto_final': final_easyocr
-                },
-                'placa_valida': valida
-            }
-
-            resultado['resultados_ocr'].append(resultado_ocr)
-            
-            if placa_valida_encontrada:
-                log(f"   🎯 Placa encontrada! Parando processamento.")
-                break
+        if self.config['multiplas_placas']:
+            with self._etapa_memoria('ocr'):
+                resultado['resultados_ocr'] = self._ler_candidatos_paralelo(placas, log)
+        else:
+            for i, placa in enumerate(placas):
+                with self._etapa_memoria('ocr'):
+                    resultado_ocr = self._ler_candidato(i, placa, len(placas), log)
+                if resultado_ocr is not None:
+                    resultado['resultados_ocr'].append(resultado_ocr)
+                    log(f"   🎯 Placa encontrada! Parando processamento.")
+                    restantes = len(placas) - i - 1
+                    if restantes:
+                        log(f"\n⏭️  Ignorando {restantes} candidato(s) restante(s) (placa válida já encontrada)")
+                    break
 
-        return resultado
+        resultado['tempos']['ocr'] = time.perf_counter() - inicio - resultado['tempos']['deteccao']
+        return self._finalizar_resultado(resultado, compacto, inicio)
 
 
 class PainelPlacasMercosulFinal:
     """Interface gráfica para o sistema de reconhecimento"""
 
+    INTERVALO_UI_MS = 50
+    MENSAGENS_POR_CICLO = 500
+    LOG_MAX_LINHAS = 5000
+    ESCALAS_EM_CACHE = 4
+    ETAPA_LARGURA_MAX = 270
+    FILA_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+    FILA_PREFETCH = 16
+    COLUNAS_FILA = [
+        ('arquivo', 'Arquivo', 180),
+        ('placa', 'Placa', 90),
+        ('confianca', 'Conf.', 60),
+        ('candidatos', 'Cand.', 50),
+        ('deteccao', 'Detecção ms', 85),
+        ('ocr', 'OCR ms', 70),
+        ('total', 'Total ms', 70),
+    ]
+
     def __init__(self, root):
         self.root = root
         self.root.title("🚗 Sistema Melhorado V2.0 - Placas Mercosul Brasil")
@@ -984,7 +2509,23 @@ class PainelPlacasMercosulFinal:
         self.imagem_atual = None
         self.caminho_imagem = None
 
+        # Atualizações vindas das threads de trabalho: drenadas no loop do Tk (root.after)
+        self.fila_ui = queue.Queue()
+
+        # Imagem exibida no canvas: RGB convertido uma vez e versões reduzidas por tamanho
+        self._imagem_exibida = None
+        self._imagem_rgb = None
+        self._escaladas = OrderedDict()
+        self._redesenho_agendado = None
+
+        # Modo fila: registros compactos (com recorte da placa) na ordem de conclusão
+        self.registros_fila = []
+        self.parar_fila = None
+        self.ordem_tabela = {}
+        self.selecao_fila = 0
+
         self.configurar_interface()
+        self.root.after(self.INTERVALO_UI_MS, self._drenar_fila_ui)
         self.inicializar_sistema()
 
     def configurar_interface(self):
@@ -1017,14 +2558,30 @@ class PainelPlacasMercosulFinal:
                                         command=self.processar_imagem, width=25, state='disabled')
         self.btn_processar.grid(row=1, column=0, pady=3, sticky=tk.W+tk.E)
 
+        self.btn_pasta = ttk.Button(frame_controles, text="📂 Processar Pasta",
+                                    command=self.carregar_pasta, width=25, state='disabled')
+        self.btn_pasta.grid(row=2, column=0, pady=3, sticky=tk.W+tk.E)
+
+        self.btn_parar = ttk.Button(frame_controles, text="⏹️ Parar Fila",
+                                    command=self.parar_processamento_fila, width=25, state='disabled')
+        self.btn_parar.grid(row=3, column=0, pady=3, sticky=tk.W+tk.E)
+
+        self.btn_acervo = ttk.Button(frame_controles, text="📦 Abrir Acervo",
+                                     command=self.abrir_acervo, width=25, state='disabled')
+        self.btn_acervo.grid(row=4, column=0, pady=3, sticky=tk.W+tk.E)
+
+        self.btn_exportar = ttk.Button(frame_controles, text="💾 Exportar Recortes",
+                                       command=self.exportar_recortes, width=25, state='disabled')
+        self.btn_exportar.grid(row=5, column=0, pady=3, sticky=tk.W+tk.E)
+
         self.progress = ttk.Progressbar(frame_controles, mode='indeterminate')
-        self.progress.grid(row=2, column=0, pady=3, sticky=tk.W+tk.E)
+        self.progress.grid(row=6, column=0, pady=3, sticky=tk.W+tk.E)
 
         self.label_status = ttk.Label(frame_controles, text="🔄 Iniciando...", foreground='orange')
-        self.label_status.grid(row=3, column=0, pady=5, sticky=tk.W)
+        self.label_status.grid(row=7, column=0, pady=5, sticky=tk.W)
 
         frame_stats = ttk.LabelFrame(frame_controles, text="📊 Estatísticas", padding="10")
-        frame_stats.grid(row=4, column=0, sticky=(tk.W, tk.E), pady=(5, 10))
+        frame_stats.grid(row=8, column=0, sticky=(tk.W, tk.E), pady=(5, 10))
 
         self.label_placas = ttk.Label(frame_stats, text="Placas: 0")
         self.label_placas.grid(row=0, column=0, sticky=tk.W)
@@ -1032,8 +2589,14 @@ class PainelPlacasMercosulFinal:
         self.label_metodo = ttk.Label(frame_stats, text="Método:")
         self.label_metodo.grid(row=1, column=0, sticky=tk.W)
 
+        self.label_vazao = ttk.Label(frame_stats, text="")
+        self.label_vazao.grid(row=2, column=0, sticky=tk.W)
+
+        self.label_etapas_tempo = ttk.Label(frame_stats, text="")
+        self.label_etapas_tempo.grid(row=3, column=0, sticky=tk.W)
+
         frame_resultado = ttk.LabelFrame(frame_controles, text="🎯 PLACA", padding="10")
-        frame_resultado.grid(row=5, column=0, sticky=(tk.W, tk.E), pady=(0, 0))
+        frame_resultado.grid(row=9, column=0, sticky=(tk.W, tk.E), pady=(0, 0))
 
         self.label_placa = ttk.Label(frame_resultado, text="---",
                                      font=('Arial', 18, 'bold'), foreground='green')
@@ -1086,6 +2649,22 @@ class PainelPlacasMercosulFinal:
                                 command=self.limpar_log, width=15)
         btn_limpar.grid(row=1, column=0, pady=5)
 
+        frame_fila = ttk.LabelFrame(main_frame, text="🗂️ Fila de Imagens", padding="5")
+        frame_fila.grid(row=2, column=1, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(5, 0))
+        frame_fila.columnconfigure(0, weight=1)
+
+        self.tabela_fila = ttk.Treeview(frame_fila, columns=[c[0] for c in self.COLUNAS_FILA],
+                                        show='headings', height=8, selectmode='browse')
+        for coluna, titulo, largura in self.COLUNAS_FILA:
+            self.tabela_fila.heading(coluna, text=titulo, command=lambda c=coluna: self.ordenar_tabela(c))
+            self.tabela_fila.column(coluna, width=largura, anchor=tk.W if coluna == 'arquivo' else tk.CENTER)
+        self.tabela_fila.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        scroll_fila = ttk.Scrollbar(frame_fila, orient="vertical", command=self.tabela_fila.yview)
+        scroll_fila.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.tabela_fila.configure(yscrollcommand=scroll_fila.set)
+        self.tabela_fila.bind('<<TreeviewSelect>>', self.selecionar_resultado_fila)
+
         self.canvas.bind("<Configure>", self.on_canvas_configure)
         
         self.etapas_imagens = []
@@ -1096,11 +2675,14 @@ class PainelPlacasMercosulFinal:
             try:
                 self.adicionar_log("🚀 Inicializando Sistema AGRESSIVO V2.0...")
                 self.sistema = SistemaReconhecimentoPlacasMelhorado()
-                self.label_status.config(text="✅ Sistema Pronto", foreground='green')
+                self.na_ui(self.label_status.config, text="✅ Sistema Pronto", foreground='green')
+                self.na_ui(self.btn_pasta.config, state='normal')
+                self.na_ui(self.btn_acervo.config, state='normal')
+                self.na_ui(self.btn_exportar.config, state='normal')
                 self.adicionar_log("✅ Sistema AGRESSIVO pronto!")
                 self.adicionar_log("🎯 Filtros relaxados para detectar mais placas")
             except Exception as e:
-                self.label_status.config(text=f"❌ Erro: {e}", foreground='red')
+                self.na_ui(self.label_status.config, text=f"❌ Erro: {e}", foreground='red')
                 self.adicionar_log(f"❌ Erro: {e}")
 
         thread = threading.Thread(target=init)
@@ -1136,36 +2718,57 @@ class PainelPlacasMercosulFinal:
                 messagebox.showerror("Erro", f"Erro: {str(e)}")
 
     def mostrar_imagem_canvas(self, imagem):
-        """Exibir imagem no canvas"""
-        if len(imagem.shape) == 3:
-            imagem_rgb = cv2.cvtColor(imagem, cv2.COLOR_BGR2RGB)
-        else:
-            imagem_rgb = imagem
+        """Exibir imagem no canvas (conversão para RGB feita uma vez por imagem)"""
+        if imagem is not self._imagem_exibida:
+            self._imagem_exibida = imagem
+            self._imagem_rgb = cv2.cvtColor(imagem, cv2.COLOR_BGR2RGB) if len(imagem.shape) == 3 else imagem
+            self._escaladas.clear()
+
+        self._desenhar_canvas()
+
+    def _imagem_escalada(self, new_w, new_h):
+        """Versão reduzida da imagem exibida, guardada para os últimos tamanhos de canvas"""
+        chave = (new_w, new_h)
+        if chave in self._escaladas:
+            self._escaladas.move_to_end(chave)
+            return self._escaladas[chave]
+
+        imagem = self._imagem_rgb
+        if (new_w, new_h) != (imagem.shape[1], imagem.shape[0]):
+            imagem = cv2.resize(imagem, (new_w, new_h), interpolation=cv2.INTER_AREA)
+
+        self._escaladas[chave] = ImageTk.PhotoImage(Image.fromarray(imagem))
+        while len(self._escaladas) > self.ESCALAS_EM_CACHE:
+            self._escaladas.popitem(last=False)
+        return self._escaladas[chave]
+
+    def _desenhar_canvas(self):
+        self._redesenho_agendado = None
+        if self._imagem_rgb is None:
+            return
 
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
 
         if canvas_width > 1 and canvas_height > 1:
-            h, w = imagem_rgb.shape[:2]
+            h, w = self._imagem_rgb.shape[:2]
 
             scale = min(canvas_width / w, canvas_height / h, 1.0)
 
-            new_w = int(w * scale)
-            new_h = int(h * scale)
-
-            imagem_resized = cv2.resize(imagem_rgb, (new_w, new_h))
+            new_w = max(1, int(w * scale))
+            new_h = max(1, int(h * scale))
 
-            pil_image = Image.fromarray(imagem_resized)
-            self.photo = ImageTk.PhotoImage(pil_image)
+            self.photo = self._imagem_escalada(new_w, new_h)
 
             self.canvas.delete("all")
             self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
             self.canvas.configure(scrollregion=self.canvas.bbox("all"))
 
     def on_canvas_configure(self, event):
-        """Redimensionar canvas"""
-        if hasattr(self, 'imagem_atual') and self.imagem_atual is not None:
-            self.mostrar_imagem_canvas(self.imagem_atual)
+        """Redimensionar canvas (agrupa a rajada de eventos de resize em um redesenho)"""
+        if self._redesenho_agendado is not None:
+            self.root.after_cancel(self._redesenho_agendado)
+        self._redesenho_agendado = self.root.after(100, self._desenhar_canvas)
 
     def processar_imagem(self):
         """Processar imagem em thread separada"""
@@ -1173,11 +2776,12 @@ class PainelPlacasMercosulFinal:
             messagebox.showerror("Erro", "Carregue uma imagem!")
             return
 
+        self.btn_processar.config(state='disabled')
+        self.progress.start()
+        self.label_status.config(text="🔄 Processando...", foreground='orange')
+
         def processar():
             try:
-                self.btn_processar.config(state='disabled')
-                self.progress.start()
-                self.label_status.config(text="🔄 Processando...", foreground='orange')
 
                 self.adicionar_log("\n" + "="*60)
                 self.adicionar_log("🚀 PROCESSANDO - MODO AGRESSIVO")
@@ -1188,19 +2792,21 @@ class PainelPlacasMercosulFinal:
 
                 if 'erro' in resultado:
                     self.adicionar_log(f"❌ {resultado['erro']}")
-                    self.mostrar_resultado_final(None)
+                    self.na_ui(self.mostrar_resultado_final, None)
                 else:
-                    self.mostrar_resultado_final(resultado)
-                    self.mostrar_etapas_processamento(resultado)
+                    self.na_ui(self.mostrar_resultado_final, resultado)
+                    self.adicionar_log("\n🔬 Gerando visualização das etapas...")
+                    etapas = self.sistema.etapas_visuais(resultado, self.ETAPA_LARGURA_MAX)
+                    self.na_ui(self.mostrar_etapas_processamento, etapas)
 
             except Exception as e:
                 self.adicionar_log(f"❌ ERRO: {str(e)}")
                 import traceback
                 traceback.print_exc()
             finally:
-                self.btn_processar.config(state='normal')
-                self.progress.stop()
-                self.label_status.config(text="✅ Pronto", foreground='green')
+                self.na_ui(self.btn_processar.config, state='normal')
+                self.na_ui(self.progress.stop)
+                self.na_ui(self.label_status.config, text="✅ Pronto", foreground='green')
 
         thread = threading.Thread(target=processar)
         thread.daemon = True
@@ -1232,7 +2838,7 @@ class PainelPlacasMercosulFinal:
             self.adicionar_log("⚠️ Candidatos encontrados mas nenhum passou na validação")
             return
         
-        texto = ocr_result['easyocr']['texto_final'] or ocr_result['tesseract']['texto_final']
+        texto = ocr_result.get('texto_final') or ocr_result['easyocr']['texto_final'] or ocr_result['tesseract']['texto_final']
         confianca = ocr_result['confianca_deteccao']
         metodo = ocr_result['metodo_deteccao']
         
@@ -1251,7 +2857,7 @@ class PainelPlacasMercosulFinal:
         self.label_placa.config(text=texto if texto else "---", foreground='green')
         self.label_tipo.config(text=tipo)
         self.label_confianca.config(text=f"Confiança: {confianca:.1%}")
-        self.label_placas.config(text="Placas válidas: 1")
+        self.label_placas.config(text=f"Placas válidas: {len(resultado['resultados_ocr'])}")
         self.label_metodo.config(text=f"Método: {metodo}")
 
         self.adicionar_log(f"✅ PLACA VÁLIDA: {texto}")
@@ -1264,112 +2870,350 @@ class PainelPlacasMercosulFinal:
         self.adicionar_log(f"   Tesseract bruto: '{ocr_result['tesseract']['texto_bruto']}'")
         self.adicionar_log(f"   EasyOCR bruto: '{ocr_result['easyocr']['texto_bruto']}'")
 
+        for outra in resultado['resultados_ocr'][1:]:
+            self.adicionar_log(f"✅ PLACA VÁLIDA: {outra['texto_final']} ({outra['confianca_deteccao']:.1%}, {outra['metodo_deteccao']})")
+
         try:
-            img_resultado = resultado['imagem_original'].copy()
-            x1, y1, x2, y2 = ocr_result['bbox']
+            img_resultado = self._desenhar_placa(resultado['imagem_original'], ocr_result['bbox'], texto, metodo, confianca)
+            for outra in resultado['resultados_ocr'][1:]:
+                img_resultado = self._desenhar_placa(img_resultado, outra['bbox'], outra['texto_final'],
+                                                     outra['metodo_deteccao'], outra['confianca_deteccao'])
+            self.mostrar_imagem_canvas(img_resultado)
+        except Exception as e:
+            self.adicionar_log(f"⚠️ Erro ao desenhar resultado: {e}")
 
-            cv2.rectangle(img_resultado, (x1, y1), (x2, y2), (0, 255, 0), 5)
+    def _desenhar_placa(self, imagem, bbox, texto, metodo, confianca):
+        """Cópia da imagem com a caixa, o texto e o método da placa"""
+        img_resultado = imagem.copy()
+        x1, y1, x2, y2 = bbox
 
-            if texto:
-                (tw, th), _ = cv2.getTextSize(texto, cv2.FONT_HERSHEY_SIMPLEX, 1.2, 3)
-                cv2.rectangle(img_resultado, (x1, y1-50), (x1+tw+20, y1), (0, 255, 0), -1)
-                cv2.putText(img_resultado, texto, (x1+10, y1-15),
-                           cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 3)
+        cv2.rectangle(img_resultado, (x1, y1), (x2, y2), (0, 255, 0), 5)
 
-            cv2.putText(img_resultado, metodo, (x1, y2+30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        if texto:
+            (tw, th), _ = cv2.getTextSize(texto, cv2.FONT_HERSHEY_SIMPLEX, 1.2, 3)
+            cv2.rectangle(img_resultado, (x1, y1-50), (x1+tw+20, y1), (0, 255, 0), -1)
+            cv2.putText(img_resultado, texto, (x1+10, y1-15),
+                       cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 3)
 
-            cv2.putText(img_resultado, f"Conf: {confianca:.1%}", (x1, y2+60),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        cv2.putText(img_resultado, metodo, (x1, y2+30),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
 
-            self.mostrar_imagem_canvas(img_resultado)
+        cv2.putText(img_resultado, f"Conf: {confianca:.1%}", (x1, y2+60),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+        return img_resultado
+
+    def carregar_pasta(self):
+        """Escolher uma pasta e processá-la em segundo plano"""
+        if self.sistema is None:
+            messagebox.showerror("Erro", "Sistema ainda não inicializado!")
+            return
+
+        pasta = filedialog.askdirectory(title="Selecionar Pasta de Imagens")
+        if not pasta:
+            return
+
+        self.registros_fila = []
+        self.tabela_fila.delete(*self.tabela_fila.get_children())
+        self.parar_fila = threading.Event()
+
+        self.btn_pasta.config(state='disabled')
+        self.btn_acervo.config(state='disabled')
+        self.btn_exportar.config(state='disabled')
+        self.btn_parar.config(state='normal')
+        self.progress.start()
+        self.label_status.config(text="🔄 Processando fila...", foreground='orange')
+        self.adicionar_log(f"\n📂 Fila: {pasta} ({self.FILA_WORKERS} worker(s))")
+
+        thread = threading.Thread(target=self._processar_fila, args=(pasta, self.parar_fila))
+        thread.daemon = True
+        thread.start()
+
+    def abrir_acervo(self):
+        """Carregar um acervo de recortes na tabela da fila (recortes lidos do memmap, sem reprocessar)"""
+        diretorio = filedialog.askdirectory(title="Selecionar Acervo de Recortes")
+        if not diretorio:
+            return
+
+        try:
+            acervo = AcervoRecortes(diretorio)
         except Exception as e:
-            self.adicionar_log(f"⚠️ Erro ao desenhar resultado: {e}")
+            messagebox.showerror("Erro", f"Não foi possível abrir o acervo: {e}")
+            return
+
+        registros = acervo.registros_resultado()
+        self.registros_fila = []
+        self.tabela_fila.delete(*self.tabela_fila.get_children())
+        for i, registro in enumerate(registros, 1):
+            self._adicionar_registro_fila(registro, i, len(registros), 0.0, {})
+        self.label_vazao.config(text=f"Acervo: {len(acervo)} recorte(s) de {len(registros)} origem(ns)")
+        self.adicionar_log(f"\n📦 Acervo {diretorio}: {len(acervo)} recorte(s), {acervo.formato[1]}x{acervo.formato[0]}")
+
+    def exportar_recortes(self):
+        """Gravar os recortes dos resultados da fila em um acervo (novo ou existente)"""
+        if not any(l.recorte is not None for r in self.registros_fila for l in r.leituras):
+            messagebox.showinfo("Exportar", "Nenhum recorte na fila: processe uma pasta primeiro.")
+            return
+
+        diretorio = filedialog.askdirectory(title="Pasta do Acervo de Recortes")
+        if not diretorio:
+            return
+
+        total = 0
+        with AcervoRecortes(diretorio, modo='a') as acervo:
+            for registro in self.registros_fila:
+                total += len(acervo.adicionar_resultado(registro))
+        self.adicionar_log(f"💾 {total} recorte(s) exportado(s) para {diretorio}")
+
+    def parar_processamento_fila(self):
+        if self.parar_fila is not None:
+            self.parar_fila.set()
+            self.adicionar_log("⏹️ Parando fila (imagens em andamento serão concluídas)...")
+
+    def _processar_item_fila(self, item):
+        """Processar uma imagem da fila (thread do pool), mantendo só o registro compacto"""
+        if item['erro']:
+            return RegistroResultado(caminho=item['caminho'], erro=item['erro'])
+
+        with self.sistema.usar_perfil({'manter_recortes': True}):
+            return self.sistema.processar_quadro(item['imagem'], caminho_imagem=item['caminho'], compacto=True)
+
+    def _processar_fila(self, pasta, parar):
+        """Leitura antecipada (LeitorImagensLote) + pool de workers; resultados vão para a UI pela fila"""
+        from leitor_lote import LeitorImagensLote, listar_entradas
+
+        try:
+            self.sistema.configurar_threads(self.FILA_WORKERS, em_processo=True)
+            threads = self.sistema.threads
+            self.adicionar_log(f"🧵 OpenCV {threads['opencv_threads']} thread(s), Torch {threads['torch_threads'] or '-'} "
+                               f"por worker ({threads['nucleos_fisicos']} núcleo(s) físico(s))")
+
+            total = sum(1 for _ in listar_entradas(pasta))
+            leitor = LeitorImagensLote(pasta, threads=2, tamanho_fila=self.FILA_PREFETCH)
+            inicio = time.perf_counter()
+            concluidas = 0
+            somas = {}
+            memoria = ResumoMemoria()
+
+            def concluir(futuros):
+                nonlocal concluidas
+                for futuro in futuros:
+                    try:
+                        registro = futuro.result()
+                    except Exception as e:
+                        registro = RegistroResultado(erro=str(e))
+                    concluidas += 1
+                    memoria.adicionar(registro)
+                    for etapa, valor in registro.tempos.items():
+                        somas[etapa] = somas.get(etapa, 0.0) + valor
+                    medias = {etapa: valor / concluidas for etapa, valor in somas.items()}
+                    vazao = concluidas / max(time.perf_counter() - inicio, 1e-6)
+                    self.na_ui(self._adicionar_registro_fila, registro, concluidas, total, vazao, medias)
+
+            with ThreadPoolExecutor(max_workers=self.FILA_WORKERS) as executor:
+                pendentes = set()
+                for item in leitor:
+                    if parar.is_set():
+                        break
+                    if len(pendentes) >= self.FILA_WORKERS * 2:
+                        feitos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                        concluir(feitos)
+                    pendentes.add(executor.submit(self._processar_item_fila, item))
+
+                concluir(wait(pendentes)[0])
+
+            duracao = time.perf_counter() - inicio
+            self.adicionar_log(f"🏁 Fila concluída: {concluidas}/{total} imagens em {duracao:.1f}s "
+                               f"({concluidas / max(duracao, 1e-6):.2f} img/s)")
+            for linha in memoria.linhas():
+                self.adicionar_log(linha)
+        except Exception as e:
+            self.adicionar_log(f"❌ Erro na fila: {e}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            self.na_ui(self.btn_pasta.config, state='normal')
+            self.na_ui(self.btn_acervo.config, state='normal')
+            self.na_ui(self.btn_exportar.config, state='normal')
+            self.na_ui(self.btn_parar.config, state='disabled')
+            self.na_ui(self.progress.stop)
+            self.na_ui(self.label_status.config, text="✅ Pronto", foreground='green')
+
+    def _adicionar_registro_fila(self, registro, concluidas, total, vazao, medias):
+        """Inserir uma linha na tabela e atualizar vazão e tempos médios por etapa"""
+        indice = len(self.registros_fila)
+        self.registros_fila.append(registro)
+
+        leitura = next((l for l in registro.leituras if l.placa_valida), None)
+        tempos = registro.tempos
+        valores = (
+            registro.nome_arquivo or os.path.basename(registro.caminho or ''),
+            leitura.texto if leitura else ('❌ erro' if registro.erro else '---'),
+            f"{leitura.confianca:.0%}" if leitura else '',
+            registro.candidatos,
+            f"{tempos.get('deteccao', 0) * 1000:.0f}",
+            f"{tempos.get('ocr', 0) * 1000:.0f}",
+            f"{tempos.get('total', 0) * 1000:.0f}",
+        )
+        self.tabela_fila.insert('', tk.END, iid=str(indice), values=valores)
+
+        self.label_vazao.config(text=f"Fila: {concluidas}/{total} | ⚡ {vazao:.2f} img/s")
+        self.label_etapas_tempo.config(text=" | ".join(f"{etapa}: {valor * 1000:.0f}ms"
+                                                       for etapa, valor in sorted(medias.items())))
+
+    def ordenar_tabela(self, coluna):
+        """Ordenar a tabela da fila pela coluna clicada (clicar de novo inverte)"""
+        decrescente = not self.ordem_tabela.get(coluna, True)
+        self.ordem_tabela = {coluna: decrescente}
+
+        def chave(iid):
+            valor = self.tabela_fila.set(iid, coluna)
+            try:
+                return (0, float(str(valor).rstrip('%')))
+            except ValueError:
+                return (1, str(valor))
+
+        itens = sorted(self.tabela_fila.get_children(''), key=chave, reverse=decrescente)
+        for posicao, iid in enumerate(itens):
+            self.tabela_fila.move(iid, '', posicao)
+
+    def selecionar_resultado_fila(self, event=None):
+        """Exibir um resultado da fila sem reprocessar: releitura e etapas numa thread, exibição via na_ui"""
+        selecao = self.tabela_fila.selection()
+        if not selecao:
+            return
+
+        registro = self.registros_fila[int(selecao[0])]
+        if registro.erro:
+            self.adicionar_log(f"❌ {registro.caminho}: {registro.erro}")
+            return
+
+        self.selecao_fila += 1
+        thread = threading.Thread(target=self._carregar_selecao_fila, args=(registro, self.selecao_fila))
+        thread.daemon = True
+        thread.start()
+
+    def _carregar_selecao_fila(self, registro, geracao):
+        """Thread: reabrir a imagem de origem, desenhar a placa e gerar as etapas"""
+        try:
+            imagem = None
+            if registro.caminho and '::' not in registro.caminho and os.path.exists(registro.caminho):
+                imagem = cv2.imread(registro.caminho)
+
+            if imagem is None:
+                # Sem a imagem de origem (ex.: acervo de outra máquina): mostrar só o recorte
+                leitura = next((l for l in registro.leituras if l.recorte is not None), None)
+                if leitura is None:
+                    self.adicionar_log(f"⚠️ Não foi possível reabrir {registro.caminho}")
+                    return
+                tela = leitura.recorte
+            else:
+                leitura = next((l for l in registro.leituras if l.placa_valida), None)
+                tela = imagem if leitura is None else self._desenhar_placa(imagem, leitura.bbox, leitura.texto,
+                                                                            leitura.metodo, leitura.confianca)
+
+            etapas = None
+            if leitura is not None and leitura.recorte is not None:
+                etapas = self.sistema.etapas_visuais_cache(leitura.recorte, self.ETAPA_LARGURA_MAX)
+
+            self.na_ui(self._exibir_selecao_fila, registro, geracao, imagem, leitura, tela, etapas)
+        except Exception as e:
+            self.adicionar_log(f"❌ Erro ao exibir {registro.caminho}: {e}")
+
+    def _exibir_selecao_fila(self, registro, geracao, imagem, leitura, tela, etapas):
+        """Thread do Tk: aplicar o que _carregar_selecao_fila preparou (se ainda for a linha selecionada)"""
+        if geracao != self.selecao_fila:
+            return
+
+        if imagem is not None:
+            self.imagem_atual = imagem
+            self.caminho_imagem = registro.caminho
+            self.btn_processar.config(state='normal')
+
+        if leitura is None:
+            self.label_placa.config(text="❌ Não detectada", foreground='red')
+            self.label_tipo.config(text="")
+            self.label_confianca.config(text="")
+            self.label_metodo.config(text="")
+        else:
+            self.label_placa.config(text=leitura.texto, foreground='green' if leitura.placa_valida else 'red')
+            self.label_tipo.config(text=registro.nome_arquivo or '')
+            self.label_confianca.config(text=f"Confiança: {leitura.confianca:.1%}")
+            self.label_metodo.config(text=f"Método: {leitura.metodo}")
+
+        self.mostrar_imagem_canvas(tela)
+        if etapas is not None:
+            self.mostrar_etapas_processamento(etapas)
 
     def adicionar_log(self, texto):
-        """Adicionar texto ao log"""
-        self.text_log.insert(tk.END, texto + "\n")
-        self.text_log.see(tk.END)
-        self.root.update_idletasks()
+        """Adicionar texto ao log (seguro a partir de qualquer thread)"""
+        self.fila_ui.put(('log', texto))
+
+    def na_ui(self, funcao, *args, **kwargs):
+        """Executar funcao na thread do Tk, na ordem das demais atualizações"""
+        self.fila_ui.put(('chamada', funcao, args, kwargs))
+
+    def _drenar_fila_ui(self):
+        """Aplicar as atualizações pendentes: linhas de log agrupadas em um único insert"""
+        linhas = []
+
+        def descarregar_log():
+            if linhas:
+                self.text_log.insert(tk.END, "\n".join(linhas) + "\n")
+                del linhas[:]
+
+        try:
+            for _ in range(self.MENSAGENS_POR_CICLO):
+                try:
+                    item = self.fila_ui.get_nowait()
+                except queue.Empty:
+                    break
+
+                if item[0] == 'log':
+                    linhas.append(item[1])
+                    continue
+
+                descarregar_log()
+                _, funcao, args, kwargs = item
+                try:
+                    funcao(*args, **kwargs)
+                except Exception as e:
+                    linhas.append(f"❌ Erro na interface: {e}")
+
+            if linhas:
+                descarregar_log()
+                excedente = int(self.text_log.index('end-1c').split('.')[0]) - self.LOG_MAX_LINHAS
+                if excedente > 0:
+                    self.text_log.delete('1.0', f'{excedente + 1}.0')
+                self.text_log.see(tk.END)
+        finally:
+            self.root.after(self.INTERVALO_UI_MS, self._drenar_fila_ui)
 
     def limpar_log(self):
         """Limpar log"""
         self.text_log.delete(1.0, tk.END)
     
-    def mostrar_etapas_processamento(self, resultado):
-        """Mostrar etapas visuais do processamento"""
+    def mostrar_etapas_processamento(self, etapas):
+        """Mostrar etapas visuais do processamento (imagens RGB já reduzidas por etapas_visuais)"""
         try:
-            if not resultado or 'resultados_ocr' not in resultado or not resultado['resultados_ocr']:
-                self.adicionar_log("⚠️ Sem resultados para mostrar etapas")
+            if not etapas:
+                self.adicionar_log("⚠️ Imagem da placa não disponível")
                 return
             
             self.canvas_etapas.delete("all")
             self.etapas_imagens = []
             
-            self.adicionar_log("\n🔬 Gerando visualização das etapas...")
-            
-            ocr = resultado['resultados_ocr'][0]
-            img_placa = ocr.get('imagem_placa')
-            
-            if img_placa is None:
-                self.adicionar_log("⚠️ Imagem da placa não disponível")
-                return
-            
-            etapas = []
-            
-            etapas.append(("1. Placa Recortada", img_placa))
-            
-            if len(img_placa.shape) == 3:
-                gray = cv2.cvtColor(img_placa, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = img_placa.copy()
-            etapas.append(("2. Escala Cinza", gray))
-            
-            h, w = gray.shape
-            gray_5x = cv2.resize(gray, (w*5, h*5), interpolation=cv2.INTER_CUBIC)
-            etapas.append(("3. Ampliada 5x", gray_5x))
-            
-            clahe = cv2.createCLAHE(clipLimit=4.0, tileGridSize=(8,8))
-            img_clahe = clahe.apply(gray_5x)
-            etapas.append(("4. CLAHE (Contraste)", img_clahe))
-            
-            kernel_sharp = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-            sharpened = cv2.filter2D(img_clahe, -1, kernel_sharp)
-            etapas.append(("5. Sharpening", sharpened))
-            
-            _, thresh = cv2.threshold(img_clahe, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            etapas.append(("6. Binarizada", thresh))
-            
-            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-            morph = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-            etapas.append(("7. Morfologia Final", morph))
-            
             y_offset = 10
             
-            for nome, img in etapas:
-                h, w = img.shape[:2] if len(img.shape) == 2 else img.shape[:2]
-                max_width = 270
-                scale = min(max_width / w, 1.0)
-                new_w = int(w * scale)
-                new_h = int(h * scale)
+            for nome, img_rgb in etapas:
+                photo = ImageTk.PhotoImage(Image.fromarray(img_rgb))
+                self.etapas_imagens.append(photo)
+                
+                self.canvas_etapas.create_text(10, y_offset, text=nome, anchor=tk.NW, 
+                                              font=('Arial', 9, 'bold'), fill='darkgreen')
+                self.canvas_etapas.create_image(10, y_offset + 20, anchor=tk.NW, image=photo)
                 
-                if new_w > 0 and new_h > 0:
-                    img_resized = cv2.resize(img, (new_w, new_h))
-                    
-                    if len(img_resized.shape) == 2:
-                        img_rgb = cv2.cvtColor(img_resized, cv2.COLOR_GRAY2RGB)
-                    else:
-                        img_rgb = cv2.cvtColor(img_resized, cv2.COLOR_BGR2RGB)
-                    
-                    pil_img = Image.fromarray(img_rgb)
-                    photo = ImageTk.PhotoImage(pil_img)
-                    self.etapas_imagens.append(photo)
-                    
-                    self.canvas_etapas.create_text(10, y_offset, text=nome, anchor=tk.NW, 
-                                                  font=('Arial', 9, 'bold'), fill='darkgreen')
-                    self.canvas_etapas.create_image(10, y_offset + 20, anchor=tk.NW, image=photo)
-                    
-                    y_offset += new_h + 35
+                y_offset += img_rgb.shape[0] + 35
             
             self.canvas_etapas.configure(scrollregion=self.canvas_etapas.bbox("all"))
             self.adicionar_log("✅ Etapas visuais geradas")
@@ -0,0 +1,402 @@
+# Trabalhos em lote retomáveis: manifesto de progresso, novas tentativas e fatias por índice
+# Cada entrada concluída fica registrada no manifesto (append-only) com o offset do seu registro
+# na saída JSONL; ao reiniciar, o trabalho continua exatamente de onde parou
+
+import argparse
+import json
+import os
+import tarfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from leitor_lote import listar_entradas, decodificar, _eh_imagem
+from perfil_memoria import ResumoMemoria
+from acervo_recortes import AcervoRecortes
+
+# Estados de uma entrada no manifesto
+CONCLUIDO = 'concluido'
+TENTATIVA = 'tentativa'
+FALHA = 'falha'
+DESISTIDO = 'desistido'
+
+
+def listar_trabalho(fontes):
+    """
+    Lista estável de entradas (caminho ou 'arquivo::membro'): a mesma ordem em todas as máquinas,
+    que é o que permite fatiar por índice e retomar
+    """
+    entradas = []
+    for tipo, origem, nome in listar_entradas(fontes):
+        if tipo == 'tar':
+            with tarfile.open(origem) as arquivo_tar:
+                entradas.extend(f"{origem}::{membro.name}" for membro in arquivo_tar
+                                if membro.isfile() and _eh_imagem(membro.name))
+        elif tipo == 'erro':
+            # Fica na lista para que a falha apareça na saída (e no manifesto) em vez de sumir
+            entradas.append(origem)
+        elif nome is not None:
+            entradas.append(f"{origem}::{nome}")
+        else:
+            entradas.append(origem)
+    return entradas
+
+
+def fatiar(entradas, fatia=0, fatias=1):
+    """Entradas desta máquina: pares (índice global, entrada) com índice % fatias == fatia"""
+    if not 0 <= fatia < fatias:
+        raise ValueError(f"Fatia {fatia} fora de 0..{fatias - 1}")
+    return [(indice, entrada) for indice, entrada in enumerate(entradas) if indice % fatias == fatia]
+
+
+class ArquivosAbertos:
+    """
+    .zip/.tar abertos por uma thread (os objetos de arquivo não podem ser compartilhados)
+    Cada arquivo é identificado e aberto uma vez; o .tar é indexado (nome -> TarInfo) na abertura,
+    e extractfile(membro) vai direto ao offset em vez de varrer os cabeçalhos a cada membro
+    """
+
+    def __init__(self):
+        self.abertos = {}
+
+    def ler(self, origem, nome):
+        aberto = self.abertos.get(origem)
+        if aberto is None:
+            if zipfile.is_zipfile(origem):
+                aberto = zipfile.ZipFile(origem)
+            else:
+                arquivo_tar = tarfile.open(origem)
+                aberto = (arquivo_tar, {membro.name: membro for membro in arquivo_tar.getmembers()})
+            self.abertos[origem] = aberto
+
+        if isinstance(aberto, zipfile.ZipFile):
+            return aberto.read(nome)
+        arquivo_tar, membros = aberto
+        return arquivo_tar.extractfile(membros[nome]).read()
+
+    def fechar(self):
+        for aberto in self.abertos.values():
+            (aberto if isinstance(aberto, zipfile.ZipFile) else aberto[0]).close()
+        self.abertos = {}
+
+
+def carregar_entrada(entrada, arquivos=None):
+    """
+    Decodificar 'arquivo::membro' de .zip/.tar (None se os bytes não forem imagem)
+    arquivos: ArquivosAbertos da thread, para não reabrir nem reindexar o arquivo a cada membro
+    """
+    origem, nome = entrada.split('::', 1)
+    if arquivos is None:
+        arquivos = ArquivosAbertos()
+        try:
+            return decodificar(arquivos.ler(origem, nome))
+        finally:
+            arquivos.fechar()
+    return decodificar(arquivos.ler(origem, nome))
+
+
+def processar_entrada(sistema, entrada, camera=None, perfil=None, arquivos=None):
+    """Processar uma entrada de listar_trabalho (caminho solto ou membro de .zip/.tar) -> RegistroResultado"""
+    if '::' in entrada and not os.path.exists(entrada):
+        imagem = carregar_entrada(entrada, arquivos)
+        if imagem is None:
+            return sistema._finalizar_resultado({'caminho': entrada, 'erro': f'Não foi possível decodificar: {entrada}'}, True)
+        return sistema.processar_quadro(imagem, camera=camera, caminho_imagem=entrada, compacto=True, perfil=perfil)
+    return sistema.processar_imagem(entrada, camera=camera, compacto=True, perfil=perfil)
+
+
+class ManifestoTrabalho:
+    """
+    Manifesto append-only (JSONL): um cabeçalho com a identidade do trabalho e uma linha por
+    tentativa ({'i', 'estado', 'tentativa', 'offset', 'bytes', 'erro'})
+    Cada tentativa é sincronizada antes de começar, então uma entrada que derruba o processo
+    também conta tentativas entre execuções
+    Só entradas cujo registro já foi gravado e sincronizado na saída recebem offset
+    """
+
+    def __init__(self, caminho, cabecalho):
+        self.caminho = caminho
+        self.concluidas = {}
+        self.tentadas = {}
+        self.fim_saida = 0
+        self.lock = threading.Lock()
+
+        if os.path.exists(caminho):
+            self._carregar(cabecalho)
+        else:
+            with open(caminho, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(dict(cabecalho, tipo='cabecalho'), ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.arquivo = open(caminho, 'a', encoding='utf-8')
+
+    def _carregar(self, cabecalho):
+        with open(self.caminho, 'r', encoding='utf-8') as f:
+            linhas = f.read().split('\n')
+
+        registros = []
+        for numero, linha in enumerate(linhas):
+            if not linha.strip():
+                continue
+            try:
+                registros.append(json.loads(linha))
+            except ValueError:
+                # Só a última linha pode estar truncada (queda no meio da escrita)
+                if any(l.strip() for l in linhas[numero + 1:]):
+                    raise ValueError(f"Manifesto corrompido na linha {numero + 1}: {self.caminho}")
+
+        if not registros or registros[0].get('tipo') != 'cabecalho':
+            raise ValueError(f"Manifesto sem cabeçalho: {self.caminho}")
+
+        anterior = {chave: valor for chave, valor in registros[0].items() if chave != 'tipo'}
+        if anterior != json.loads(json.dumps(cabecalho)):
+            raise ValueError(f"Manifesto pertence a outro trabalho: {anterior}")
+
+        for registro in registros[1:]:
+            indice = registro['i']
+            if registro['estado'] in (TENTATIVA, FALHA):
+                self.tentadas[indice] = max(self.tentadas.get(indice, 0), registro['tentativa'])
+            else:
+                self.concluidas[indice] = registro
+                self.fim_saida = max(self.fim_saida, registro['offset'] + registro['bytes'])
+
+        # Reescrever sem a linha truncada, para que novas linhas não fiquem coladas nela
+        if linhas and linhas[-1].strip():
+            with open(self.caminho, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(l for l in linhas if l.strip() and _json_valido(l)) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def tentativas(self, indice):
+        return self.tentadas.get(indice, 0)
+
+    def registrar(self, registros):
+        """Acrescentar linhas e sincronizar (conclusões só depois da saída já estar no disco)"""
+        if not registros:
+            return
+        with self.lock:
+            self.arquivo.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in registros))
+            self.arquivo.flush()
+            os.fsync(self.arquivo.fileno())
+            for registro in registros:
+                if registro['estado'] in (TENTATIVA, FALHA):
+                    self.tentadas[registro['i']] = max(self.tentadas.get(registro['i'], 0), registro['tentativa'])
+                else:
+                    self.concluidas[registro['i']] = registro
+
+    def fechar(self):
+        self.arquivo.close()
+
+
+def _json_valido(linha):
+    try:
+        json.loads(linha)
+        return True
+    except ValueError:
+        return False
+
+
+class TrabalhoLote:
+    """
+    Processar uma lista de entradas com processar_imagem/processar_quadro, gravando um registro
+    JSONL por entrada e o progresso no manifesto
+    Falhas (exceção ou resultado com erro) são repetidas até tentativas_max vezes, inclusive entre
+    execuções; esgotadas as tentativas, o registro com o erro vai para a saída e a entrada é encerrada
+    acervo: AcervoRecortes (modo 'a') que recebe os recortes (exige config['manter_recortes']); é
+    gravado antes do manifesto, então uma queda pode repetir recortes de entradas refeitas (campo 'indice')
+    """
+
+    def __init__(self, sistema, fontes, saida, manifesto=None, fatia=0, fatias=1, tentativas_max=3,
+                 espera_tentativa=1.0, workers=1, lote=50, perfil=None, camera=None, acervo=None, log_callback=None):
+        self.sistema = sistema
+        self.fontes = [fontes] if isinstance(fontes, str) else list(fontes)
+        self.saida = saida
+        self.manifesto_caminho = manifesto or saida + '.manifesto'
+        self.fatia = fatia
+        self.fatias = fatias
+        self.tentativas_max = tentativas_max
+        self.espera_tentativa = espera_tentativa
+        self.workers = max(1, workers)
+        self.lote = max(1, lote)
+        self.perfil = perfil
+        self.camera = camera
+        self.acervo = acervo
+        self.log = log_callback or (lambda msg: None)
+        self.local = threading.local()
+        self.estatisticas = {'total': 0, 'ja_concluidas': 0, 'processadas': 0, 'falhas': 0, 'desistidas': 0}
+        self.memoria = ResumoMemoria()
+
+    def _arquivos(self):
+        abertos = getattr(self.local, 'arquivos', None)
+        if abertos is None:
+            abertos = self.local.arquivos = ArquivosAbertos()
+        return abertos
+
+    def _processar(self, manifesto, indice, entrada, tentativa_inicial):
+        """Tentar a entrada até dar certo ou esgotar; retorna (registro, [falhas já gravadas no manifesto])"""
+        eventos = []
+        for tentativa in range(tentativa_inicial, self.tentativas_max + 1):
+            manifesto.registrar([{'i': indice, 'estado': TENTATIVA, 'tentativa': tentativa}])
+            try:
+                resultado = processar_entrada(self.sistema, entrada, self.camera, self.perfil, self._arquivos())
+                erro = resultado.erro
+            except Exception as e:
+                resultado, erro = None, f'{type(e).__name__}: {e}'
+
+            if erro is None:
+                return resultado, eventos
+
+            eventos.append({'i': indice, 'estado': FALHA, 'tentativa': tentativa, 'erro': erro})
+            manifesto.registrar(eventos[-1:])
+            if tentativa < self.tentativas_max:
+                time.sleep(self.espera_tentativa * tentativa)
+
+        if resultado is None:
+            resultado = self.sistema._finalizar_resultado({'caminho': entrada, 'erro': eventos[-1]['erro']}, True)
+        return resultado, eventos
+
+    def executar(self):
+        """Processar as entradas pendentes desta fatia; retorna as estatísticas"""
+        entradas = listar_trabalho(self.fontes)
+        cabecalho = {'fontes': self.fontes, 'entradas': len(entradas), 'fatia': self.fatia, 'fatias': self.fatias}
+        manifesto = ManifestoTrabalho(self.manifesto_caminho, cabecalho)
+
+        # Registros gravados depois da última linha do manifesto são descartados e refeitos
+        with open(self.saida, 'ab') as f:
+            if f.tell() > manifesto.fim_saida:
+                self.log(f"✂️ Descartando {f.tell() - manifesto.fim_saida} byte(s) sem registro no manifesto")
+                f.truncate(manifesto.fim_saida)
+
+        minhas = fatiar(entradas, self.fatia, self.fatias)
+        pendentes = [(indice, entrada) for indice, entrada in minhas
+                     if indice not in manifesto.concluidas and manifesto.tentativas(indice) < self.tentativas_max]
+        esgotadas = [(indice, entrada) for indice, entrada in minhas
+                     if indice not in manifesto.concluidas and manifesto.tentativas(indice) >= self.tentativas_max]
+
+        self.estatisticas.update(total=len(minhas), ja_concluidas=len(minhas) - len(pendentes) - len(esgotadas))
+        self.log(f"📋 Fatia {self.fatia + 1}/{self.fatias}: {len(minhas)} entrada(s), "
+                 f"{self.estatisticas['ja_concluidas']} já concluída(s), {len(pendentes)} pendente(s)")
+
+        saida = open(self.saida, 'ab')
+        lote_saida, lote_manifesto = [], []
+
+        def gravar(indice, entrada, registro, eventos):
+            self.memoria.adicionar(registro)
+            if self.acervo is not None:
+                self.acervo.adicionar_resultado(registro, indice=indice)
+            linha = json.dumps(dict(registro.para_dict(), indice=indice), ensure_ascii=False).encode('utf-8') + b'\n'
+            lote_saida.append((indice, linha, eventos, registro.erro))
+            if len(lote_saida) >= self.lote:
+                descarregar()
+
+        def descarregar():
+            if not lote_saida:
+                return
+            if self.acervo is not None:
+                self.acervo.descarregar()
+            offset = saida.tell()
+            saida.write(b''.join(linha for _, linha, _, _ in lote_saida))
+            saida.flush()
+            os.fsync(saida.fileno())
+
+            for indice, linha, eventos, erro in lote_saida:
+                lote_manifesto.append({'i': indice, 'estado': DESISTIDO if erro else CONCLUIDO,
+                                       'tentativa': manifesto.tentativas(indice),
+                                       'offset': offset, 'bytes': len(linha), 'erro': erro})
+                offset += len(linha)
+                self.estatisticas['desistidas' if erro else 'processadas'] += 1
+                self.estatisticas['falhas'] += len(eventos)
+
+            manifesto.registrar(lote_manifesto)
+            del lote_saida[:], lote_manifesto[:]
+
+        inicio = time.perf_counter()
+        try:
+            # Entradas que já esgotaram as tentativas em execuções anteriores: registrar o erro e encerrar
+            for indice, entrada in esgotadas:
+                registro = self.sistema._finalizar_resultado({'caminho': entrada, 'erro': 'Tentativas esgotadas'}, True)
+                gravar(indice, entrada, registro, [])
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                restantes = iter(pendentes)
+                em_andamento = {}
+                feitas = 0
+
+                def agendar():
+                    for indice, entrada in restantes:
+                        futuro = executor.submit(self._processar, manifesto, indice, entrada,
+                                                 manifesto.tentativas(indice) + 1)
+                        em_andamento[futuro] = (indice, entrada)
+                        if len(em_andamento) >= self.workers * 2:
+                            return
+
+                agendar()
+                while em_andamento:
+                    prontos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        indice, entrada = em_andamento.pop(futuro)
+                        registro, eventos = futuro.result()
+                        gravar(indice, entrada, registro, eventos)
+                        if eventos:
+                            self.log(f"⚠️ [{indice}] {entrada}: {len(eventos)} falha(s), última: {eventos[-1]['erro']}")
+
+                        feitas += 1
+                        if feitas % self.lote == 0:
+                            decorrido = time.perf_counter() - inicio
+                            self.log(f"⏱️ {feitas}/{len(pendentes)} ({feitas / decorrido:.1f} img/s)")
+                    agendar()
+        finally:
+            # Também na interrupção: o que já terminou fica registrado
+            descarregar()
+            saida.close()
+            manifesto.fechar()
+
+        self.log(f"✅ Fatia concluída: {self.estatisticas['processadas']} ok, "
+                 f"{self.estatisticas['desistidas']} com erro, {self.estatisticas['falhas']} falha(s) repetida(s)")
+        if self.memoria.quadros:
+            self.estatisticas['memoria'] = self.memoria.relatorio()
+            for linha in self.memoria.linhas():
+                self.log(linha)
+        return self.estatisticas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Processamento em lote retomável (manifesto de progresso)')
+    parser.add_argument('fontes', nargs='+', help='Diretórios, .zip, .tar ou imagens')
+    parser.add_argument('--saida', required=True, help='Arquivo JSONL de resultados')
+    parser.add_argument('--manifesto', help='Manifesto de progresso (padrão: <saida>.manifesto)')
+    parser.add_argument('--fatia', default='0/1', help="'i/n': processar as entradas com índice %% n == i")
+    parser.add_argument('--tentativas', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--lote', type=int, default=50, help='Registros por sincronização com o disco')
+    parser.add_argument('--perfil', help='Perfil de pipeline (rapido, balanceado, agressivo)')
+    parser.add_argument('--camera')
+    parser.add_argument('--memoria', action='store_true', help='Medir memória por etapa e resumir no fim')
+    parser.add_argument('--acervo', help='Diretório de um acervo de recortes para anexar as placas lidas')
+    args = parser.parse_args()
+
+    fatia, fatias = (int(v) for v in args.fatia.split('/'))
+
+    from sistema_placas_final import SistemaReconhecimentoPlacasMelhorado
+
+    config = {'memoria_perfil': args.memoria, 'manter_recortes': bool(args.acervo)}
+    if args.workers > 1:
+        config.update(cpu_workers=args.workers, cpu_workers_em_processo=True)
+    sistema = SistemaReconhecimentoPlacasMelhorado(config=config)
+    acervo = AcervoRecortes(args.acervo, modo='a') if args.acervo else None
+
+    trabalho = TrabalhoLote(sistema, args.fontes, args.saida, manifesto=args.manifesto, fatia=fatia, fatias=fatias,
+                            tentativas_max=args.tentativas, workers=args.workers, lote=args.lote,
+                            perfil=args.perfil, camera=args.camera, acervo=acervo, log_callback=print)
+    try:
+        trabalho.executar()
+    finally:
+        if acervo is not None:
+            acervo.fechar()
+        sistema.fechar()
+
+
+if __name__ == '__main__':
+    main()